@@ -1,5 +1,5 @@
 """``ASCII`` diagrams language parser and renderer.
-:func:`print` and :func:`diagram`.
+:func:`print`, :func:`diagram`, :func:`iterparse` and :func:`diff`.
 
 In addition, :class:`Diagram` class may be used to access the low-level API.
 """
@@ -9,6 +9,8 @@ from .diagram import Diagram
 from .sequence import SequenceDiagram
 from .exceptions import InterpreterError, BadAttribute, BadSyntax
 from .renderer import Renderer
+from .events import iterparse
+from .compare import diff
 
 
 __version__ = '4.1.0'
@@ -20,11 +22,13 @@ __all__ = [
     'BadSyntax',
     'Renderer',
     'print',
-    'diagram'
+    'diagram',
+    'iterparse',
+    'diff',
 ]
 
 
-def diagram(source, rstrip=True):
+def diagram(source, rstrip=True, compact=False):
     """High level API to generate ASCII diagram.
 
     This function is equivalent to:
@@ -38,14 +42,17 @@ def diagram(source, rstrip=True):
     :param rstrip: If ``True``, the trailing wihtespaces at the end of each
                    line will be removed.
     :type rstrip: bool, optional, default: True
+    :param compact: If ``True``, the modules are placed as close as their
+                    items allow, instead of widening the gaps item by item.
+    :type compact: bool, optional, default: False
     :return: ASCII diagram.
     :rtype: str
 
     """
-    return Diagram(source).renders(rstrip)
+    return Diagram(source).renders(rstrip, compact)
 
 
-def print(source, file=None, rstrip=True):
+def print(source, file=None, rstrip=True, compact=False):
     """High level API to write ASCII diagram into file.
 
     Equivalent to:
@@ -75,6 +82,9 @@ def print(source, file=None, rstrip=True):
     :param rstrip: If ``True``, the trailing wihtespaces at the end of each
                    line will be removed.
     :type rstrip: bool, optional, default: True
+    :param compact: If ``True``, the modules are placed as close as their
+                    items allow, instead of widening the gaps item by item.
+    :type compact: bool, optional, default: False
 
     """
-    Diagram(source).render(file or sys.stdout, rstrip)
+    Diagram(source).render(file or sys.stdout, rstrip, compact)
@@ -0,0 +1,305 @@
+"""Compact binary format of the parsed diagrams.
+
+See :meth:`.Diagram.to_bytes` and :meth:`.Diagram.from_bytes`.
+
+The data starts with a header, the ``ADIA`` magic and the format version,
+followed by three arrays of unsigned integers, the lengths of the strings,
+the numbers and the references to the strings, and the UTF-8 encoded
+strings. The size and length of each array is in the header, the integers
+are little endian, 8, 16 or 32 bit values, the smallest size which fits
+all of them. A string is referred by its index plus one, zero is ``None``.
+
+The diagram is written in the document order, the strings into the
+references and the rest into the numbers:
+
+* The diagram ``title``, ``version`` and ``author``, the number of the
+  sections.
+* For each section the ``title``, ``description`` and ``tags``, the number
+  of the modules and the ``name``, ``title`` and ``type`` of each one in
+  the order of their ids, the number of the visible modules and their ids
+  in the :attr:`.SequenceDiagram.modules_order`, the number of the items.
+* For each item, the type code, which is doubled and added to one if the
+  item is ``multiline``, the ``kind`` and ``text``, the number of the
+  ``args`` and the args. The calls are followed by the ``callerid``,
+  ``calleeid`` and ``returntext``, and all the items except the notes by
+  the number of their children.
+"""
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+from .sequence import SequenceDiagram, Module, Call, Note, Loop, Condition
+
+
+MAGIC = b'ADIA'
+
+#: The version of the format, the data of the other versions is rejected.
+FORMAT = 1
+
+# Magic, format, the size and length of the lengths, numbers and references.
+HEADER = struct.Struct('<4sBBIBIBI')
+
+# The array type codes by the size of the integers.
+TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+
+# The type codes of the items.
+CALL = 0
+NOTE = 1
+LOOP = 2
+CONDITION = 3
+
+CLASSES = [Call, Note, Loop, Condition]
+TYPES = {cls: type_ for type_, cls in enumerate(CLASSES)}
+
+
+def pack(numbers):
+    """Returns the smallest integer size of the ``numbers`` and the little
+    endian bytes of them.
+    """
+    size = 1
+    if numbers:
+        top = max(numbers)
+        size = 1 if top < 0x100 else 2 if top < 0x10000 else 4
+
+    numbers = array(TYPECODES[size], numbers)
+    if sys.byteorder != 'little':  # pragma: no cover
+        numbers.byteswap()
+
+    return size, numbers.tobytes()
+
+
+def unpack(data, offset, size, length):
+    """Reads ``length`` integers of the ``size`` from the ``data``."""
+    if size not in TYPECODES:
+        raise ValueError('Invalid binary diagram: bad integer size.')
+
+    end = offset + size * length
+    if len(data) < end:
+        raise ValueError('Invalid binary diagram: truncated data.')
+
+    numbers = array(TYPECODES[size])
+    numbers.frombytes(data[offset:end])
+    if sys.byteorder != 'little':  # pragma: no cover
+        numbers.byteswap()
+
+    return numbers, end
+
+
+class Writer:
+    def __init__(self):
+        self.numbers = array('I')
+        self.references = array('I')
+        self.strings = []
+        self._stringids = {}
+
+    def string(self, value):
+        if value is None:
+            self.references.append(0)
+            return
+
+        stringid = self._stringids.get(value)
+        if stringid is None:
+            self.strings.append(value)
+            stringid = self._stringids[value] = len(self.strings)
+
+        self.references.append(stringid)
+
+    def diagram(self, diagram):
+        string = self.string
+        string(diagram.title)
+        string(diagram.version)
+        string(diagram.author)
+        self.numbers.append(len(diagram))
+        for section in diagram:
+            self.section(section)
+
+    def section(self, sequence):
+        numbers = self.numbers
+        string = self.string
+        string(sequence.title)
+        string(sequence.description)
+        string(sequence.tags)
+
+        numbers.append(len(sequence.modules_byid))
+        for module in sequence.modules_byid:
+            string(module.name)
+            string(module.title)
+            string(module.type)
+
+        numbers.append(len(sequence.modules_order))
+        for name in sequence.modules_order:
+            numbers.append(sequence.modules[name].id)
+
+        stack = [iter(sequence)]
+        numbers.append(len(sequence))
+        while stack:
+            for item in stack[-1]:
+                break
+            else:
+                stack.pop()
+                continue
+
+            type_ = self._type(item)
+            numbers.append(type_ * 2 + (1 if item.multiline else 0))
+            string(item.kind)
+            string(item.text)
+            args = item.args or ()
+            numbers.append(len(args))
+            for arg in args:
+                string(arg)
+
+            if type_ == CALL:
+                numbers.append(item.callerid)
+                numbers.append(item.calleeid)
+                string(item.returntext)
+
+            if type_ != NOTE:
+                numbers.append(len(item))
+                stack.append(iter(item))
+
+    @staticmethod
+    def _type(item):
+        for cls in type(item).__mro__:
+            type_ = TYPES.get(cls)
+            if type_ is not None:
+                return type_
+
+        raise TypeError(f'Invalid item: {item!r}.')
+
+    def getvalue(self):
+        strings = self.strings
+        lengths = pack(array('I', (len(s) for s in strings)))
+        numbers = pack(self.numbers)
+        references = pack(self.references)
+        return b''.join((
+            HEADER.pack(
+                MAGIC, FORMAT,
+                lengths[0], len(strings),
+                numbers[0], len(self.numbers),
+                references[0], len(self.references),
+            ),
+            lengths[1],
+            numbers[1],
+            references[1],
+            ''.join(strings).encode(),
+        ))
+
+
+def tobytes(diagram):
+    """Serializes the ``diagram`` into the binary format."""
+    writer = Writer()
+    writer.diagram(diagram)
+    return writer.getvalue()
+
+
+def frombytes(data, diagram):
+    """Loads the binary ``data`` into the empty ``diagram``.
+
+    The ``diagram`` is left untouched if the data is invalid.
+    """
+    data = memoryview(data).cast('B')
+    try:
+        magic, version, *sizes = HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError('Invalid binary diagram: truncated header.')
+
+    if magic != MAGIC:
+        raise ValueError('Invalid binary diagram: bad magic number.')
+
+    if version != FORMAT:
+        raise ValueError(
+            f'Invalid binary diagram: unsupported format version: {version}.'
+        )
+
+    offset = HEADER.size
+    lengths, offset = unpack(data, offset, sizes[0], sizes[1])
+    numbers, offset = unpack(data, offset, sizes[2], sizes[3])
+    references, offset = unpack(data, offset, sizes[4], sizes[5])
+
+    text = str(data[offset:], 'utf-8')
+    strings = [None]
+    start = 0
+    for stop in accumulate(lengths):
+        strings.append(text[start:stop])
+        start = stop
+
+    try:
+        headers, sections = _load(
+            diagram.tokenizer,
+            iter(numbers).__next__,
+            map(strings.__getitem__, references).__next__,
+        )
+    except (StopIteration, IndexError, KeyError):
+        raise ValueError('Invalid binary diagram: corrupted data.')
+
+    diagram.title, diagram.version, diagram.author = headers
+    diagram.extend(sections)
+    return diagram
+
+
+def _load(tokenizer, number, string):
+    headers = string(), string(), string()
+    sections = []
+    for _ in range(number()):
+        sequence = SequenceDiagram(tokenizer=tokenizer)
+        sequence.more = False
+        sequence.title = string()
+        sequence.description = string()
+        sequence.tags = string()
+
+        modules = sequence.modules
+        modules_byid = sequence.modules_byid
+        for moduleid in range(number()):
+            name = string()
+            module = Module(name, moduleid)
+            module.title = string()
+            module.type = string()
+            modules[name] = module
+            modules_byid.append(module)
+
+        for order in range(number()):
+            module = modules_byid[number()]
+            module.order = order
+            sequence.modules_order.append(module.name)
+
+        names = [m.name for m in modules_byid]
+        stack = [[sequence, number()]]
+        while stack:
+            top = stack[-1]
+            if not top[1]:
+                stack.pop()
+                continue
+
+            top[1] -= 1
+            type_, multiline = divmod(number(), 2)
+
+            # The items are complete, so the constructors are skipped.
+            item = CLASSES[type_].__new__(CLASSES[type_])
+            item.kind = string()
+            item.text = string()
+            item.multiline = multiline == 1
+            nargs = number()
+            if nargs:
+                item.args = tuple([string() for _ in range(nargs)])
+            else:
+                item.args = ()
+
+            if type_ == CALL:
+                item.callerid = callerid = number()
+                item.calleeid = calleeid = number()
+                item.caller = names[callerid]
+                item.callee = names[calleeid]
+                item.returntext = string()
+            elif type_ == NOTE:
+                item.moduleids = tuple(
+                    modules[m].id for m in item.modules
+                )
+
+            top[0].append(item)
+            if type_ != NOTE:
+                stack.append([item, number()])
+
+        sections.append(sequence)
+
+    return headers, sections
@@ -0,0 +1,203 @@
+"""On-disk cache of the parsed diagrams.
+
+The cache is disabled by default, once enabled using the :func:`enable`,
+the :class:`.Diagram` looks each source up by its content hash before
+parsing it and stores the parsed diagram in the binary format of the
+:mod:`adia.binary`, along with the final state of the tokenizer, after a
+successful parse. So the :func:`adia.diagram`,
+:func:`adia.print` and the command line interface skip the tokenizer and
+the interpreters for the sources which are seen before.
+
+.. code-block:: python
+
+   import adia
+   from adia import cache
+
+   cache.enable('.adiacache')
+   adia.diagram(source)
+
+The key of each source includes the ``adia`` version and the binary format
+version, so the entries of the other versions are never used, they are
+evicted eventually like the least recently used entries when the cache
+grows beyond its maximum size.
+
+The entries are written into a temporary file first and renamed, so many
+processes may share the same directory.
+"""
+import os
+import hashlib
+import threading
+
+from . import binary
+
+
+#: The default maximum size of the cache, in bytes.
+MAXSIZE = 64 * 1024 * 1024
+
+SUFFIX = '.adiac'
+
+#: The fraction of the :attr:`Cache.maxsize` kept by an eviction, to leave
+#: some room for the next writes.
+LOWWATER = 0.9
+
+#: The number of the writes after which the directory is scanned again to
+#: notice the entries of the other processes, see :meth:`Cache.put`.
+RESCAN = 1000
+
+#: The active :class:`Cache`, see :func:`enable`.
+current = None
+
+
+class Cache:
+    """A directory of the parsed diagrams, see the :mod:`adia.cache`.
+
+    :param directory: The cache directory, created if not exists.
+    :param maxsize: The maximum total size of the entries in bytes.
+    """
+
+    def __init__(self, directory, maxsize=MAXSIZE):
+        self.directory = directory
+        self.maxsize = maxsize
+        os.makedirs(directory, exist_ok=True)
+
+        # The estimated total size of the entries, None if unknown, and the
+        # number of the writes since the last scan.
+        self._size = None
+        self._puts = 0
+
+    def key(self, source):
+        """Returns the key of the ``source``, a ``str`` or bytes-like."""
+        from . import __version__
+
+        digest = hashlib.sha256(
+            f'adia {__version__} {binary.FORMAT}\n'.encode()
+        )
+        if isinstance(source, str):
+            source = source.encode()
+
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}{SUFFIX}')
+
+    def get(self, key):
+        """Returns the data of the ``key`` or ``None`` if it's missing."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Mark as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return data
+
+    def put(self, key, data):
+        """Stores the ``data`` and evicts the least recently used entries if
+        the cache is too big.
+
+        The total size is tracked in memory, the directory is scanned only
+        when it exceeds the :attr:`maxsize` or once per :data:`RESCAN`
+        writes, so storing many entries takes linear time.
+        """
+        path = self._path(key)
+        temp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp, 'wb') as f:
+                f.write(data)
+
+            os.replace(temp, path)
+        except OSError:
+            self._remove(temp)
+            return
+
+        self._puts += 1
+        if self._size is not None:
+            self._size += len(data)
+
+        if self._size is None or self._size > self.maxsize or \
+                self._puts >= RESCAN:
+            self.evict()
+
+    def discard(self, key):
+        """Removes the entry of the ``key``, if any."""
+        self._remove(self._path(key))
+        self._size = None
+
+    def clear(self):
+        """Removes all the entries."""
+        for _, path, _ in self._entries():
+            self._remove(path)
+
+        self._size = None
+
+    def evict(self):
+        """Removes the least recently used entries until the total size is
+        not more than the :data:`LOWWATER` of the :attr:`maxsize`, if it is
+        more than the :attr:`maxsize`.
+        """
+        entries = self._entries()
+        total = sum(e[2] for e in entries)
+        if total > self.maxsize:
+            limit = self.maxsize * LOWWATER
+            entries.sort()
+            for _, path, size in entries:
+                if total <= limit:
+                    break
+
+                self._remove(path)
+                total -= size
+
+        self._size = total
+        self._puts = 0
+
+    def _entries(self):
+        """Returns the ``(mtime, path, size)`` of the entries."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(SUFFIX):
+                        continue
+
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        # Removed by another process.
+                        continue
+
+                    entries.append((stat.st_mtime, entry.path, stat.st_size))
+        except OSError:
+            pass
+
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def enable(directory, maxsize=MAXSIZE):
+    """Activates a :class:`Cache` in the ``directory``.
+
+    :return: The active cache.
+    :rtype: Cache
+    """
+    global current
+    current = Cache(directory, maxsize)
+    return current
+
+
+def disable():
+    """Deactivates the cache, the entries are kept."""
+    global current
+    current = None
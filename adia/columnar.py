@@ -0,0 +1,353 @@
+"""Columnar sequence diagrams.
+
+See :class:`ColumnarSequenceDiagram`.
+"""
+import itertools
+from array import array
+
+from .container import Container
+from .diagram import Diagram
+from .interpreter import New
+from .sequence import SequenceDiagram, Call, Note, Loop, Condition
+from .token import EVERYTHING, NEWLINE
+
+
+# The type codes of the items.
+CALL = 0
+NOTE = 1
+LOOP = 2
+CONDITION = 3
+
+# No value, no parent or no next sibling.
+NONE = -1
+
+
+class ColumnarContainerItem:
+    """The container protocol of the views of the columnar items, which
+    reads the children from the columns of the :attr:`_diagram`.
+    """
+    __slots__ = ()
+
+    def __iter__(self):
+        return self._diagram._iterchildren(self._index)
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __len__(self):
+        return sum(1 for _ in self._diagram._children(self._index))
+
+    def __getitem__(self, index):
+        return self._diagram._getchild(self._index, index)
+
+    def __contains__(self, item):
+        return any(i == item for i in self)
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnarContainerItem):
+            return other._diagram is self._diagram \
+                and other._index == self._index
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def append(self, item):
+        self._diagram._add(item, self._index)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+
+class ColumnarCall(ColumnarContainerItem, Call):
+    __slots__ = ('_diagram', '_index')
+
+
+class ColumnarLoop(ColumnarContainerItem, Loop):
+    __slots__ = ('_diagram', '_index')
+
+
+class ColumnarCondition(ColumnarContainerItem, Condition):
+    __slots__ = ('_diagram', '_index')
+
+
+class ColumnarNote(Note):
+    __slots__ = ('_diagram', '_index')
+
+
+VIEWS = {
+    CALL: ColumnarCall,
+    NOTE: ColumnarNote,
+    LOOP: ColumnarLoop,
+    CONDITION: ColumnarCondition,
+}
+
+
+class ColumnarSequenceDiagram(SequenceDiagram):
+    """A :class:`.SequenceDiagram` which keeps the items in parallel arrays
+    instead of a tree of objects.
+
+    The items are stored in the document order, the columns are indexed by
+    the item number, the modules are referred by their ids and the strings
+    and tuples, such as the texts and arguments, are interned into the
+    :attr:`values`.
+
+    ================  ======================================================
+    ``types``         The type codes, ``CALL``, ``NOTE``, ``LOOP`` or
+                      ``CONDITION``.
+    ``kinds``         The keyword, ``call``, ``@``, ``for``, ``if``, ...
+    ``callers``       The caller of the calls, the first module of the
+                      notes.
+    ``callees``       The callee of the calls, the second module of the
+                      notes.
+    ``texts``         The text after the ``:``.
+    ``returntexts``   The text after the ``=>`` of the calls.
+    ``arguments``     The arguments, such as the modules of the notes.
+    ``multilines``    ``1`` if the text is a multiline text.
+    ``parents``       The item number of the parent.
+    ``depths``        The nesting level.
+    ``nexts``         The item number of the next sibling.
+    ================  ======================================================
+
+    The missing values, modules, parents and siblings are ``-1``.
+
+    Iterating the diagram and the items yields the views of the items, the
+    instances of the :class:`.Call`, :class:`.Note`, :class:`.Loop` and
+    :class:`.Condition` subclasses, which are created on the fly and
+    dropped after use, so the renderer and the :meth:`dumps` work as usual.
+    Getting an item by index walks its previous siblings.
+
+    The diagram is append only, new items could be appended to the last
+    item and its ancestors. The modules of the appended items are
+    registered like the parsed ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.types = array('b')
+        self.kinds = array('i')
+        self.callers = array('i')
+        self.callees = array('i')
+        self.texts = array('i')
+        self.returntexts = array('i')
+        self.arguments = array('i')
+        self.multilines = array('b')
+        self.parents = array('i')
+        self.depths = array('i')
+        self.nexts = array('i')
+        self.values = []
+        self._valueids = {}
+        self._length = 0
+
+    def __iter__(self):
+        return self._iterchildren(NONE)
+
+    def __reversed__(self):
+        return reversed(list(self))
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        return self._getchild(NONE, index)
+
+    def __contains__(self, item):
+        return any(i == item for i in self)
+
+    def append(self, item):
+        self._add(item, NONE)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def _indent(self):
+        current = self.current
+        if not isinstance(current, Container):
+            return
+
+        parent = NONE if current is self else current._index
+        last = self._lastchild(parent)
+        if last != NONE:
+            self._callstack.append(self._view(last))
+
+    def _lastitem(self):
+        return self._view(len(self.types) - 1)
+
+    def _intern(self, string):
+        # The strings are interned by the value table.
+        return string
+
+    def _valueid(self, value):
+        if value is None:
+            return NONE
+
+        valueid = self._valueids.get(value)
+        if valueid is None:
+            valueid = self._valueids[value] = len(self.values)
+            self.values.append(value)
+
+        return valueid
+
+    def _value(self, valueid):
+        return None if valueid == NONE else self.values[valueid]
+
+    def _lastchild(self, parent):
+        """Finds the last child of the ``parent``, which must be the last
+        item or one of its ancestors.
+        """
+        parents = self.parents
+        index = len(parents) - 1
+        while index != parent:
+            if index == NONE:
+                raise ValueError(
+                    'Only the last item and its ancestors could get new '
+                    'children.'
+                )
+
+            if parents[index] == parent:
+                return index
+
+            index = parents[index]
+
+        return NONE
+
+    def _add(self, item, parent):
+        """Appends the ``item`` and its children, without recursion."""
+        # The last child of each parent, to link the next one.
+        lasts = {parent: self._lastchild(parent)}
+        stack = [(item, parent)]
+        while stack:
+            item, parent = stack.pop()
+            index = lasts[parent] = self._addone(item, parent, lasts[parent])
+            if not isinstance(item, Note):
+                lasts[index] = NONE
+                stack.extend((c, index) for c in reversed(item))
+
+    def _addone(self, item, parent, last):
+        index = len(self.types)
+
+        caller = callee = returntext = NONE
+        if isinstance(item, Call):
+            type_ = CALL
+            caller = self._ensuremodule(item.caller, visible=True).id
+            callee = self._ensuremodule(item.callee, visible=True).id
+            returntext = self._valueid(item.returntext)
+        elif isinstance(item, Note):
+            type_ = NOTE
+            moduleids = [self._ensuremodule(m).id for m in item.modules]
+            caller = moduleids[0]
+            if len(moduleids) > 1:
+                callee = moduleids[1]
+        elif isinstance(item, Loop):
+            type_ = LOOP
+        elif isinstance(item, Condition):
+            type_ = CONDITION
+        else:
+            raise TypeError(f'Invalid item: {item!r}.')
+
+        self.types.append(type_)
+        self.kinds.append(self._valueid(item.kind))
+        self.callers.append(caller)
+        self.callees.append(callee)
+        self.texts.append(self._valueid(item.text))
+        self.returntexts.append(returntext)
+        self.arguments.append(self._valueid(tuple(item.args or ())))
+        self.multilines.append(1 if item.multiline else 0)
+        self.parents.append(parent)
+        self.depths.append(0 if parent == NONE else self.depths[parent] + 1)
+        self.nexts.append(NONE)
+
+        if last != NONE:
+            self.nexts[last] = index
+
+        if parent == NONE:
+            self._length += 1
+
+        return index
+
+    def _children(self, parent):
+        first = parent + 1
+        if first < len(self.parents) and self.parents[first] == parent:
+            nexts = self.nexts
+            while first != NONE:
+                yield first
+                first = nexts[first]
+
+    def _iterchildren(self, parent):
+        view = self._view
+        for index in self._children(parent):
+            yield view(index)
+
+    def _getchild(self, parent, index):
+        if isinstance(index, int) and index >= 0:
+            for child in itertools.islice(self._children(parent), index, None):
+                return self._view(child)
+
+            raise IndexError('list index out of range')
+
+        children = list(self._children(parent))
+        if isinstance(index, slice):
+            return [self._view(i) for i in children[index]]
+
+        return self._view(children[index])
+
+    def _view(self, index):
+        """Creates a view of the item number ``index``."""
+        type_ = self.types[index]
+        view = VIEWS[type_].__new__(VIEWS[type_])
+        view._diagram = self
+        view._index = index
+        view.kind = self.values[self.kinds[index]]
+        view.args = self.values[self.arguments[index]]
+        view.text = self._value(self.texts[index])
+        view.multiline = bool(self.multilines[index])
+        if type_ == CALL:
+            modules = self.modules_byid
+            view.callerid = self.callers[index]
+            view.calleeid = self.callees[index]
+            view.caller = modules[view.callerid].name
+            view.callee = modules[view.calleeid].name
+            view.returntext = self._value(self.returntexts[index])
+        elif type_ == NOTE:
+            callee = self.callees[index]
+            if callee == NONE:
+                view.moduleids = (self.callers[index], )
+            else:
+                view.moduleids = (self.callers[index], callee)
+
+        return view
+
+
+class ColumnarDiagram(Diagram):
+    """A :class:`.Diagram` which keeps the sequence diagrams as
+    :class:`ColumnarSequenceDiagram`, for the very large diagrams.
+
+    The incremental and lazy modes and the :mod:`adia.cache` are not
+    supported.
+    """
+    cacheable = False
+
+    def __init__(self, *args, incremental=False, lazy=False, **kwargs):
+        if incremental or lazy:
+            raise ValueError(
+                'The columnar diagrams could not be used with the '
+                'incremental or lazy modes.'
+            )
+
+        super().__init__(*args, **kwargs)
+
+    statemap = {
+        **Diagram.statemap,
+        'new-sequence': {
+            EVERYTHING: {
+                NEWLINE: New(
+                    ColumnarSequenceDiagram,
+                    callback=Diagram._new_seq,
+                )
+            }
+        }
+    }
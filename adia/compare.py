@@ -0,0 +1,240 @@
+"""Semantic diff of the parsed diagrams.
+
+See :func:`diff`.
+"""
+from difflib import SequenceMatcher
+
+from .diagram import Diagram
+from .sequence import Call, Note
+
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+
+# The attributes of the diagrams and the sequence diagrams.
+DIAGRAM_ATTRS = ('title', 'version', 'author')
+SECTION_ATTRS = ('title', 'description', 'tags')
+
+
+def kind(item):
+    """Returns the kind of the changes of the ``item``, ``call``, ``note``
+    or ``block``.
+    """
+    if isinstance(item, Call):
+        return 'call'
+
+    if isinstance(item, Note):
+        return 'note'
+
+    return 'block'
+
+
+def align(old, new):
+    """Aligns the ``old`` and ``new`` lists of the items or sequence
+    diagrams by their digests.
+
+    Yields ``(change, i, j)`` tuples, the ``change`` is ``added``,
+    ``removed`` or ``None`` for a pair of the items which are not equal
+    but have the same kind, the ``i`` and ``j`` are the indexes of the
+    items in the ``old`` and ``new`` lists, ``None`` if missing. The equal
+    items are skipped.
+    """
+    a = [i.digest for i in old]
+    b = [i.digest for i in new]
+
+    # The common prefix and suffix, most of the items if the lists are
+    # mostly unchanged.
+    start = 0
+    stop = min(len(a), len(b))
+    while start < stop and a[start] == b[start]:
+        start += 1
+
+    end = 0
+    while end < stop - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+
+    matcher = SequenceMatcher(
+        None,
+        a[start:len(a) - end],
+        b[start:len(b) - end],
+        autojunk=False
+    )
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        i1 += start
+        i2 += start
+        j1 += start
+        j2 += start
+        if tag == 'equal':
+            continue
+
+        # Pair the replaced items of the same kind.
+        while i1 < i2 and j1 < j2 and kind(old[i1]) == kind(new[j1]):
+            yield None, i1, j1
+            i1 += 1
+            j1 += 1
+
+        for i in range(i1, i2):
+            yield REMOVED, i, None
+
+        for j in range(j1, j2):
+            yield ADDED, None, j
+
+
+def diff(old, new):
+    """Compares two parsed diagrams without rendering them.
+
+    The ``old`` and ``new`` are both :class:`.Diagram` or both
+    :class:`.SequenceDiagram` instances. The subtrees having the same
+    :attr:`.Item.digest` are skipped and the children of each item are
+    aligned by their digests, so the cost is near linear to the size of the
+    changes for the mostly unchanged diagrams.
+
+    Returns a list of the ``(change, kind, path, old, new)`` tuples in the
+    document order, the ``change`` is ``added``, ``removed`` or
+    ``changed``:
+
+    ===========  ================================  ========================
+    ``kind``     ``path``                          ``old`` and ``new``
+    ===========  ================================  ========================
+    ``diagram``  ``(attr, )``                      The attribute values.
+    ``section``  ``(index, )``                     The sequence diagrams.
+    ``module``   ``(index, name)``                 The :class:`.Module`
+                                                   instances.
+    ``call``     ``(index, item, child, ...)``     The items.
+    ``note``
+    ``block``
+    ===========  ================================  ========================
+
+    The ``index`` is the index of the sequence diagram and the rest of the
+    item paths are the indexes of the item and its ancestors within their
+    parents, all in the new diagram, or the old one for the removed
+    sections and items. The ``old`` of the added and the ``new`` of the
+    removed ones are ``None``.
+
+    A section is ``changed`` if its ``title``, ``description`` or ``tags``
+    is changed, a module if its ``title`` or ``type`` is changed and an
+    item if the statement itself is changed, for example the text of a
+    call, the changes of the children are reported separately. The paths
+    of the :class:`.SequenceDiagram` changes do not have the ``index``.
+
+    .. testsetup:: diff
+
+       import adia
+
+    .. testcode:: diff
+
+       old = adia.Diagram('''
+           sequence:
+           foo -> bar: baz
+             bar -> baz
+       ''')
+       new = adia.Diagram('''
+           sequence:
+           foo -> bar: qux
+             @bar: note
+             bar -> baz
+       ''')
+       for change, kind, path, _, _ in adia.diff(old, new):
+           print(change, kind, path)
+
+    .. testoutput:: diff
+
+       changed call (0, 0)
+       added note (0, 0, 0)
+
+    :param old: The old diagram.
+    :param new: The new diagram.
+    :raises TypeError: If the diagrams are not of the same type.
+    :return: The changes.
+    :rtype: list
+    """
+    changes = []
+    if isinstance(old, Diagram) and isinstance(new, Diagram):
+        for attr in DIAGRAM_ATTRS:
+            if getattr(old, attr) != getattr(new, attr):
+                changes.append((
+                    CHANGED,
+                    'diagram',
+                    (attr, ),
+                    getattr(old, attr),
+                    getattr(new, attr),
+                ))
+
+        for change, i, j in align(old, new):
+            if change == REMOVED:
+                changes.append((REMOVED, 'section', (i, ), old[i], None))
+            elif change == ADDED:
+                changes.append((ADDED, 'section', (j, ), None, new[j]))
+            else:
+                _diffsection(changes, old[i], new[j], (j, ))
+
+    elif isinstance(old, Diagram) or isinstance(new, Diagram):
+        raise TypeError('Could not compare a diagram and a sequence diagram.')
+
+    elif old.digest != new.digest:
+        _diffsection(changes, old, new, ())
+
+    return changes
+
+
+def _diffsection(changes, old, new, path):
+    if any(getattr(old, a) != getattr(new, a) for a in SECTION_ATTRS):
+        changes.append((CHANGED, 'section', path, old, new))
+
+    oldmodules = old.modules
+    newmodules = new.modules
+    for name, module in oldmodules.items():
+        if name not in newmodules:
+            changes.append((REMOVED, 'module', path + (name, ), module, None))
+
+    for name, module in newmodules.items():
+        oldmodule = oldmodules.get(name)
+        if oldmodule is None:
+            changes.append((ADDED, 'module', path + (name, ), None, module))
+        elif oldmodule.title != module.title or \
+                oldmodule.type != module.type:
+            changes.append(
+                (CHANGED, 'module', path + (name, ), oldmodule, module)
+            )
+
+    _diffitems(changes, old, new, path, path)
+
+
+def _diffitems(changes, old, new, oldpath, newpath):
+    """Compares the children of the ``old`` and ``new`` containers in the
+    document order, without recursion.
+    """
+    stack = [_diffchildren(changes, old, new, oldpath, newpath)]
+    while stack:
+        for pair in stack[-1]:
+            break
+        else:
+            stack.pop()
+            continue
+
+        olditem, newitem, oldpath, newpath = pair
+        if olditem._fields() != newitem._fields():
+            changes.append((CHANGED, kind(newitem), newpath, olditem, newitem))
+
+        if not isinstance(newitem, Note):
+            stack.append(
+                _diffchildren(changes, olditem, newitem, oldpath, newpath)
+            )
+
+
+def _diffchildren(changes, old, new, oldpath, newpath):
+    """Yields the pairs of the children which must be compared and appends
+    the removed and added ones into the ``changes``.
+    """
+    old = list(old)
+    new = list(new)
+    for change, i, j in align(old, new):
+        if change == REMOVED:
+            changes.append((REMOVED, kind(old[i]), oldpath + (i, ), old[i],
+                            None))
+        elif change == ADDED:
+            changes.append((ADDED, kind(new[j]), newpath + (j, ), None,
+                            new[j]))
+        else:
+            yield old[i], new[j], oldpath + (i, ), newpath + (j, )
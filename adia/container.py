@@ -1,3 +1,5 @@
 class Container(list):
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
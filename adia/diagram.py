@@ -1,12 +1,45 @@
+import bisect
+import struct
 from io import StringIO
 
+try:
+    import mmap
+except ImportError:  # pragma: no cover
+    # Brython
+    mmap = None
+
+from . import binary, cache
 from .container import Container
 from .interpreter import Interpreter, Ignore, Switch, Goto, Consume, New
 from .sequence import SequenceDiagram
-from .token import NEWLINE, NAME, EVERYTHING, INDENT, EOF, HASH, COLON
+from .lazy import LazySequenceDiagram, index as lazyindex
+from .token import NEWLINE, NAME, EVERYTHING, INDENT, EOF, HASH, COLON, \
+    DEDENT, AT, MULTILINE
+from .tokenizer import Tokenizer
+from .exceptions import InterpreterError
 from .renderer import Renderer
 
 
+# UTF-8 encoded source buffers which are accepted by the Diagram.parse.
+BUFFERS = (bytes, bytearray, memoryview)
+if mmap is not None:
+    BUFFERS += (mmap.mmap, )
+
+
+# The state of the tokenizer at the end of the source, which prefixes the
+# binary diagram in each cache entry: lineno, coloffset, indentsize,
+# indent, escape and newline.
+CACHESTATE = struct.Struct('<qqqq??')
+
+
+def splitlines(text):
+    lines = [f'{line}\n' for line in text.split('\n')]
+    if text.endswith('\n') or not text:
+        lines.pop()
+
+    return lines
+
+
 class Diagram(Interpreter, Container):
     """The main entrypoint of the :mod:`adia` package.
 
@@ -16,23 +49,75 @@ class Diagram(Interpreter, Container):
     internally to do it's job.
 
     :param source: ADia source code to parse.
-    :type source: str or file-like
+    :type source: str, bytes-like or file-like
+    :param incremental: If ``True``, the source lines and a checkpoint at the
+                        beginning of each top level statement will be kept to
+                        update the diagram after editing the source using the
+                        :meth:`apply_edit`.
+    :type incremental: bool, optional, default: False
+    :param recover: If ``True``, the parser continues from the next line
+                    after a syntax error and all the errors are collected
+                    into the :attr:`diagnostics` instead of raising the first
+                    one.
+    :type recover: bool, optional, default: False
+    :param lazy: If ``True``, only the diagram headers and the titles of the
+                 sequence diagrams are parsed at first and each sequence
+                 diagram is parsed on the first access to its items or
+                 attributes, see :class:`.LazySequenceDiagram`. So the
+                 errors are raised by the first access too. A lazy diagram
+                 must be fully accessed, for example using the
+                 :meth:`dumps`, before being shared between threads.
+    :type lazy: bool, optional, default: False
 
     .. note::
 
        You may use the :meth:`dumps` method to dump back the diagram instance
        to ``ADia`` source code.
+
+    .. note::
+
+       Parsing and rendering are thread-safe. Any number of diagrams may be
+       parsed and rendered concurrently and a parsed diagram may be rendered
+       by many threads at the same time, because all the parsing state is
+       kept by the :class:`Diagram` and its :class:`Tokenizer` and the
+       state machines shared by the classes are read-only. But a single
+       instance must not be fed by more than one thread at a time, using the
+       :meth:`parse`, :meth:`parseline` or :meth:`apply_edit`.
     """
     title = None
     version = None
     author = None
+    recoverstate = 'start'
+
+    #: Parse the plain call and note statements of the sequence diagrams
+    #: without tokenizing them, see :meth:`parse`.
+    fastpath = True
 
-    def __init__(self, source=None, *args, **kwargs):
+    #: Look the sources up in the :mod:`adia.cache`, if it's enabled.
+    cacheable = True
+
+    def __init__(self, source=None, *args, incremental=False, lazy=False,
+                 **kwargs):
         super().__init__('start', *args, **kwargs)
+        if lazy and (incremental or self.diagnostics is not None):
+            raise ValueError(
+                'The lazy mode could not be used with the incremental or '
+                'recover modes.'
+            )
+
+        self._lazy = lazy
+
+        # Source lines and the (linenumbers, records) of the checkpoints.
+        self._lines = None
+        self._checkpoints = None
+        if incremental:
+            self._lines = []
+            self._checkpoints = ([], [])
+
         if source is None:
             return
 
-        if isinstance(source, str):
+        if isinstance(source, (str, ) + BUFFERS):
             self.parse(source)
         else:
             self.parsefile(source)
@@ -71,51 +156,246 @@ class Diagram(Interpreter, Container):
         """
 
         f = StringIO()
+        self.dump(f)
+
+        # Trailing new line is not interested in dump string
+        return f.getvalue()[:-1]
+
+    def dump(self, file):
+        """Writes the ``ADia`` source code of the diagram into the ``file``
+        line by line, like the :meth:`dumps` plus a trailing new line, so
+        the large diagrams could be written without building the whole
+        text in memory.
+
+        :param file: An object with ``write(...)`` method.
+        """
         br = False
         if self.title:
-            f.write(f'diagram: {self.title}\n')
+            file.write(f'diagram: {self.title}\n')
             br = True
 
         if self.version:
-            f.write(f'version: {self.version}\n')
+            file.write(f'version: {self.version}\n')
             br = True
 
         if self.author:
-            f.write(f'author: {self.author}\n')
+            file.write(f'author: {self.author}\n')
             br = True
 
         if len(self):
             if br:
-                f.write('\n')
+                file.write('\n')
 
             for c in self:
-                f.write(f'{c.dumps()}')
+                c.dump(file)
 
-        return f.getvalue()[:-1]
+    def sequence(self, title=None):
+        """Adds a new sequence diagram, to be built using the
+        :meth:`.SequenceDiagram.call` and the other builder methods instead
+        of parsing the source.
+
+        :param title: The title of the sequence diagram.
+        :type title: str, optional
+        :return: The new sequence diagram.
+        :rtype: SequenceDiagram
+        """
+        # The class of the parsed sections.
+        factory = self.statemap['new-sequence'][EVERYTHING][NEWLINE].factory
+        sequence = factory(tokenizer=self.tokenizer)
+        if title is not None:
+            sequence.title = title.strip()
+
+        sequence.more = False
+        self.append(sequence)
+        return sequence
+
+    def to_bytes(self):
+        """Serializes the parsed diagram into a compact binary format.
+
+        The result may be loaded using the :meth:`from_bytes`, which is much
+        faster than parsing the source again, see the :mod:`adia.binary`.
+
+        :return: The binary form of the diagram.
+        :rtype: bytes
+        """
+        return binary.tobytes(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a diagram from the :meth:`to_bytes` result.
+
+        :param data: The binary form of the diagram.
+        :type data: bytes-like
+        :raises ValueError: If the data is invalid or serialized by an
+                            incompatible version.
+        :return: A new diagram.
+        :rtype: Diagram
+        """
+        return binary.frombytes(data, cls())
 
     def parse(self, source):
         """Parses ``Adia`` source string.
 
+        The whole source is tokenized at once using the
+        :meth:`Tokenizer.tokenize`. The ``source`` may be an UTF-8 encoded
+        ``bytes``, ``bytearray``, ``memoryview`` or ``mmap`` to be tokenized
+        without decoding it as a whole.
+
+        Unless the :attr:`fastpath` is ``False``, the plain call and note
+        lines, such as ``foo -> bar: baz => qux`` and ``@foo ~ bar: baz``,
+        are matched by a single regular expression and the items are created
+        directly. Everything else goes through the tokenizer and the state
+        machine.
+
+        If the :mod:`adia.cache` is enabled, a new diagram which is not in
+        the incremental, lazy or recover modes is loaded from the cache if
+        the same source is parsed before, and stored into the cache after
+        parsing it otherwise.
+
         :param source: The ADia source code.
-        :type source: str
+        :type source: str or bytes-like
+        """
+        if (self._checkpoints is not None or self._lazy) and \
+                not isinstance(source, str):
+            source = str(source, 'utf-8')
+
+        if self._lazy and self._parselazy(source):
+            return
+
+        current = cache.current
+        if current is not None and self._cacheable():
+            self._parsecached(current, source)
+            return
+
+        self._parse(source)
+
+    def _parse(self, source):
+        if self._checkpoints is None:
+            tokens = self.tokenizer.tokenize(
+                source,
+                self._fastline if self.fastpath else None
+            )
+            try:
+                for token in tokens:
+                    self.eat_token(token)
+            finally:
+                # Release the buffer, a memory-mapped file could not be
+                # closed while it's being scanned.
+                tokens.close()
+
+            return
+
+        tokens = self.tokenizer.tokenize(source)
+        self._lines.extend(splitlines(source))
+        try:
+            self._eat_checkpointed(self, tokens, self._checkpoints)
+        except InterpreterError:
+            # Force the next edit to parse the whole source again.
+            self._checkpoints = ([], [])
+            raise
+
+    def _cacheable(self):
+        return self.cacheable and not self._lazy \
+            and self._checkpoints is None and self.diagnostics is None \
+            and self.tokenizer.lineno == 0 and not len(self)
+
+    def _parsecached(self, current, source):
+        key = current.key(source)
+        data = current.get(key)
+        if data is not None:
+            try:
+                state = CACHESTATE.unpack_from(data)
+                binary.frombytes(memoryview(data)[CACHESTATE.size:], self)
+            except (ValueError, struct.error):
+                current.discard(key)
+            else:
+                # Leave the tokenizer where the parse would leave it, so
+                # the lines fed later are numbered and indented the same.
+                tokenizer = self.tokenizer
+                tokenizer.restore(state + tokenizer.checkpoint()[6:])
+                return
+
+        self._parse(source)
+        state = self.tokenizer.checkpoint()
+        if state[6:] != Tokenizer().checkpoint()[6:]:
+            # Stopped inside a multiline block.
+            return
+
+        current.put(key, CACHESTATE.pack(*state[:6]) + self.to_bytes())
+
+    def _parselazy(self, source):
+        """Parses the headers and creates a :class:`.LazySequenceDiagram`
+        for each section using the :func:`.lazy.index`.
+
+        Returns ``False`` if the source could not be indexed, to be parsed
+        as usual.
         """
-        with StringIO(source) as f:
-            self.parsefile(f)
+        sections = lazyindex(source)
+        if sections is None:
+            return False
+
+        headerend, sections = sections
+        tokenizer = self.tokenizer
+        checkpoint = self.checkpoint(), tokenizer.checkpoint()
+        for token in tokenizer.tokenize(source[:headerend]):
+            if token.type != EOF:
+                self.eat_token(token)
+
+        # Let the usual parse to report the errors.
+        if self.tokenstack or self.state != self._stateids['start'] or \
+                (sections and sections[0][1] != tokenizer.indent):
+            self.restore(checkpoint[0])
+            tokenizer.restore(checkpoint[1])
+            self.title = self.version = self.author = None
+            return False
+
+        for title, _, offset, tokenizerstate in sections:
+            self.append(LazySequenceDiagram(
+                title,
+                source,
+                offset,
+                tokenizerstate,
+                fastpath=self.fastpath,
+                tokenizer=tokenizer
+            ))
+
+        return True
 
     def parsefile(self, sourcefile):
         """Parses an ``ADia`` source file into the current instance.
 
+        The files opened in binary mode are memory-mapped if possible and
+        parsed in-place, see :meth:`parse`.
+
         :param sourcefile: The ADia source file.
         :type sourcefile: file-like object
         """
         if hasattr(sourcefile, 'name'):
             self.tokenizer.filename = sourcefile.name
 
-        while True:
-            line = sourcefile.readline()
-            self.parseline(line)
-            if not line:
-                return
+        buffer = self._mapfile(sourcefile)
+        if buffer is None:
+            self.parse(sourcefile.read())
+            return
+
+        try:
+            self.parse(buffer)
+        finally:
+            buffer.close()
+
+    def _mapfile(self, sourcefile):
+        if mmap is None or 'b' not in getattr(sourcefile, 'mode', ''):
+            return None
+
+        try:
+            return mmap.mmap(
+                sourcefile.fileno(),
+                0,
+                access=mmap.ACCESS_READ
+            )
+        except (OSError, ValueError):
+            # Not a regular file, or an empty one.
+            return None
 
     def parseline(self, line):
         """Parse an ``ADia`` source line into the current instance.
@@ -126,12 +406,263 @@ class Diagram(Interpreter, Container):
         if len(line) and not line.endswith('\n'):
             line += '\n'
 
+        # The source is not tracked anymore.
+        self._lines = None
+        self._checkpoints = None
+
         for token in self.tokenizer.feedline(line):
             self.eat_token(token)
 
         return
 
-    def render(self, outfile, rstrip=True):
+    def apply_edit(self, start_line, end_line, new_text):
+        """Replaces some lines of the source and updates the diagram.
+
+        The lines in the ``[start_line, end_line)`` range are replaced by the
+        ``new_text``, line numbers are one based like the error messages, so
+        ``apply_edit(3, 3, 'foo -> bar')`` inserts a line before the third
+        line and ``apply_edit(3, 5, '')`` removes the third and fourth lines.
+
+        Only the top level statements of the sequence diagram touched by the
+        edit are parsed again and the new items are spliced into the
+        existing diagram, the whole source is parsed again when the edit
+        may change anything else, such as the diagram headers, the section
+        attributes or the order of the modules.
+
+        The diagram must be created using ``incremental=True``.
+
+        :param start_line: The first line to replace.
+        :type start_line: int
+        :param end_line: The line after the last line to replace.
+        :type end_line: int
+        :param new_text: The replacement.
+        :type new_text: str
+        """
+        if self._lines is None:
+            raise ValueError('Diagram is not in incremental mode.')
+
+        if not 1 <= start_line <= end_line <= len(self._lines) + 1:
+            raise ValueError(
+                f'Invalid line range: [{start_line}, {end_line}).'
+            )
+
+        lines = splitlines(new_text)
+        try:
+            # The diagnostics would be outdated, collect them again.
+            if not self.diagnostics and \
+                    self._reparse_block(start_line, end_line, lines):
+                return
+        except InterpreterError:
+            # Let the full parse report the error.
+            pass
+
+        source = ''.join(
+            self._lines[:start_line - 1] + lines + self._lines[end_line - 1:]
+        )
+        self._reset()
+        self.parse(source)
+
+    def _reset(self):
+        tokenizer = Tokenizer()
+        tokenizer.filename = self.tokenizer.filename
+        self.tokenizer = tokenizer
+        self.restore((self._stateids['start'], None, True, ()))
+        self.clear()
+        self.title = None
+        self.version = None
+        self.author = None
+        self._lines = []
+        self._checkpoints = ([], [])
+        if self.diagnostics is not None:
+            self.diagnostics = []
+            self._resyncing = False
+
+    def _fastline(self, source, offset):
+        sequence = self._sequence()
+        if sequence is None or self._resyncing:
+            return None
+
+        return sequence._fastline(source, offset)
+
+    def _sequence(self):
+        stack = self._stack
+        if stack and len(stack) > 1 and isinstance(stack[1], SequenceDiagram):
+            return stack[1]
+
+    def _eat_checkpointed(self, interpreter, tokens, checkpoints,
+                          section=None, offset=0):
+        """Feeds the tokens into the interpreter and records a checkpoint at
+        the beginning of each top level statement of sequence diagrams.
+
+        Each record holds the sequence diagram, the number of it's items and
+        attribute statements before the line, and the tokenizer and sequence
+        diagram checkpoints.
+        """
+        tokenizer = interpreter.tokenizer
+        linenumbers, records = checkpoints
+        lastline = 0
+        candidate = None
+        pending = None
+        token = None
+
+        def confirm():
+            # Only a line which adds an item or ends the sequence diagram
+            # could be a boundary.
+            lineno, sequence, record = pending
+            if offset + len(sequence) > record[1] or not sequence.more:
+                linenumbers.append(lineno)
+                records.append(record)
+
+        for token in tokens:
+            lineno = token.start[0]
+            if lineno != lastline:
+                lastline = lineno
+                candidate = None
+                if pending is not None:
+                    confirm()
+                    pending = None
+
+                sequence = interpreter if section else self._sequence()
+                if sequence is not None and not sequence.tokenstack and \
+                        sequence.state == sequence._stateids['start']:
+                    state = tokenizer.checkpoint()
+                    # Not escaped, not in the middle of a line and not a
+                    # multiline text.
+                    if state[5] and not state[4] and not state[7]:
+                        candidate = [
+                            section or sequence,
+                            offset + len(sequence),
+                            (section or sequence)._attrs,
+                            state,
+                            sequence.checkpoint(),
+                        ]
+
+            if candidate is not None:
+                if token.type == EOF:
+                    linenumbers.append(lineno)
+                    records.append(candidate)
+                    candidate = None
+
+                elif token.type in (NAME, AT) and not sequence._callstack \
+                        and token.start[1] == tokenizer.coloffset:
+                    pending = lineno, sequence, candidate
+                    candidate = None
+
+                elif token.type != DEDENT:
+                    candidate = None
+
+            interpreter.eat_token(token)
+
+        if pending is not None:
+            confirm()
+
+        return token
+
+    def _reparse_block(self, start, end, newlines):
+        linenumbers, records = self._checkpoints
+        first = bisect.bisect_right(linenumbers, start) - 1
+        last = bisect.bisect_left(linenumbers, end)
+        if first < 0 or last >= len(linenumbers):
+            return False
+
+        section, count, attrs, tokenizerstate, sequencestate = records[first]
+        stopsection, stopcount, stopattrs = records[last][:3]
+        stop = linenumbers[last]
+        if stopsection is not section or stopattrs != attrs:
+            return False
+
+        region = self._lines[linenumbers[first] - 1:start - 1] + newlines + \
+            self._lines[end - 1:stop - 1]
+
+        # The first statement must not be a child of the previous items.
+        # The comments are checked too, like the full parse does.
+        for line in region:
+            body = line.lstrip(' ')
+            if not body.strip(' \t\n'):
+                continue
+
+            if len(line) - len(body) != self.tokenizer.coloffset:
+                return False
+
+            break
+
+        # The next line may be a part of a multiline text.
+        if region and region[-1].rstrip().endswith('|'):
+            return False
+
+        tokenizer = Tokenizer()
+        tokenizer.filename = self.tokenizer.filename
+        tokenizer.restore(tokenizerstate)
+        tokenizer.lineno = linenumbers[first] - 1
+        sequence = SequenceDiagram(tokenizer=tokenizer)
+        sequence.restore(sequencestate)
+
+        checkpoints = ([], [])
+        last_token = self._eat_checkpointed(
+            sequence,
+            (t for t in tokenizer.tokenize(''.join(region)) if t.type != EOF),
+            checkpoints,
+            section=section,
+            offset=count,
+        )
+
+        if not sequence.more or sequence.tokenstack or \
+                sequence.state != sequence._stateids['start'] or \
+                sequence._attrs or tokenizer.escape or not tokenizer.newline \
+                or tokenizer.indentsize != records[last][3][2] or \
+                (last_token is not None and last_token.type == MULTILINE):
+            return False
+
+        # The modules must be introduced in the same order as before.
+        firstmentions = (
+            (section.modules, section._firstseen, sequence.modules,
+             sequence._firstseen),
+            (section.modules_order, section._firstvisible,
+             sequence.modules_order, sequence._firstvisible),
+        )
+        for order, indexes, neworder, newindexes in firstmentions:
+            old = [m for m in order if count <= indexes[m] < stopcount]
+            new = [m for m in neworder if indexes.get(m, count) >= count]
+            if old != new:
+                return False
+
+        # Commit
+        items = list(sequence)
+        itemsdelta = len(items) - (stopcount - count)
+        linesdelta = len(newlines) - (end - start)
+        section[count:stopcount] = items
+        section._bind(items)
+        for order, indexes, neworder, newindexes in firstmentions:
+            for m, index in indexes.items():
+                if index >= stopcount:
+                    indexes[m] = index + itemsdelta
+
+            for m in neworder:
+                if indexes[m] >= count:
+                    indexes[m] = count + newindexes[m]
+
+        for record in records[last + 1:]:
+            if record[0] is section:
+                record[1] += itemsdelta
+
+        newnumbers, newrecords = checkpoints
+        newnumbers.append(stop + linesdelta)
+        newrecords.append([
+            section,
+            stopcount + itemsdelta,
+            attrs,
+            tokenizer.checkpoint(),
+            sequence.checkpoint(),
+        ])
+        linenumbers[first:] = newnumbers + \
+            [i + linesdelta for i in linenumbers[last + 1:]]
+        records[first:last + 1] = newrecords
+
+        self._lines[start - 1:end - 1] = newlines
+        self.tokenizer.lineno += linesdelta
+        return True
+
+    def render(self, outfile, rstrip=True, compact=False):
         """Writes the ASCII represetation of the current instance into the
         outfile.
 
@@ -139,19 +670,25 @@ class Diagram(Interpreter, Container):
         :param rstrip: If ``True``, the trailing wihtespaces at the end of each
                        line will be removed.
         :type rstrip: bool, optional, default: True
+        :param compact: If ``True``, the modules are placed as close as their
+                        items allow, instead of widening the gaps item by item.
+        :type compact: bool, optional, default: False
         """
-        Renderer(self).dump(outfile, rstrip)
+        Renderer(self, compact=compact).dump(outfile, rstrip)
 
-    def renders(self, rstrip=True):
+    def renders(self, rstrip=True, compact=False):
         """Gets the ASCII represetation of the current instance.
 
         :param rstrip: If ``True``, the trailing wihtespaces at the end of each
                        line will be removed.
         :type rstrip: bool, optional, default: True
+        :param compact: If ``True``, the modules are placed as close as their
+                        items allow, instead of widening the gaps item by item.
+        :type compact: bool, optional, default: False
         :return: ASCII diagram.
         :rtype: str
         """
-        return Renderer(self).dumps(rstrip)
+        return Renderer(self, compact=compact).dumps(rstrip)
 
     def _set_title(self, attr, value):
         self.title = value.strip()
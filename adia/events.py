@@ -0,0 +1,223 @@
+"""Event based, streaming parser.
+
+See :func:`iterparse`.
+"""
+from .container import Container
+from .diagram import Diagram, BUFFERS
+from .interpreter import New
+from .sequence import SequenceDiagram, ContainerItem, Call
+from .token import EVERYTHING, NEWLINE
+
+
+class EventSequenceDiagram(SequenceDiagram):
+    """A :class:`.SequenceDiagram` which reports the items as events.
+
+    Each container keeps only its last item, the one which may get some
+    children, and the items before it are dropped when they are finished.
+    So the number of the living items is bounded by the nesting level.
+
+    An item is finished when the next sibling, or a statement of an upper
+    level, is seen or the section ends, not on the dedents, since a blank
+    line or a comment within a block is followed by an indent back into
+    the same item.
+    """
+
+    # The errors are reported like the ones of the Diagram(source).
+    nodetype = SequenceDiagram
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+
+    def _close(self, container):
+        """Drops the last item of the container and reports the end of it
+        and its children.
+        """
+        ends = []
+        while isinstance(container, Container) and len(container):
+            item = container[-1]
+            del container[:]
+            if not isinstance(item, ContainerItem):
+                break
+
+            ends.append('call_end' if isinstance(item, Call) else 'block_end')
+            container = item
+
+        # The innermost first.
+        for event in reversed(ends):
+            self.events.append((event, ()))
+
+    def _new_call(self, call):
+        self._close(self.current)
+        super()._new_call(call)
+        self.events.append((
+            'call_start',
+            (call.caller, call.callee, call.text, call.returntext)
+        ))
+
+    def _new_note(self, note):
+        self._close(self.current)
+        super()._new_note(note)
+        self.events.append(('note', (tuple(note.modules), note.text)))
+
+    def _new_loop(self, loop):
+        self._close(self.current)
+        super()._new_loop(loop)
+        self.events.append(('block_start', (loop.kind, loop.text)))
+
+    def _new_condition(self, condition):
+        self._close(self.current)
+        super()._new_condition(condition)
+        self.events.append(
+            ('block_start', (condition.kind, condition.text))
+        )
+
+    def _set_title(self, value):
+        super()._set_title(value)
+        self.events.append(('section_start', ('sequence', self.title)))
+
+    def _attr(self, attr, value):
+        super()._attr(attr, value)
+        self.events.append(('section_attr', (attr, value.strip())))
+
+    def _module_attr(self, module, attr, value):
+        super()._module_attr(module, attr, value)
+        self.events.append(('module_attr', (module, attr, value.strip())))
+
+
+class EventDiagram(Diagram):
+    """A :class:`.Diagram` which reports the statements as events instead
+    of building the tree, see :func:`iterparse`.
+    """
+
+    #: The maximum number of the events to collect by the fast path before
+    #: letting a token through to flush them.
+    maxpending = 128
+
+    cacheable = False
+
+    # The errors are reported like the ones of the Diagram(source).
+    nodetype = Diagram
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.events = []
+
+    def flush(self):
+        """Moves the events of the active sequence diagram into the
+        :attr:`events`.
+        """
+        sequence = self._sequence()
+        if sequence is not None and sequence.events:
+            self.events.extend(sequence.events)
+            sequence.events.clear()
+
+    def _fastline(self, source, offset):
+        sequence = self._sequence()
+        if sequence is not None and len(sequence.events) >= self.maxpending:
+            return None
+
+        return super()._fastline(source, offset)
+
+    def _set_title(self, attr, value):
+        super()._set_title(attr, value)
+        self.events.append(('diagram_attr', ('title', self.title)))
+
+    def _attr(self, attr, value):
+        super()._attr(attr, value)
+        self.events.append(('diagram_attr', (attr, value.strip())))
+
+    def _new_seq(self, sequence):
+        sequence._close(sequence)
+        self.events.extend(sequence.events)
+        self.events.append(('section_end', ()))
+
+    statemap = {
+        **Diagram.statemap,
+        'new-sequence': {
+            EVERYTHING: {
+                NEWLINE: New(
+                    EventSequenceDiagram,
+                    callback=_new_seq,
+                )
+            }
+        }
+    }
+
+
+def iterparse(source):
+    """Parses the ``ADia`` source and yields the events as the lines are
+    consumed, without building the tree.
+
+    Each event is an ``(event, args)`` tuple:
+
+    =================  ===================================================
+    ``diagram_attr``   ``(attr, value)``, ``attr`` is ``title``,
+                       ``version`` or ``author``.
+    ``section_start``  ``(kind, title)``, ``kind`` is ``sequence``.
+    ``section_attr``   ``(attr, value)``
+    ``module_attr``    ``(module, attr, value)``
+    ``call_start``     ``(caller, callee, text, returntext)``
+    ``call_end``       ``()``
+    ``note``           ``(modules, text)``
+    ``block_start``    ``(kind, text)``, ``kind`` is the keyword, such as
+                       ``for`` or ``if``.
+    ``block_end``      ``()``
+    ``section_end``    ``()``
+    =================  ===================================================
+
+    The ``call_end`` and ``block_end`` events are reported when the next
+    statement at the same or upper level is seen, after the events of the
+    children. The memory usage is bounded by the nesting level of the
+    statements instead of the size of the source.
+
+    .. testsetup:: iterparse
+
+       import adia
+
+    .. testcode:: iterparse
+
+       calls = 0
+       for event, args in adia.iterparse('''
+           sequence:
+           foo -> bar: baz
+             bar -> baz
+       '''):
+           if event == 'call_start':
+               calls += 1
+
+       print(calls)
+
+    .. testoutput:: iterparse
+
+       2
+
+    :param source: The ADia source code.
+    :type source: str, bytes-like or file-like
+    :raises InterpreterError: On the first syntax error.
+    """
+    diagram = EventDiagram()
+    buffer = None
+    if not isinstance(source, (str, ) + BUFFERS):
+        if hasattr(source, 'name'):
+            diagram.tokenizer.filename = source.name
+
+        buffer = diagram._mapfile(source)
+        source = source.read() if buffer is None else buffer
+
+    events = diagram.events
+    tokens = diagram.tokenizer.tokenize(
+        source,
+        diagram._fastline if diagram.fastpath else None
+    )
+    try:
+        for token in tokens:
+            diagram.eat_token(token)
+            diagram.flush()
+            if events:
+                yield from events
+                events.clear()
+    finally:
+        tokens.close()
+        if buffer is not None:
+            buffer.close()
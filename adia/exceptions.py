@@ -3,34 +3,56 @@ from .token import TOKEN_NAMES, NEWLINE, EOF, INDENT, DEDENT, MULTILINE, \
 
 
 class InterpreterError(Exception):
+    """Base class of the parse errors.
+
+    Besides the message, the location of the error is available as
+    attributes, so the errors collected by a recovering :class:`.Diagram`
+    could be reported in any format.
+
+    :ivar filename: The source filename or ``None``.
+    :ivar interpreter: The class of the interpreter which failed, or the
+                       :attr:`.Interpreter.nodetype` of it.
+    :ivar token: The offending :class:`.Token`.
+    :ivar line: The line number of the token, one based.
+    :ivar col: The column of the token, zero based.
+    """
+
     def __init__(self, interpreter, token, msg):
-        filename = interpreter.tokenizer.filename or 'String'
+        self.filename = interpreter.tokenizer.filename
+        self.interpreter = interpreter.nodetype or interpreter.__class__
+        self.token = token
+        self.line, self.col = token.start
 
         super().__init__(
             f'{self.__class__.__name__}: '
-            f'File "{filename}", '
-            f'Interpreter: {interpreter.__class__.__name__}, '
-            f'line {token.start[0]}, col {token.start[1]}\n'
+            f'File "{self.filename or "String"}", '
+            f'Interpreter: {self.interpreter.__name__}, '
+            f'line {self.line}, col {self.col}\n'
             f'{msg}'
         )
 
 
 class BadAttribute(InterpreterError):
     def __init__(self, interpreter, token, attr):
+        self.attribute = attr
         super().__init__(interpreter, token, f'Invalid attribute: {attr}.')
 
 
 class BadSyntax(InterpreterError):
+    """:ivar expected: A list of the expected tokens.
+    """
+
     def __init__(self, interpreter, token, expected=None):
+        self.expected = list(expected or [])
         if token.type in [NEWLINE, EOF, INDENT, DEDENT, MULTILINE, EVERYTHING]:
             got = TOKEN_NAMES[token.type]
         else:
             got = token.string
 
-        if len(expected) > 1:
-            expected = f'Expected one of `{" ".join(expected)}`'
-        elif len(expected) == 1:
-            expected = f'Expected `{expected[0]}`'
+        if len(self.expected) > 1:
+            expected = f'Expected one of `{" ".join(self.expected)}`'
+        elif len(self.expected) == 1:
+            expected = f'Expected `{self.expected[0]}`'
 
         super().__init__(
             interpreter, token, f'{expected}, got: `{got}`.'
@@ -0,0 +1,62 @@
+"""Fenwick tree module."""
+
+
+class FenwickTree:
+    """A list of numbers which answers the sum of any range and updates a
+    number in ``O(log n)``.
+
+    >>> t = FenwickTree([1, 2, 3, 4])
+    >>> t.sum(1, 3)
+    5
+    >>> t[1] = 10
+    >>> t.sum(0, 4)
+    18
+    """
+    __slots__ = ('_values', '_tree')
+
+    def __init__(self, values=()):
+        self._values = list(values)
+        tree = [0] + self._values
+        size = len(tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        delta = value - self._values[index]
+        if not delta:
+            return
+
+        self._values[index] = value
+        tree = self._tree
+        size = len(tree)
+        index += 1
+        while index < size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, stop):
+        """Returns the sum of the first ``stop`` numbers."""
+        tree = self._tree
+        result = 0
+        while stop > 0:
+            result += tree[stop]
+            stop -= stop & -stop
+
+        return result
+
+    def sum(self, start, stop):
+        """Returns the sum of the numbers in the ``[start, stop)`` range."""
+        if stop <= start:
+            return 0
+
+        return self.prefix(stop) - self.prefix(start)
@@ -1,18 +1,23 @@
 import abc
 
 from .token import TOKEN_NAMES, EXACT_TOKENS_DICT, MULTILINE, EVERYTHING, \
-    NAME
+    NAME, NEWLINE, DEDENT, EOF
 from .tokenizer import Tokenizer
-from .exceptions import BadSyntax, BadAttribute
+from .exceptions import InterpreterError, BadSyntax, BadAttribute
 
 
 class Action:
+    """Base class of the actions used in the :attr:`Interpreter.statemap`.
+
+    The actions are declarative, they are compiled into the transition
+    tables by the :meth:`Interpreter._compile` and performed by the
+    :meth:`Interpreter.eat_token`, so they could be shared by all the
+    interpreters.
+    """
+
     def __init__(self, nextstate=None):
         self.nextstate = nextstate
 
-    def __call__(self, interpreter, token):
-        return self.nextstate
-
 
 class Switch(Action):
     def __init__(self, default=None, **kw):
@@ -20,32 +25,12 @@ class Switch(Action):
         self.cases = {k.rstrip('_'): v for k, v in kw.items()}
         super().__init__()
 
-    def __call__(self, interpreter, token, *args):
-        action = self.cases.get(token.string, self.default)
-        if action is None:
-            raise BadSyntax(interpreter, token, expected=self.cases.keys())
-
-        return action(interpreter, token, *args)
-
 
 class Goto(Action):
     def __init__(self, callback=None, nextstate=None):
         self.callback = callback
         super().__init__(nextstate)
 
-    def _call_callback(self, interpreter, token, *args, **kw):
-        if self.callback is None:
-            return
-
-        try:
-            self.callback(interpreter, *args, **kw)
-        except AttributeError as e:
-            raise BadAttribute(interpreter, token, '.'.join(e.args))
-
-    def __call__(self, interpreter, token, *args):
-        self._call_callback(interpreter, token, *args)
-        return super().__call__(interpreter, token)
-
 
 class Consume(Goto):
     limit = [
@@ -60,105 +45,370 @@ class Consume(Goto):
 
         super().__init__(callback=callback, nextstate=nextstate)
 
-    def __call__(self, interpreter, token, *args):
-        args = tuple(
-            i.string for i in interpreter.tokenstack if
-            not self.limit or i.type in self.limit
-        )
-        interpreter.tokenstack.clear()
-        return super().__call__(interpreter, token, *args)
-
 
 class Ignore(Consume):
-    def __call__(self, interpreter, token):
-        interpreter.tokenstack.clear()
-        return super().__call__(interpreter, token)
+    pass
 
 
 class Final(Action):
-    def __call__(self, interpreter, *args, **kw):
-        interpreter.more = False
-        return super().__call__(interpreter, *args, **kw)
+    pass
 
 
 class FinalConsume(Consume):
-    def __call__(self, interpreter, *args, **kw):
-        interpreter.more = False
-        return super().__call__(interpreter, *args, **kw)
+    pass
 
 
 class New(Consume):
-    target = None
-    parent = None
-
     def __init__(self, factory, *args, **kwargs):
         self.factory = factory
         super().__init__(*args, **kwargs)
 
-    def __call__(self, parent, token):
-        self.target = self.factory(tokenizer=parent.tokenizer)
-        self.parent = parent
 
-        while parent.tokenstack:
-            self.eat_token(parent.tokenstack.pop(0))
+# Opcodes of the compiled transitions, see Interpreter._compile.
+SHIFT = 0
+GOTO = 1
+CONSUME = 2
+IGNORE = 3
+FINAL = 4
+FINALCONSUME = 5
+NEW = 6
+SWITCH = 7
 
-        return self
+# The state of an interpreter while a child interpreter, created by a New
+# action, is active.
+DELEGATE = -1
+
+TOKENTYPES = max(TOKEN_NAMES) + 1
 
-    def eat_token(self, token):
-        more, nextstate = self.target.eat_token(token)
-        if more:
-            return None
 
-        self._call_callback(self.parent, token, self.target)
+class Interpreter(metaclass=abc.ABCMeta):
+    """Base class of the table driven interpreters.
+
+    The :attr:`statemap` of each subclass is compiled once, when the class is
+    created, into a list of rows, one per state, each one is a list of the
+    transitions indexed by the token type. A transition is an
+    ``(opcode, nextstate, callback, limit, argument)`` tuple and all the
+    state names within the class are resolved to the row numbers.
+
+    The callbacks are looked up by name on the class being compiled, so a
+    subclass may override them without repeating the :attr:`statemap`.
+
+    The root interpreter keeps a stack of the active interpreters, itself
+    and the ones created by the :class:`New` actions, and each token is
+    fed directly into the innermost one, so the cost of a token does not
+    depend on the nesting level.
+
+    If ``recover`` is ``True``, the errors are collected into the
+    :attr:`diagnostics` instead of being raised, see :meth:`eat_token`.
+
+    The instance attributes are not declared as ``__slots__`` here, to let
+    the subclasses inherit from ``list`` too, the slotted subclasses must
+    declare the :attr:`_slots` instead.
+    """
+    __slots__ = ()
+
+    #: The instance attributes of the interpreters.
+    _slots = ('tokenizer', 'more', 'state', 'tokenstack', '_delegate',
+              '_stack')
+
+    #: The class of the :attr:`node` if it is not the interpreter itself, the
+    #: errors are reported by this name.
+    nodetype = None
+
+    #: The state to continue from after an error while recovering, the
+    #: active interpreters without one are discarded.
+    recoverstate = None
+
+    #: The :class:`.InterpreterError` instances collected while recovering,
+    #: ``None`` if not recovering.
+    diagnostics = None
+
+    # Skipping the rest of a bad line.
+    _resyncing = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if isinstance(getattr(cls, 'statemap', None), dict):
+            cls._compile()
+
+    @classmethod
+    def _compile(cls):
+        stateids = {}
+        transitions = []
+        expected = []
+        anonymous = {}
+
+        def newstate(mapping):
+            stateid = len(transitions)
+            transitions.append([None] * TOKENTYPES)
+            expected.append([
+                EXACT_TOKENS_DICT.get(i, TOKEN_NAMES[i]) for i in mapping
+            ])
+            return stateid
+
+        def resolve(nextstate):
+            if isinstance(nextstate, str):
+                return stateids[nextstate]
+
+            return nextstate
+
+        def method(callback):
+            if callback is None:
+                return None
+
+            return getattr(cls, callback.__name__, callback)
+
+        def compilestate(stateid, mapping):
+            row = transitions[stateid]
+            for tokentype, action in mapping.items():
+                row[tokentype] = compileaction(action)
+
+        def compileaction(action):
+            if action is None:
+                return None
+
+            if isinstance(action, dict):
+                key = id(action)
+                if key not in anonymous:
+                    anonymous[key] = newstate(action)
+                    compilestate(anonymous[key], action)
+
+                return SHIFT, anonymous[key], None, None, None
+
+            if isinstance(action, Switch):
+                cases = {k: compileaction(v) for k, v in action.cases.items()}
+                return SWITCH, None, None, None, \
+                    (cases, compileaction(action.default))
+
+            if isinstance(action, New):
+                return NEW, action.nextstate, method(action.callback), None, \
+                    action.factory
+
+            # The nextstate of the final actions belongs to the parent.
+            limit = getattr(action, 'limit', None)
+            if limit is not None:
+                limit = frozenset(limit)
 
-        return self.nextstate or nextstate
+            if isinstance(action, FinalConsume):
+                return FINALCONSUME, action.nextstate, \
+                    method(action.callback), limit, None
 
+            if isinstance(action, Final):
+                return FINAL, action.nextstate, None, None, None
+
+            if isinstance(action, Ignore):
+                return IGNORE, resolve(action.nextstate), \
+                    method(action.callback), None, None
+
+            if isinstance(action, Consume):
+                return CONSUME, resolve(action.nextstate), \
+                    method(action.callback), limit, None
+
+            return GOTO, resolve(action.nextstate), \
+                method(getattr(action, 'callback', None)), None, None
 
-class Interpreter(metaclass=abc.ABCMeta):
-    def __init__(self, initialstate, *args, tokenizer=None, **kwargs):
+        for key, mapping in cls.statemap.items():
+            stateids[key] = newstate(mapping)
+
+        for key, mapping in cls.statemap.items():
+            compilestate(stateids[key], mapping)
+
+        cls._stateids = stateids
+        cls._transitions = transitions
+        cls._expected = expected
+
+    def __init__(self, initialstate, *args, tokenizer=None, recover=False,
+                 **kwargs):
         super().__init__(*args, **kwargs)
         self.tokenizer = tokenizer if tokenizer else Tokenizer()
+        if recover:
+            self.diagnostics = []
+
         self.more = True
-        self.state = self.statemap[initialstate]
+        self.state = self._stateids[initialstate]
         self.tokenstack = []
 
+        # The New transition of the active child and the stack of the active
+        # interpreters, which is created when this is the root interpreter.
+        self._delegate = None
+        self._stack = None
+
+    @property
+    def node(self):
+        """The result of the interpreter, which is given to the callback of
+        the :class:`New` action when the interpreter is finished.
+        """
+        return self
+
     @property
     @abc.abstractmethod
     def statemap(self):
         raise NotImplementedError()
 
+    def checkpoint(self):
+        """Returns the current state of the interpreter.
+
+        The returned value may be passed to the :meth:`restore` to continue
+        interpreting from the same point later.
+        """
+        return self.state, self._delegate, self.more, tuple(self.tokenstack)
+
+    def restore(self, checkpoint):
+        """Restores the state taken by the :meth:`checkpoint`."""
+        self.state, self._delegate, self.more, tokenstack = checkpoint
+        self.tokenstack = list(tokenstack)
+        self._stack = None
+
     def _set_state(self, key):
         if isinstance(key, str):
-            self.state = self.statemap[key]
+            self.state = self._stateids[key]
         else:
             self.state = key
 
-    def _redirect(self, target, token):
-        newstatekey = target.eat_token(token)
-        if newstatekey is not None:
-            self._set_state(newstatekey)
+    def _callback(self, callback, token, *args):
+        try:
+            callback(self, *args)
+        except AttributeError as e:
+            raise BadAttribute(self, token, '.'.join(e.args))
 
     def eat_token(self, token):
-        if isinstance(self.state, New):
-            self._redirect(self.state, token)
-            return self.more, None
+        """Feeds the token into the innermost active interpreter.
+
+        Returns a ``(more, nextstate)`` tuple, the ``more`` is ``False``
+        when this interpreter is finished and the ``nextstate`` is the state
+        which is suggested to the parent.
+
+        While recovering, an error is appended to the :attr:`diagnostics`,
+        the active interpreters are unwound to the innermost one having a
+        :attr:`recoverstate` and the rest of the line is skipped. The
+        ``DEDENT`` and ``EOF`` tokens are still fed to keep the structure,
+        but the errors caused by them while skipping are not reported again.
+        """
+        stack = self._stack
+        if stack is None:
+            stack = self._stack = [self]
+
+        if self.diagnostics is None:
+            return self._feed(stack, token)
+
+        resyncing = self._resyncing
+        if resyncing:
+            if token.type == NEWLINE:
+                self._resyncing = False
+                return True, None
+
+            if token.type != DEDENT and token.type != EOF:
+                return True, None
+
+            self._resyncing = False
 
         try:
-            newstate = self.state[token.type]
-        except KeyError:
-            validtokens = [
-                EXACT_TOKENS_DICT.get(i, TOKEN_NAMES[i])
-                for i in self.state.keys()
-            ]
-            raise BadSyntax(self, token, expected=validtokens)
+            return self._feed(stack, token)
+        except InterpreterError as ex:
+            if not resyncing:
+                self.diagnostics.append(ex.with_traceback(None))
+
+            self._resync(stack)
+
+        if token.type == DEDENT or token.type == EOF:
+            if not resyncing:
+                # Give the token to the interpreter which continues.
+                try:
+                    return self._feed(stack, token)
+                except InterpreterError:
+                    self._resync(stack)
+
+        elif token.type != NEWLINE:
+            self._resyncing = True
+
+        return True, None
+
+    @staticmethod
+    def _resync(stack):
+        while len(stack) > 1 and stack[-1].recoverstate is None:
+            stack.pop()
+
+        interpreter = stack[-1]
+        interpreter._delegate = None
+        interpreter.tokenstack.clear()
+        interpreter.more = True
+        interpreter.state = interpreter._stateids[interpreter.recoverstate]
+
+    @staticmethod
+    def _feed(stack, token):
+        interpreter = stack[-1]
+        more, nextstate = interpreter._step(stack, token)
+        if more or len(stack) == 1:
+            return more, nextstate
+
+        # The child is finished.
+        stack.pop()
+        parent = stack[-1]
+        _, newstate, callback, _, _ = parent._delegate
+        parent._delegate = None
+        if callback is not None:
+            parent._callback(callback, token, interpreter.node)
+
+        parent._set_state(newstate or nextstate)
+        return True, None
+
+    def _step(self, stack, token):
+        state = self.state
+        transition = self._transitions[state][token.type]
+        if transition is None:
+            raise BadSyntax(self, token, expected=self._expected[state])
 
         self.tokenstack.append(token)
+        opcode, newstate, callback, limit, argument = transition
+
+        if opcode == SWITCH:
+            cases, default = argument
+            transition = cases.get(token.string, default)
+            if transition is None:
+                raise BadSyntax(self, token, expected=cases.keys())
+
+            opcode, newstate, callback, limit, argument = transition
+
+        if opcode == SHIFT:
+            self.state = newstate
+            return True, None
+
+        if opcode == NEW:
+            self._delegate = transition
+            self.state = DELEGATE
+            stack.append(argument(tokenizer=self.tokenizer))
+
+            # Replay the tokens into the child.
+            tokenstack = self.tokenstack
+            while tokenstack:
+                self._feed(stack, tokenstack.pop(0))
+
+            return True, None
+
+        if opcode == FINAL or opcode == FINALCONSUME:
+            self.more = False
+
+        if opcode == CONSUME or opcode == FINALCONSUME:
+            tokens = self.tokenstack
+            if limit is None:
+                args = [t.string for t in tokens]
+            else:
+                args = [t.string for t in tokens if t.type in limit]
+
+            tokens.clear()
+            if callback is not None:
+                self._callback(callback, token, *args)
+
+        elif opcode == IGNORE:
+            self.tokenstack.clear()
+            if callback is not None:
+                self._callback(callback, token)
 
-        if callable(newstate):
-            newstate = newstate(self, token)
+        elif opcode == GOTO and callback is not None:
+            self._callback(callback, token)
 
         if not self.more:
-            return self.more, newstate
+            return False, newstate
 
-        self._set_state(newstate)
+        self.state = newstate
         return True, None
@@ -0,0 +1,221 @@
+"""Lazy sequence diagrams.
+
+See the ``lazy`` argument of the :class:`.Diagram`.
+"""
+import bisect
+import re
+
+from .sequence import SequenceDiagram
+from .tokenizer import Tokenizer
+
+
+# The lines which may end a sequence diagram: the ``sequence``, ``state``
+# and ``class`` keywords, only the first one is supported.
+BOUNDARY_RE = re.compile(r'^( *)(?:sequence|state|class)(?!\w)', re.M)
+SECTION_RE = re.compile(r' *sequence *:(?! ?\|)([^\n]*)')
+
+# The lines which their first ``:`` or ``#`` is followed by a ``|``, may
+# start a multiline text.
+MULTILINE_RE = re.compile(r'^[^:#\n]*[:#] ?\|[^\n]*', re.M)
+SIMPLEMULTILINE_RE = re.compile(r'[^:#\n]*[:#] ?\| *')
+
+# The first non-whitespace character of each non-empty line.
+STATEMENT_RE = re.compile(r'^( *)[^ \n]', re.M)
+
+# Escaped characters and tab indented lines are not supported by the index.
+UNSUPPORTED_RE = re.compile(r'^[^:#\n]*\\|^ *\t', re.M)
+
+
+def index(source):
+    """Finds the sequence diagrams of the ``source`` without tokenizing it.
+
+    Returns a ``(headerend, sections)`` tuple, the ``headerend`` is the
+    offset of the first section and each section is a
+    ``(title, lineindent, offset, tokenizerstate)`` tuple. The ``offset`` is
+    the beginning of the first line after the ``sequence: title`` line and
+    the ``tokenizerstate`` is the :meth:`.Tokenizer.checkpoint` at that
+    line.
+
+    Returns ``None`` if the source has anything which could not be indexed
+    by a line based scan, such as the escapes.
+    """
+    if UNSUPPORTED_RE.search(source):
+        return None
+
+    # The multiline texts, as sorted (start, end) offsets
+    blocks = []
+    blockend = 0
+    tokenizer = Tokenizer()
+    for m in MULTILINE_RE.finditer(source):
+        if m.start() < blockend:
+            continue
+
+        if not SIMPLEMULTILINE_RE.fullmatch(m.group()):
+            return None
+
+        token, end, _ = tokenizer._multilineblock(source, m.end() + 1, 0)
+        if token is not None:
+            blocks.append((m.end() + 1, end))
+            blockend = end
+
+    starts = [b[0] for b in blocks]
+
+    def inblock(offset):
+        i = bisect.bisect_right(starts, offset) - 1
+        return i >= 0 and offset < blocks[i][1]
+
+    # The column offset and the indentation size, like the tokenizer.
+    coloffset = -1
+    indentsize = 0
+    indentstart = len(source)
+    for m in STATEMENT_RE.finditer(source):
+        if inblock(m.start()):
+            continue
+
+        wslen = m.end(1) - m.start()
+        if wslen:
+            if coloffset < 0:
+                coloffset = wslen
+            elif not indentsize:
+                indentsize = wslen - coloffset
+        elif coloffset < 0:
+            coloffset = 0
+
+        if indentsize:
+            if indentsize < 0:
+                return None
+
+            indentstart = m.start()
+            break
+
+    headerend = None
+    sections = []
+    lineno = 0
+    lastoffset = 0
+    for m in BOUNDARY_RE.finditer(source):
+        start = m.start()
+        if inblock(start):
+            continue
+
+        section = SECTION_RE.match(source, start)
+        if section is None:
+            return None
+
+        wslen = m.end(1) - start
+        size = indentsize if start >= indentstart else 0
+        lineindent = 0
+        if size and wslen > coloffset:
+            lineindent = (wslen - coloffset) // size
+
+        lineno += source.count('\n', lastoffset, start) + 1
+        lastoffset = min(section.end() + 1, len(source))
+        if headerend is None:
+            headerend = start
+
+        sections.append((
+            section.group(1).strip(),
+            lineindent,
+            lastoffset,
+            (lineno, coloffset, size, lineindent, False, True, False, (),
+             False, 0, None),
+        ))
+
+    if headerend is None:
+        headerend = len(source)
+
+    return headerend, sections
+
+
+class Materialized:
+    """An attribute of the :class:`LazySequenceDiagram` which is parsed on
+    the first access.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+
+        obj._materialize()
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            return getattr(SequenceDiagram, self.name)
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+class LazySequenceDiagram(SequenceDiagram):
+    """A sequence diagram which is parsed on the first access to its items
+    or attributes except the :attr:`title`.
+
+    The parse errors are raised by the first access too, and again by the
+    next ones.
+    """
+    modules = Materialized()
+    modules_order = Materialized()
+    modules_byid = Materialized()
+    description = Materialized()
+    tags = Materialized()
+
+    def __init__(self, title, source, offset, tokenizerstate, *args,
+                 fastpath=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title = title
+        self._pending = source, offset, tokenizerstate, fastpath
+
+    def _materialize(self):
+        pending = self._pending
+        if pending is None:
+            return
+
+        source, offset, tokenizerstate, fastpath = pending
+        tokenizer = Tokenizer()
+        tokenizer.filename = self.tokenizer.filename
+        tokenizer.restore(tokenizerstate)
+        sequence = SequenceDiagram(tokenizer=tokenizer)
+        sequence._set_state('start')
+        sequence.title = self.title
+
+        tokens = tokenizer.tokenize(
+            source,
+            sequence._fastline if fastpath else None,
+            offset
+        )
+        try:
+            for token in tokens:
+                more, _ = sequence.eat_token(token)
+                if not more:
+                    break
+        finally:
+            tokens.close()
+
+        self._pending = None
+        list.extend(self, sequence)
+        for attr in ('modules', 'modules_order', 'modules_byid',
+                     'description', 'tags', '_firstseen', '_firstvisible',
+                     '_attrs'):
+            self.__dict__[attr] = getattr(sequence, attr)
+
+    def __iter__(self):
+        self._materialize()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self._materialize()
+        return super().__reversed__()
+
+    def __len__(self):
+        self._materialize()
+        return super().__len__()
+
+    def __getitem__(self, index):
+        self._materialize()
+        return super().__getitem__(index)
+
+    def __contains__(self, item):
+        self._materialize()
+        return super().__contains__(item)
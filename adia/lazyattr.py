@@ -21,17 +21,46 @@ class LazyAttribute:
     1
     >>> a.count
     1
+
+    The classes without the ``__dict__`` must declare a slot named after the
+    attribute with a leading underscore to keep the value.
+
+    >>> class B:
+    ...     __slots__ = ('_count', )
+    ...     @LazyAttribute
+    ...     def count(self):
+    ...         return 1
+    >>> B().count
+    1
     """
 
-    __slots__ = ('_factory', )
+    __slots__ = ('_factory', '_slot')
 
     def __init__(self, factory):
         self._factory = factory
+        self._slot = None
+
+    def __set_name__(self, owner, name):
+        slot = f'_{name}'
+        for cls in owner.__mro__:
+            if slot in cls.__dict__.get('__slots__', ()):
+                self._slot = slot
+                break
 
     def __get__(self, obj, owner=None):
         factory = self._factory
         if obj is None:
             return factory
-        val = factory(obj)
-        setattr(obj, factory.__name__, val)
-        return val
+
+        slot = self._slot
+        if slot is None:
+            val = factory(obj)
+            setattr(obj, factory.__name__, val)
+            return val
+
+        try:
+            return getattr(obj, slot)
+        except AttributeError:
+            val = factory(obj)
+            setattr(obj, slot, val)
+            return val
@@ -3,6 +3,7 @@ import itertools
 
 from .sequence import SequenceDiagram, Call, Condition, Loop, Note
 from .canvas import Canvas
+from .fenwick import FenwickTree
 from .constants import LEFT, RIGHT
 from .renderingplans import ModulePlan, ItemStartPlan, ItemEndPlan, \
     ConditionStartPlan, ConditionEndPlan, NotePlan
@@ -24,9 +25,10 @@ def twiniter(items):
 
 
 class Renderer:
-    def __init__(self, diagram, canvas=None):
+    def __init__(self, diagram, canvas=None, compact=False):
         self._repeats = set()
         self.diagram = diagram
+        self.compact = compact
 
         if canvas is None:
             self.canvas = Canvas()
@@ -69,7 +71,7 @@ class Renderer:
 
         for unit in self.diagram:
             if isinstance(unit, SequenceDiagram):
-                SequenceRenderer(unit, self.canvas).render()
+                SequenceRenderer(unit, self.canvas, self.compact).render()
 
     def _dumplines(self, rstrip):
         for line in self.canvas:
@@ -95,106 +97,168 @@ class Renderer:
 
 class SequenceRenderer(Renderer):
     _moduleplans = None
-    _moduleplans_dict = None
+    _moduleplans_byid = None
     _itemplans = None
 
-    def _planmodules(self):
-        self._moduleplans = []
-        self._moduleplans_dict = {}
-        for m in self.diagram.modules_order:
-            module = ModulePlan(self.diagram.modules[m], lpad=1, rpad=1)
-            self._moduleplans.append(module)
-            self._moduleplans_dict[m] = module
-
-        for k, v in self.diagram.modules.items():
-            if k not in self._moduleplans_dict:
-                module = ModulePlan(self.diagram.modules[k], lpad=1, rpad=1)
-                self._moduleplans.append(module)
-                self._moduleplans_dict[k] = module
+    # The prefix sums of the box widths and the gaps between the adjacent
+    # module boxes, see the _span.
+    _boxends = None
+    _gaps = None
 
-        if self._moduleplans:
-            self._moduleplans[0].lpad = 0
-            self._moduleplans[-1].rpad = 0
+    # The width constraints of the compact layout by the index of their
+    # last gap, see the _require.
+    _constraints = None
 
-    def _fromto_modules(self, from_, to, reverse=False):
-        capt = False
+    def _planmodule(self, module):
+        plan = ModulePlan(module, lpad=1, rpad=1)
+        plan.index = len(self._moduleplans)
+        self._moduleplans.append(plan)
+        self._moduleplans_byid[module.id] = plan
 
-        it = self._moduleplans
+    def _planmodules(self):
+        diagram = self.diagram
+        self._moduleplans = []
+        self._moduleplans_byid = [None] * len(diagram.modules_byid)
+        for m in diagram.modules_order:
+            self._planmodule(diagram.modules[m])
+
+        for module in diagram.modules_byid:
+            if module.order is None:
+                self._planmodule(module)
+
+        plans = self._moduleplans
+        if plans:
+            plans[0].lpad = 0
+            plans[-1].rpad = 0
+
+        self._boxends = list(itertools.accumulate(
+            (m.boxlen for m in plans),
+            initial=0
+        ))
+        self._gaps = FenwickTree(
+            max(m.rpad, nm.lpad) for m, nm in zip(plans, plans[1:])
+        )
+        self._constraints = [[] for _ in plans]
+
+    def _pad(self, plan, lpad=None, rpad=None):
+        """Changes the paddings of the module ``plan`` and updates the gaps
+        around it.
+        """
+        if lpad is not None:
+            plan.lpad = lpad
+
+        if rpad is not None:
+            plan.rpad = rpad
+
+        plans = self._moduleplans
+        gaps = self._gaps
+        index = plan.index
+        if index > 0:
+            gaps[index - 1] = max(plans[index - 1].rpad, plan.lpad)
+
+        if index < len(gaps):
+            gaps[index] = max(plan.rpad, plans[index + 1].lpad)
+
+    def _interval(self, from_, to, reverse=False):
+        """Returns the indexes of the first and the last modules of the span
+        from the ``from_`` to the ``to``.
+
+        The span continues to the last module, or the first one if
+        ``reverse``, if the ``to`` is not in that direction.
+        """
+        start = stop = from_.index
         if reverse:
-            it = reversed(it)
-
-        for m, nm in twiniter(it):
-            if not capt and m is not from_:
-                continue
-
-            if m is from_:
-                capt = True
-
-            if capt:
-                if m is to:
-                    yield m, None
-                    return
-                yield m, nm
-
-    def _availspacefor_call(self, from_, to, reverse=False):
-        result = 0
-        for m, nm in self._fromto_modules(from_, to, reverse):
-            result += m.boxlen
-            if nm is None:
-                continue
-
-            if reverse:
-                result += max(m.lpad, nm.rpad)
+            if to is not None and to.index <= start:
+                start = to.index
             else:
-                result += max(m.rpad, nm.lpad)
-
-        if from_:
-            result -= from_.boxlen // 2 + 1
-
-        if to:
-            result -= to.boxlen // 2 + 1
+                start = 0
+        elif to is not None and to.index >= stop:
+            stop = to.index
+        else:
+            stop = len(self._moduleplans) - 1
+
+        return start, stop
+
+    def _span(self, from_, to, reverse=False):
+        """Returns the width of the module boxes from the ``from_`` to the
+        ``to`` and the gaps between them in ``O(log n)``, see the
+        :meth:`_interval`.
+        """
+        start, stop = self._interval(from_, to, reverse)
+        return self._boxends[stop + 1] - self._boxends[start] + \
+            self._gaps.sum(start, stop)
+
+    def _require(self, start, stop, width):
+        """Requires the modules from the ``start`` to the ``stop`` index and
+        the gaps between them, or the gap after the module if they are the
+        same, to be at least ``width`` wide in the compact layout.
+        """
+        width -= self._boxends[stop + 1] - self._boxends[start]
+        self._constraints[max(start, stop - 1)].append((start, width))
+
+    def _require_distance(self, start, stop, distance):
+        """Requires the middle of the ``stop`` module to be at least
+        ``distance`` columns after the middle of the ``start`` module in the
+        compact layout.
+        """
+        plans = self._moduleplans
+        first = plans[start].boxlen
+        last = plans[stop].boxlen
+        self._require(start, stop, distance + first // 2 + last - last // 2)
+
+    def _solve(self):
+        """Sets the minimal gaps between the modules which satisfy all the
+        constraints of the compact layout, in one sweep from left to right.
+
+        Each gap is the least one needed by the constraints which end at
+        it, the space they lack is left to the last gap of them, so the
+        total width is minimal.
+        """
+        plans = self._moduleplans
+        last = len(plans) - 1
+        offsets = [0]
+        for index, plan in enumerate(plans):
+            gap = 1 if index < last else 0
+            offset = offsets[index]
+            for start, width in self._constraints[index]:
+                gap = max(gap, width - offset + offsets[start])
+
+            offsets.append(offset + gap)
+            plan.rpad = gap
+            if index < last:
+                plans[index + 1].lpad = gap
 
+    def _availspacefor_call(self, from_, to, reverse=False):
+        result = self._span(from_, to, reverse)
+        result -= from_.boxlen // 2 + 1
+        result -= to.boxlen // 2 + 1
         result -= 7
         return 0 if result < 0 else result
 
     def _availspacefor_condition(self, from_, to):
-        result = 0
-        for m, nm in self._fromto_modules(from_, to, False):
-            if m is None:
-                break
-
-            result += m.boxlen
-            if nm is None:
-                continue
-
-            result += max(m.rpad, nm.lpad)
+        if from_ is None:
+            return 0
 
-        result -= 4
+        result = self._span(from_, to) - 4
         if result < 0:
             return 0
 
         return result
 
     def _availspacefor_note(self, from_, to):
-        result = 0
         single = False
 
         if to is None:
             single = True
             try:
-                to = self._moduleplans[self._moduleplans.index(from_) + 1]
+                to = self._moduleplans[from_.index + 1]
             except IndexError:
                 to = None
 
         if to is None:
-            result += from_.boxlen
+            result = from_.boxlen
         else:
-            for m, nm in self._fromto_modules(from_, to, False):
-                result += m.boxlen
-                if nm is None:
-                    continue
-
-                result += max(m.rpad, nm.lpad)
+            result = self._span(from_, to)
 
         if single and to is not None:
             result -= to.boxlen
@@ -203,61 +267,52 @@ class SequenceRenderer(Renderer):
 
         return result
 
-    def _find_condition_startend(self, children):
-        items = [(
-            self._moduleplans.index(i.caller),
-            self._moduleplans.index(i.callee))
-            for i in children if isinstance(i, ItemStartPlan)]
-
-        items = sorted(list(set(itertools.chain(*items))))
-        start, end = items[0], items[-1]
-        return self._moduleplans[start], self._moduleplans[end], start, end
+    def _finish(self, plan):
+        """Merges the module span of the ``plan`` into its parent, when all
+        of its children are planned.
+        """
+        parent = plan.parent
+        span = plan.span
+        if parent is None or span is None:
+            return
+
+        if parent.span is None:
+            parent.span = span
+        else:
+            parent.span = (
+                min(parent.span[0], span[0]),
+                max(parent.span[1], span[1])
+            )
 
-    def _plancondition(self, item, level):
-        last, start, end = None, None, None
+    def _plancondition(self, item, level, parent):
+        last, head, start, end = None, None, None, None
         if self._itemplans:
             last = self._itemplans[-1]
             if isinstance(last, ConditionEndPlan) and \
                     item.kind not in ('if', 'for', 'while'):
-                old = self._itemplans.pop()
-                start = old.startmodule
-                end = old.endmodule
-
-        condstart_plan = ConditionStartPlan(item, start, end, level)
+                # Continue the chain of the previous condition
+                self._itemplans.pop()
+                head = last.head
+                start = last.startmodule
+                end = last.endmodule
+
+        condstart_plan = ConditionStartPlan(item, start, end, level, head)
+        condstart_plan.parent = parent
         self._itemplans.append(condstart_plan)
 
         if len(item):
-            self._recurse(item, level + 1)
-
-        s = self._itemplans.index(condstart_plan) + 1
-        if len(self._itemplans) > s:
-            start, end, si, ei = \
-                self._find_condition_startend(self._itemplans[s:])
+            yield condstart_plan
 
-            for p in self._itemplans[s::-1]:
-                if p.level > level:
-                    continue
-
-                if p.startmodule is None:
-                    p.startmodule = start
-                else:
-                    mi = self._moduleplans.index(p.startmodule)
-                    if mi > si:
-                        p.startmodule = start
-                    elif mi < si:
-                        start = p.startmodule
-
-                if p.endmodule is None:
-                    p.endmodule = end
-                else:
-                    mi = self._moduleplans.index(p.endmodule)
-                    if mi < ei:
-                        p.endmodule = end
-                    elif mi > si:
-                        end = p.endmodule
+        if condstart_plan.span is not None:
+            # Widen the whole chain to the modules of the children.
+            si, ei = condstart_plan.span
+            if start is None or start.index > si:
+                start = self._moduleplans[si]
+                condstart_plan.startmodule = start
 
-                if p.kind in ('if', 'for', 'while'):
-                    break
+            if end is None or end.index < ei:
+                end = self._moduleplans[ei]
+                condstart_plan.endmodule = end
 
         elif isinstance(last, (ItemStartPlan, ItemEndPlan)):
             if start is None:
@@ -268,49 +323,85 @@ class SequenceRenderer(Renderer):
                 end = last.callee
                 condstart_plan.endmodule = end
 
-        if start is not None and condstart_plan.singlemodule:
-            start.rpad = max(
+        if self.compact:
+            if start is not None:
+                if condstart_plan.singlemodule:
+                    interval = start.index, start.index
+                else:
+                    interval = self._interval(start, end)
+
+                self._require(*interval, condstart_plan.textwidth + 4)
+
+        elif start is not None and condstart_plan.singlemodule:
+            self._pad(start, rpad=max(
                 start.rpad,
                 (condstart_plan.textwidth - start.boxlen) + 4
-            )
+            ))
         else:
             avail = self._availspacefor_condition(start, end)
             if condstart_plan.textwidth > avail:
                 amount = condstart_plan.textwidth - avail
                 if start:
-                    start.rpad += amount
+                    self._pad(start, rpad=start.rpad + amount)
 
                 if end:
-                    end.lpad += amount
+                    self._pad(end, lpad=end.lpad + amount)
 
-        condend_plan = ConditionEndPlan(item, start, end, level)
+        condend_plan = ConditionEndPlan(
+            item, start, end, level, condstart_plan.head)
         self._itemplans.append(condend_plan)
+        self._finish(condstart_plan)
 
-        condstart_plan.children = self._itemplans
-
-    def _plannote(self, item, level):
-        modules = item.modules
-        start = self._moduleplans_dict[modules[0]]
-        if len(modules) > 1:
-            end = self._moduleplans_dict[modules[1]]
+    def _plannote(self, item, level, parent):
+        moduleids = item.moduleids
+        start = self._moduleplans_byid[moduleids[0]]
+        if len(moduleids) > 1:
+            end = self._moduleplans_byid[moduleids[1]]
         else:
             end = None
 
         noteplan = NotePlan(item, start, end, level)
+        noteplan.parent = parent
         self._itemplans.append(noteplan)
 
+        if self.compact:
+            if end is None:
+                interval = start.index, start.index
+            else:
+                interval = self._interval(start, end)
+
+            self._require(*interval, noteplan.textwidth + 4)
+            return
+
         avail = self._availspacefor_note(start, end)
         if noteplan.textwidth > avail:
             amount = noteplan.textwidth - avail
             if start:
-                start.rpad += amount
+                self._pad(start, rpad=start.rpad + amount)
 
             if end:
-                end.lpad += amount
+                self._pad(end, lpad=end.lpad + amount)
 
     def _calculate_callpaddings(self, itemplan, callee, caller, dir_):
-        if itemplan.selfcall:
-            callee.rpad = max(callee.rpad, itemplan.textwidth + 3)
+        if self.compact:
+            # The text and the arrow of the calls are drawn between the
+            # middles of the modules, the canvas is extended to fit the
+            # self calls of the last module.
+            if not itemplan.selfcall:
+                if itemplan.textwidth:
+                    self._require_distance(
+                        *self._interval(caller, callee, reverse=dir_ == LEFT),
+                        itemplan.textwidth + 6
+                    )
+            elif callee.index < len(self._moduleplans) - 1:
+                self._require_distance(
+                    callee.index,
+                    callee.index + 1,
+                    itemplan.textwidth + 8
+                )
+
+        elif itemplan.selfcall:
+            self._pad(callee, rpad=max(callee.rpad, itemplan.textwidth + 3))
         else:
             avail = self._availspacefor_call(
                 caller, callee, reverse=dir_ == LEFT
@@ -318,23 +409,27 @@ class SequenceRenderer(Renderer):
             if itemplan.textwidth > avail:
                 amount = itemplan.textwidth - avail
                 if dir_ == LEFT:
-                    caller.lpad += amount
+                    self._pad(caller, lpad=caller.lpad + amount)
                 else:
-                    caller.rpad += amount
+                    self._pad(caller, rpad=caller.rpad + amount)
 
-    def _plancall(self, item, level):
-        caller = self._moduleplans_dict[item.caller]
-        callee = self._moduleplans_dict[item.callee]
-        diff = self._moduleplans.index(callee) - \
-            self._moduleplans.index(caller)
+    def _plancall(self, item, level, parent):
+        caller = self._moduleplans_byid[item.callerid]
+        callee = self._moduleplans_byid[item.calleeid]
+        diff = callee.index - caller.index
 
         dir_ = LEFT if diff < 0 else RIGHT
-        itemplan = ItemStartPlan(item, caller, callee, dir_, level)
-        self._itemplans.append(itemplan)
-        self._calculate_callpaddings(itemplan, callee, caller, dir_)
+        startplan = ItemStartPlan(item, caller, callee, dir_, level)
+        startplan.parent = parent
+        startplan.span = (
+            min(caller.index, callee.index),
+            max(caller.index, callee.index)
+        )
+        self._itemplans.append(startplan)
+        self._calculate_callpaddings(startplan, callee, caller, dir_)
 
         if len(item):
-            self._recurse(item, level + 1)
+            yield startplan
 
         itemplan = ItemEndPlan(item, caller, callee, not(dir_), level)
         self._itemplans.append(itemplan)
@@ -342,22 +437,50 @@ class SequenceRenderer(Renderer):
         if itemplan.text:
             self._calculate_callpaddings(itemplan, callee, caller, dir_)
 
-    def _recurse(self, parent, level):
-        for item in parent:
-            if isinstance(item, Call):
-                self._plancall(item, level)
-            elif isinstance(item, (Condition, Loop)):
-                self._plancondition(item, level)
-            elif isinstance(item, Note):
-                self._plannote(item, level)
+        self._finish(startplan)
 
     def _planitems(self):
+        """Plans the items in the document order, without recursion.
+
+        The :meth:`_plancall` and :meth:`_plancondition` are generators
+        which yield the plan of the item to plan its children and are
+        resumed after that, they are kept in the stack with the children.
+        The plans refer to their parents, so the module spans of the
+        children are merged into the parents once, when they are finished.
+        """
         self._itemplans = []
-        self._recurse(self.diagram, 0)
+        stack = [(iter(self.diagram), 0, None, None)]
+        while stack:
+            children, level, planner, parent = stack[-1]
+            for item in children:
+                break
+            else:
+                stack.pop()
+                if planner is not None:
+                    # Finish the parent.
+                    next(planner, None)
+
+                continue
+
+            if isinstance(item, Call):
+                planner = self._plancall(item, level, parent)
+            elif isinstance(item, (Condition, Loop)):
+                planner = self._plancondition(item, level, parent)
+            else:
+                if isinstance(item, Note):
+                    self._plannote(item, level, parent)
+
+                continue
+
+            for plan in planner:
+                stack.append((iter(plan.item), level + 1, planner, plan))
+                break
 
     def plan(self):
         self._planmodules()
         self._planitems()
+        if self.compact:
+            self._solve()
 
     # Sequence
     def _render_modules(self):
@@ -13,6 +13,9 @@ class ModulePlan(RenderingPlan):
     col = 0
     row = 0
 
+    #: The position of the module box, from left to right.
+    index = None
+
     def __init__(self, module, lpad=0, rpad=0):
         self.module = module
         self.lpad = lpad
@@ -60,6 +63,13 @@ class ItemPlan(RenderingPlan, metaclass=abc.ABCMeta):
     start = 0
     end = 0
 
+    #: The plan of the enclosing call or condition.
+    parent = None
+
+    #: The ``(min, max)`` indexes of the modules of the calls within the
+    #: item, including itself, ``None`` if there is not any.
+    span = None
+
     def __init__(self, item, direction, level):
         self.item = item
         self.level = level
@@ -174,15 +184,35 @@ class ItemEndPlan(ItemStartPlan):
 
 class ConditionStartPlan(ItemPlan):
     char = '*'
-    startmodule = None
-    endmodule = None
-    children = None
+    _startmodule = None
+    _endmodule = None
 
-    def __init__(self, item, startmodule, endmodule, level):
+    #: The first branch of the ``if``, ``elif`` and ``else`` chain which
+    #: keeps the modules of the whole chain.
+    head = None
+
+    def __init__(self, item, startmodule, endmodule, level, head=None):
         super().__init__(item, RIGHT, level)
+        self.head = self if head is None else head
         self.startmodule = startmodule
         self.endmodule = endmodule
 
+    @property
+    def startmodule(self):
+        return self.head._startmodule
+
+    @startmodule.setter
+    def startmodule(self, value):
+        self.head._startmodule = value
+
+    @property
+    def endmodule(self):
+        return self.head._endmodule
+
+    @endmodule.setter
+    def endmodule(self, value):
+        self.head._endmodule = value
+
     @property
     def singlemodule(self):
         return self.startmodule is self.endmodule
@@ -1,3 +1,5 @@
+import re
+import hashlib
 from io import StringIO
 
 from .lazyattr import LazyAttribute
@@ -8,47 +10,101 @@ from .token import NAME, NEWLINE, EVERYTHING, RARROW, COLON, AT, HASH, EOF, \
     DOT, DEDENT, INDENT, MULTILINE, TILDA
 
 
+# Plain call and note lines, see SequenceDiagram._fastline.
+FASTLINE_PATTERN = \
+    r'(?:(NAME) *-> *(NAME) *(?::(?! ?\|)([^\n]*))?' \
+    r'|@ *(NAME)(?: *~ *(NAME))? *:(?! ?\|)([^\n]*))' \
+    r' *(?:\n|\Z)'
+NAME_RE = re.compile(r'\w+')
+FASTLINE_RE = re.compile(FASTLINE_PATTERN.replace('NAME', r'\w+'))
+FASTLINE_BYTES_RE = re.compile(
+    FASTLINE_PATTERN.replace('NAME', r'[\w\x80-\xff]+').encode()
+)
+
+
 class Module:
-    title = None
-    type = 'module'
+    """A module of a sequence diagram.
 
-    def __init__(self, title):
-        self.title = title
+    The ``id`` is the number of the module in the
+    :attr:`SequenceDiagram.modules_byid` and the ``order`` is the position
+    of it in the :attr:`SequenceDiagram.modules_order`, ``None`` if it is
+    not there.
+    """
+    __slots__ = ('name', 'title', 'type', 'id', 'order')
 
+    #: The attributes which could be set by the ``module.attr: value``
+    #: statements.
+    attributes = ('title', 'type')
 
-class Item(Interpreter):
-    kind = None
-    args = None
-    text = None
-    multiline = None
+    def __init__(self, name, id=None):
+        self.name = name
+        self.title = name
+        self.type = 'module'
+        self.id = id
+        self.order = None
 
-    def __init__(self, *args, **kw):
-        super().__init__('start', *args, **kw)
 
-    def _complete(self, kind, *args, text=None, multiline=False):
-        self.kind = kind
-        self.args = args
-        self.text = text.strip() if text else None
-        self.multiline = multiline
+# The instance attributes of the items.
+ITEM_SLOTS = ('kind', 'args', 'text', 'multiline', '_digest')
 
-    def _finish_multiline(self, kind, *args):
-        return self._finish(kind, *args, multiline=True)
 
-    def _finish(self, kind, *args, **kw):
-        args = list(args)
-        nargs = []
-        while args:
-            a = args.pop(0)
-            if a == ':':
-                break
+def digest(fields, children=()):
+    """Returns the content hash of a node having the ``fields`` and the
+    ``children`` digests.
+    """
+    h = hashlib.sha256(repr(fields + (len(children), )).encode())
+    for child in children:
+        h.update(child)
 
-            nargs.append(a)
+    return h.digest()
 
-        if args:
-            text = args[0]
-        else:
-            text = None
-        return self._complete(kind, *nargs, text=text, **kw)
+
+def itemdigest(item):
+    """Computes the :attr:`Item.digest` of the ``item`` and its children
+    bottom-up, without recursion, and caches them.
+    """
+    digests = []
+    stack = [(item, None)]
+    while stack:
+        node, count = stack.pop()
+        if count is None:
+            try:
+                digests.append(node._digest)
+                continue
+            except AttributeError:
+                pass
+
+            children = list(node) if isinstance(node, Container) else []
+            stack.append((node, len(children)))
+            stack.extend((c, None) for c in reversed(children))
+            continue
+
+        children = ()
+        if count:
+            children = digests[-count:]
+            del digests[-count:]
+
+        node._digest = digest(node._fields(), children)
+        digests.append(node._digest)
+
+    return digests[0]
+
+
+class Item:
+    """Base class of the sequence diagram items.
+
+    The items are plain data, they are created by the
+    :class:`ItemInterpreter` and its subclasses when a statement is
+    complete, and keep no reference to the parser.
+    """
+    __slots__ = ()
+
+    def __init__(self, kind=None, *args, text=None, multiline=False):
+        super().__init__()
+        self.kind = kind
+        self.args = args
+        self.text = text.strip() if text else None
+        self.multiline = multiline
 
     @property
     def left(self):
@@ -61,42 +117,58 @@ class Item(Interpreter):
     def __repr__(self):
         return f'SequenceItem: {self.left}'
 
+    def dump(self, file, indent=''):
+        """Writes the item into the ``file``, each line is prefixed by the
+        ``indent``.
+        """
+        file.write(f'{indent}{self.left}')
+
+        right = self.right
+        if not right:
+            file.write('\n')
+        elif not self.multiline:
+            file.write(f': {right}\n')
+        else:
+            file.write(': |\n')
+            for line in right.splitlines():
+                file.write(f'{indent}  {line}\n')
+
     def dumps(self):
         f = StringIO()
-        f.write(self.left)
-
-        if self.right:
-            f.write(': ')
-            if self.multiline:
-                f.write('|\n')
-                for line in self.right.splitlines():
-                    f.write(f'  {line}\n')
-            else:
-                f.write(f'{self.right}')
+        self.dump(f)
+        if self._multilinetext:
+            return f.getvalue()
 
-        return f.getvalue()
+        return f.getvalue()[:-1]
 
-    statemap = {
-        'start': {
-            NAME: Goto(nextstate='name'),
-        },
-        'name': {
-            NAME: Goto(nextstate='name'),
-            TILDA: Goto(nextstate='name'),
-            NEWLINE: FinalConsume(_finish, alltokens=True),
-            COLON: Goto(nextstate=':'),
-        },
-        ':': {
-            MULTILINE: FinalConsume(_finish_multiline, alltokens=True),
-            EVERYTHING: {
-                NEWLINE: FinalConsume(_finish, alltokens=True)
-            }
-        },
-    }
+    @property
+    def _multilinetext(self):
+        return self.multiline and bool(self.right)
+
+    @property
+    def digest(self):
+        """The content hash of the item and its children, a ``bytes``.
+
+        The items having the same kind, modules, texts and children have
+        the same digest, in any process. The digest is computed on the
+        first access, bottom-up, and cached by each item, so the item and
+        its children must not be changed afterwards.
+        """
+        try:
+            return self._digest
+        except AttributeError:
+            return itemdigest(self)
+
+    def _fields(self):
+        return self.kind, self.args, self.text, self.multiline
 
 
 class Note(Item):
-    multiline = False
+    __slots__ = ITEM_SLOTS + ('moduleids', '_modules', '_left')
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.moduleids = None
 
     @LazyAttribute
     def modules(self):
@@ -117,92 +189,220 @@ class Note(Item):
 
         return result
 
-    def _finish(self, *args, **kw):
-        super()._finish('@', *args, **kw)
 
-    statemap = {
-        'start': {NAME: {
-            TILDA: {
-                COLON: Goto(nextstate=':'),
-                NAME: {
-                    COLON: Goto(nextstate=':'),
-                },
-            },
-            COLON: Goto(nextstate=':'),
-        }},
-        ':': {
-            MULTILINE: FinalConsume(Item._finish_multiline, alltokens=True),
-            EVERYTHING: {
-                NEWLINE: FinalConsume(_finish, alltokens=True)
-            }
-        },
-    }
+class ContainerItem(Item, Container):
+    __slots__ = ITEM_SLOTS
+
+    def dump(self, file, indent=''):
+        # Without recursion, for the deeply nested items.
+        stack = [(iter((self, )), indent)]
+        while stack:
+            items, indent = stack[-1]
+            for item in items:
+                break
+            else:
+                stack.pop()
+                continue
 
+            Item.dump(item, file, indent)
+            if not isinstance(item, Container) or not len(item):
+                continue
 
-class ContainerItem(Item, Container):
+            if item._multilinetext:
+                file.write(f'{indent}\n')
+
+            stack.append((iter(item), f'{indent}  '))
 
     def dumps(self):
         f = StringIO()
-        f.write(super().dumps())
-
-        if len(self):
-            f.write('\n')
-            for c in self:
-                for line in c.dumps().splitlines():
-                    f.write(f'  {line}\n')
-
+        self.dump(f)
         return f.getvalue().rstrip('\n')
 
 
 class Call(ContainerItem):
-    caller = None
-    callee = None
-    returntext = None
+    __slots__ = ('caller', 'callee', 'returntext', 'callerid', 'calleeid',
+                 '_left', '_right')
     returnsign = '=>'
 
+    def __init__(self, caller=None, callee=None, text=None):
+        self.caller = caller
+        self.callee = callee
+        self.callerid = None
+        self.calleeid = None
+        self.returntext = None
+        if text and self.returnsign in text:
+            text, returntext = text.rsplit(self.returnsign, 1)
+            self.returntext = returntext.strip()
+        super().__init__('call', text=text)
+
     @LazyAttribute
     def left(self):
         return f'{self.caller} -> {self.callee}'
 
+    def _fields(self):
+        return super()._fields() + (self.caller, self.callee, self.returntext)
+
     @LazyAttribute
     def right(self):
+        if not self.returntext:
+            return self.text or None
+
+        # Only the return, as in the ``foo -> bar: => baz``.
         if not self.text:
-            return
+            return f'{self.returnsign} {self.returntext}'
 
         f = StringIO()
         f.write(self.text)
-        if self.returntext:
-            f.write(f' {self.returnsign} {self.returntext}')
-
+        f.write(f' {self.returnsign} {self.returntext}')
         return f.getvalue()
 
-    def _complete(self, caller, callee, text=None):
-        self.caller = caller
-        self.callee = callee
-        if text and self.returnsign in text:
-            text, returntext = text.rsplit(self.returnsign, 1)
-            self.returntext = returntext.strip()
-        super()._complete('call', text=text)
+
+class Loop(ContainerItem):
+    __slots__ = ()
+
+    #: The keywords of the loops.
+    kinds = ('for', 'while', 'loop')
+
+
+class Condition(ContainerItem):
+    __slots__ = ()
+
+    #: The keywords of the conditions.
+    kinds = ('if', 'alt', 'elif', 'else')
+
+
+class ItemInterpreter(Interpreter):
+    """Parses a statement into a :attr:`nodetype` instance.
+
+    The interpreter is transient, it is dropped by the parent as soon as
+    the statement is complete and only the :attr:`node` is kept.
+    """
+    __slots__ = Interpreter._slots + ('node', )
+
+    def __init__(self, *args, **kw):
+        super().__init__('start', *args, **kw)
+        self.node = None
+
+    def _complete(self, *args, **kw):
+        self.node = self.nodetype(*args, **kw)
+
+    def _finish_multiline(self, kind, *args):
+        return self._finish(kind, *args, multiline=True)
+
+    def _finish(self, kind, *args, **kw):
+        args = list(args)
+        nargs = []
+        while args:
+            a = args.pop(0)
+            if a == ':':
+                break
+
+            nargs.append(a)
+
+        if args:
+            text = args[0]
+        else:
+            text = None
+        return self._complete(kind, *nargs, text=text, **kw)
+
+    statemap = {
+        'start': {
+            NAME: Goto(nextstate='name'),
+        },
+        'name': {
+            NAME: Goto(nextstate='name'),
+            TILDA: Goto(nextstate='name'),
+            NEWLINE: FinalConsume(_finish, alltokens=True),
+            COLON: Goto(nextstate=':'),
+        },
+        ':': {
+            MULTILINE: FinalConsume(_finish_multiline, alltokens=True),
+            EVERYTHING: {
+                NEWLINE: FinalConsume(_finish, alltokens=True)
+            }
+        },
+    }
+
+
+class NoteInterpreter(ItemInterpreter):
+    __slots__ = ()
+    nodetype = Note
+
+    def _finish(self, *args, **kw):
+        super()._finish('@', *args, **kw)
+
+    statemap = {
+        'start': {NAME: {
+            TILDA: {
+                COLON: Goto(nextstate=':'),
+                NAME: {
+                    COLON: Goto(nextstate=':'),
+                },
+            },
+            COLON: Goto(nextstate=':'),
+        }},
+        ':': {
+            MULTILINE: FinalConsume(
+                ItemInterpreter._finish_multiline,
+                alltokens=True
+            ),
+            EVERYTHING: {
+                NEWLINE: FinalConsume(_finish, alltokens=True)
+            }
+        },
+    }
+
+
+class CallInterpreter(ItemInterpreter):
+    __slots__ = ()
+    nodetype = Call
 
     statemap = {
         'start': {NAME: {RARROW: {NAME: Goto(nextstate='name -> name')}}},
         'name -> name': {
-            NEWLINE: FinalConsume(_complete),
-            EOF: FinalConsume(_complete),
+            NEWLINE: FinalConsume(ItemInterpreter._complete),
+            EOF: FinalConsume(ItemInterpreter._complete),
             COLON: Goto(nextstate=':'),
         },
         ':': {EVERYTHING: {
-            NEWLINE: FinalConsume(_complete)
+            NEWLINE: FinalConsume(ItemInterpreter._complete)
         }}
     }
 
 
-class Loop(ContainerItem):
-    pass
+class LoopInterpreter(ItemInterpreter):
+    __slots__ = ()
+    nodetype = Loop
 
 
-class Condition(ContainerItem):
-    pass
+class ConditionInterpreter(ItemInterpreter):
+    __slots__ = ()
+    nodetype = Condition
+
+
+def multiline(text):
+    """Returns ``True`` if the ``text`` has more than one line."""
+    return bool(text) and '\n' in text.strip()
+
+
+class Block:
+    """A context manager to add the items into the :attr:`item`, returned
+    by the builder methods of the :class:`SequenceDiagram`.
+
+    The ``as`` target is the :attr:`item`.
+    """
+    __slots__ = ('diagram', 'item')
+
+    def __init__(self, diagram, item):
+        self.diagram = diagram
+        self.item = item
+
+    def __enter__(self):
+        self.diagram._callstack.append(self.item)
+        return self.item
+
+    def __exit__(self, *exc):
+        self.diagram._callstack.pop()
 
 
 class SequenceDiagram(Interpreter, Container):
@@ -211,34 +411,57 @@ class SequenceDiagram(Interpreter, Container):
     The :class:`adia.diagram` class creates an instance of this class for
     each sequence diagram section.
 
+    The modules are registered by the name into the :attr:`modules` and
+    numbered in the order of the first mention, see the
+    :attr:`modules_byid`, the :attr:`modules_order` holds the names of the
+    modules which are shown as a box in that order. The items keep the ids
+    of their modules, and the module names and the texts of the calls are
+    interned.
     """
     title = 'Untitled Sequence Diagram'
     description = None
     tags = None
+    recoverstate = 'start'
 
     def __init__(self, *args, **kwargs):
         super().__init__('title', *args, **kwargs)
         self.modules = {}
         self.modules_order = []
+        self.modules_byid = []
+        self._strings = {}
         self._callstack = []
 
+        # Index of the top level item in which each module is mentioned for
+        # the first time, and the number of attribute statements. Used by
+        # the Diagram.apply_edit.
+        self._firstseen = {}
+        self._firstvisible = {}
+        self._attrs = 0
+
     def __repr__(self):
         return f'SequenceDiagram: {self.title}'
 
     def dumps(self):
         f = StringIO()
-        f.write('sequence:')
+        self.dump(f)
+        return f.getvalue()
+
+    def dump(self, file):
+        """Writes the ``ADia`` source code of the sequence diagram into the
+        ``file``, see :meth:`dumps`.
+        """
+        file.write('sequence:')
 
         if self.title:
-            f.write(f' {self.title}')
+            file.write(f' {self.title}')
 
-        f.write('\n')
+        file.write('\n')
 
         if self.description:
-            f.write(f'description: {self.description}\n')
+            file.write(f'description: {self.description}\n')
 
         if self.tags:
-            f.write(f'tags: {self.tags}\n')
+            file.write(f'tags: {self.tags}\n')
 
         modattrs = []
         for k, v in sorted(self.modules.items()):
@@ -249,23 +472,244 @@ class SequenceDiagram(Interpreter, Container):
                 modattrs.append((k, 'type', v.type))
 
         if modattrs:
-            f.write('\n# Modules\n')
+            file.write('\n# Modules\n')
             for m, a, v in modattrs:
-                f.write(f'{m}.{a}: {v}\n')
+                file.write(f'{m}.{a}: {v}\n')
 
         if len(self):
-            f.write('\n')
+            file.write('\n')
             for c in self:
-                f.write(f'{c.dumps()}\n')
+                c.dump(file)
 
-        return f.getvalue()
+                # The top level multiline notes are followed by an empty
+                # line.
+                if not isinstance(c, Container) and c._multilinetext:
+                    file.write('\n')
+
+    @property
+    def digest(self):
+        """The content hash of the sequence diagram, a ``bytes``.
+
+        The sequence diagrams having the same :meth:`dumps` have the same
+        digest. It's computed using the cached :attr:`Item.digest` of the
+        items, so it costs as much as the number of the top level items
+        after the first access.
+        """
+        modattrs = tuple(sorted(
+            (m.name, m.title, m.type) for m in self.modules.values()
+            if m.title != m.name or m.type != 'module'
+        ))
+        return digest(
+            (self.title, self.description, self.tags, modattrs),
+            [item.digest for item in self]
+        )
+
+    def module(self, name, title=None, type=None):
+        """Adds a module or updates the attributes of it, like the
+        ``name.title: ...`` and ``name.type: ...`` statements.
+
+        :param name: The module name.
+        :param title: The title of the module, if given.
+        :param type: The type of the module, if given.
+        :raises ValueError: If the name is invalid or an attribute is empty,
+                            has more than one line or starts with a ``|``.
+        :return: The module.
+        :rtype: Module
+        """
+        self._checkname(name)
+        for attr, value in (('title', title), ('type', type)):
+            if value is not None and not value.strip():
+                raise ValueError(f'Invalid module {attr}: {value!r}.')
+
+            self._checktext(value, f'module {attr}', multiline=False)
+        module = self._ensuremodule(name)
+        if title is not None:
+            module.title = title.strip()
+
+        if type is not None:
+            module.type = type.strip()
+
+        return module
+
+    def call(self, caller, callee, text=None, returns=None):
+        """Adds a call, like the ``caller -> callee: text => returns``
+        statement, into the current item without parsing it.
+
+        The returned :class:`Block` is a context manager, the items which
+        are added inside the ``with`` block are the children of the call.
+
+        .. code-block:: python
+
+           diagram = Diagram()
+           sequence = diagram.sequence('Foo')
+           with sequence.call('foo', 'bar', 'init()', returns='ok'):
+               sequence.call('bar', 'baz')
+               sequence.note('baz', text='Done')
+
+        :param caller: The caller module name.
+        :param callee: The callee module name.
+        :param text: The text of the call.
+        :param returns: The text of the return.
+        :raises ValueError: If a module name is invalid or a text has more
+                            than one line or starts with a ``|``.
+        :return: A context manager to add the children of the call.
+        :rtype: Block
+        """
+        self._checkname(caller)
+        self._checkname(callee)
+        if returns is not None:
+            text = f'{text or ""} {Call.returnsign} {returns}'
+
+        self._checktext(text, 'call text', multiline=False)
+
+        self._new_call(Call(caller, callee, text))
+        return Block(self, self._lastitem())
+
+    def note(self, *modules, text=None):
+        """Adds a note, like the ``@foo: text`` or ``@foo ~ bar: text``
+        statements, into the current item without parsing it.
+
+        A text having more than one line is a multiline note.
+
+        :param modules: One or two module names.
+        :param text: The text of the note, required.
+        :raises ValueError: If the module names are invalid or the text is
+                            empty or a single line starting with a ``|``.
+        :return: The note.
+        :rtype: Note
+        """
+        if len(modules) not in (1, 2):
+            raise ValueError(f'Invalid note modules: {modules!r}.')
+
+        if not text or not text.strip():
+            raise ValueError(f'Invalid note text: {text!r}.')
+
+        self._checktext(text, 'note text')
+
+        args = []
+        for m in modules:
+            if args:
+                args.append('~')
+
+            args.append(self._checkname(m))
+
+        note = Note('@', *args, text=text, multiline=multiline(text))
+        self._new_note(note)
+        return self._lastitem()
+
+    def loop(self, text=None, kind='for'):
+        """Adds a loop, like the ``for: text`` statement, into the current
+        item without parsing it, see :meth:`call`.
+
+        :param text: The text of the loop.
+        :param kind: One of the :attr:`Loop.kinds`.
+        :raises ValueError: If the kind is invalid or the text is a single
+                            line starting with a ``|``.
+        :return: A context manager to add the children of the loop.
+        :rtype: Block
+        """
+        return self._block(Loop, kind, text)
+
+    def condition(self, text=None, kind='if'):
+        """Adds a condition, like the ``if: text`` or ``else:`` statements,
+        into the current item without parsing it, see :meth:`call`.
+
+        :param text: The text of the condition.
+        :param kind: One of the :attr:`Condition.kinds`.
+        :raises ValueError: If the kind is invalid or the text is a single
+                            line starting with a ``|``.
+        :return: A context manager to add the children of the condition.
+        :rtype: Block
+        """
+        return self._block(Condition, kind, text)
+
+    def _block(self, type_, kind, text):
+        if kind not in type_.kinds:
+            raise ValueError(f'Invalid {type_.__name__.lower()}: {kind!r}.')
+
+        self._checktext(text, f'{type_.__name__.lower()} text')
+
+        item = type_(kind, text=text, multiline=multiline(text))
+        if type_ is Loop:
+            self._new_loop(item)
+        else:
+            self._new_condition(item)
+
+        return Block(self, self._lastitem())
+
+    def _checkname(self, name):
+        if not isinstance(name, str) or not NAME_RE.fullmatch(name) or \
+                name in self._keywords:
+            raise ValueError(f'Invalid module name: {name!r}.')
+
+        return name
+
+    def _checktext(self, text, what, multiline=True):
+        """Raises :exc:`ValueError` if the ``text`` would be dumped as
+        something else, a single line starting with a ``|`` is read as a
+        multiline text, and more than one line if not ``multiline``.
+        """
+        if text is None:
+            return
+
+        if '\n' in text:
+            if multiline:
+                return
+        elif not text.lstrip().startswith('|'):
+            return
+
+        raise ValueError(f'Invalid {what}: {text!r}.')
+
+    def _lastitem(self):
+        """Returns the last item which is added to the current item."""
+        return self.current[-1]
+
+    def checkpoint(self):
+        return super().checkpoint() + (tuple(self._callstack), )
+
+    def restore(self, checkpoint):
+        super().restore(checkpoint[:-1])
+        self._callstack = list(checkpoint[-1])
+
+    def _intern(self, string):
+        if string is None:
+            return None
+
+        return self._strings.setdefault(string, string)
 
     def _ensuremodule(self, name, visible=False):
-        if name not in self.modules:
-            self.modules[name] = Module(name)
+        module = self.modules.get(name)
+        if module is None:
+            name = self._intern(name)
+            module = Module(name, len(self.modules_byid))
+            self.modules[name] = module
+            self.modules_byid.append(module)
+            self._firstseen[name] = len(self) - bool(self._callstack)
+
+        if visible and module.order is None:
+            module.order = len(self.modules_order)
+            self.modules_order.append(module.name)
+            self._firstvisible[module.name] = \
+                len(self) - bool(self._callstack)
+
+        return module
+
+    def _bind(self, items):
+        """Updates the module ids of the items and their children, which are
+        parsed by another sequence diagram having the same modules.
+        """
+        modules = self.modules
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Call):
+                item.callerid = modules[item.caller].id
+                item.calleeid = modules[item.callee].id
+            elif isinstance(item, Note):
+                item.moduleids = tuple(modules[m].id for m in item.modules)
+                continue
 
-        if visible and name not in self.modules_order:
-            self.modules_order.append(name)
+            stack.extend(item)
 
     @property
     def current(self):
@@ -275,22 +719,30 @@ class SequenceDiagram(Interpreter, Container):
         return self
 
     def _indent(self):
-        if len(self.current):
-            self._callstack.append(self.current[-1])
+        # The current item may be a note after an error while recovering.
+        current = self.current
+        if isinstance(current, Container) and len(current):
+            self._callstack.append(current[-1])
 
     def _dedent(self):
         if self._callstack:
             self._callstack.pop()
 
     def _new_call(self, call):
-        self._ensuremodule(call.caller, visible=True)
-        self._ensuremodule(call.callee, visible=True)
+        caller = self._ensuremodule(call.caller, visible=True)
+        callee = self._ensuremodule(call.callee, visible=True)
+        call.caller = caller.name
+        call.callee = callee.name
+        call.callerid = caller.id
+        call.calleeid = callee.id
+        call.text = self._intern(call.text)
+        call.returntext = self._intern(call.returntext)
         self.current.append(call)
 
     def _new_note(self, note):
-        for m in note.modules:
-            self._ensuremodule(m, visible=False)
-
+        note.moduleids = tuple(
+            self._ensuremodule(m, visible=False).id for m in note.modules
+        )
         self.current.append(note)
 
     def _new_loop(self, loop):
@@ -301,6 +753,7 @@ class SequenceDiagram(Interpreter, Container):
 
     def _attr(self, attr, value):
         value = value.strip()
+        self._attrs += 1
 
         if attr == 'description':
             self.description = value
@@ -309,27 +762,81 @@ class SequenceDiagram(Interpreter, Container):
         else:
             raise AttributeError(attr)
 
+    def _fastline(self, source, offset):
+        """Parses the plain call and note statements directly.
+
+        Returns the offset of the next line if the line at ``offset`` is
+        parsed, otherwise ``None`` to let it go through the tokenizer and
+        the state machine, which is also responsible to report the errors.
+        """
+        state = self.state
+        if self.tokenstack or not (state == self._stateids['start']
+                                   or state == self._stateids['indent']):
+            return None
+
+        # Let the state machine to report the error.
+        if not isinstance(self.current, Container):
+            return None
+
+        if isinstance(source, str):
+            match = FASTLINE_RE.match(source, offset)
+            if match is None:
+                return None
+
+            caller, callee, text, module, other, notetext = match.groups()
+        else:
+            match = FASTLINE_BYTES_RE.match(source, offset)
+            if match is None:
+                return None
+
+            caller, callee, text, module, other, notetext = (
+                None if g is None else str(g, 'utf-8')
+                for g in match.groups()
+            )
+
+        if caller is not None:
+            if caller in self._keywords:
+                return None
+
+            self._new_call(Call(caller, callee, text))
+
+        else:
+            if other is None:
+                note = Note('@', module, text=notetext)
+            else:
+                note = Note('@', module, '~', other, text=notetext)
+
+            self._new_note(note)
+
+        self.state = self._stateids['start']
+        return match.end()
+
     def _set_title(self, value):
         self.title = value.strip()
 
     def _module_attr(self, module, attr, value):
-        if not hasattr(Module, attr):
+        if attr not in Module.attributes:
             raise AttributeError(module, attr)
 
         self._ensuremodule(module)
+        self._attrs += 1
         setattr(self.modules[module], attr, value.strip())
 
     _keywords = {
         'sequence': Final(nextstate='sequence'),
         'state': Final(nextstate='start'),
         'class': Final(nextstate='start'),
-        'for': New(Loop, callback=_new_loop, nextstate='start'),
-        'while': New(Loop, callback=_new_loop, nextstate='start'),
-        'loop': New(Loop, callback=_new_loop, nextstate='start'),
-        'if': New(Condition, callback=_new_condition, nextstate='start'),
-        'alt': New(Condition, callback=_new_condition, nextstate='start'),
-        'elif': New(Condition, callback=_new_condition, nextstate='start'),
-        'else': New(Condition, callback=_new_condition, nextstate='start'),
+        'for': New(LoopInterpreter, callback=_new_loop, nextstate='start'),
+        'while': New(LoopInterpreter, callback=_new_loop, nextstate='start'),
+        'loop': New(LoopInterpreter, callback=_new_loop, nextstate='start'),
+        'if': New(ConditionInterpreter, callback=_new_condition,
+                  nextstate='start'),
+        'alt': New(ConditionInterpreter, callback=_new_condition,
+                   nextstate='start'),
+        'elif': New(ConditionInterpreter, callback=_new_condition,
+                    nextstate='start'),
+        'else': New(ConditionInterpreter, callback=_new_condition,
+                    nextstate='start'),
     }
 
     statemap = {
@@ -355,12 +862,14 @@ class SequenceDiagram(Interpreter, Container):
             INDENT: Ignore(callback=_indent, nextstate='indent'),
         },
         'name': {
-            RARROW: New(Call, callback=_new_call, nextstate='start'),
+            RARROW: New(CallInterpreter, callback=_new_call,
+                        nextstate='start'),
             COLON: Goto(nextstate='attr:'),
             DOT: {NAME: {COLON: Goto(nextstate='mod.attr:')}},
         },
         '  name': {
-            RARROW: New(Call, callback=_new_call, nextstate='start')
+            RARROW: New(CallInterpreter, callback=_new_call,
+                        nextstate='start')
         },
         'attr:': {
             EVERYTHING: {NEWLINE: Consume(_attr, nextstate='start')}
@@ -369,6 +878,6 @@ class SequenceDiagram(Interpreter, Container):
             EVERYTHING: {NEWLINE: Consume(_module_attr, nextstate='start')}
         },
         '@': {
-            NAME: New(Note, callback=_new_note, nextstate='start'),
+            NAME: New(NoteInterpreter, callback=_new_note, nextstate='start'),
         }
     }
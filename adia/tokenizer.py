@@ -1,7 +1,8 @@
 import re
+import functools
 
 from .token import Token, EXACT_TOKENS, NEWLINE, PIPE, NAME, MULTILINE, \
-    EVERYTHING, DEDENT, INDENT, EOF
+    EVERYTHING, DEDENT, INDENT, EOF, BACKSLASH, EXACT_TOKENS_DICT
 
 
 # Regex patterns
@@ -15,6 +16,41 @@ ALLTOKENS_RE = re.compile('(' + '|'.join(ALLTOKENS_RE) + ')')
 TOKENS_DICT = {t: n for t, n in EXACT_TOKENS}
 EMPTYLINE = re.compile(r'^([\t ]*)\n$')
 
+# Skips the python level Token.__new__ for the hot paths.
+newtoken = functools.partial(tuple.__new__, Token)
+LEADINGSPACES = re.compile(WHITESPACE_RE)
+
+# Whole buffer scanner, see Tokenizer._scan. The capturing group index of
+# each alternative is used to find out what is matched.
+SCANNER_EMPTYLINE = 1
+SCANNER_EVERYTHING = 2
+SCANNER_EXACT = 3
+SCANNER_WHITESPACE = 4
+SCANNER_NAME = 5
+SCANNER_NEWLINE = 6
+SCANNER_PATTERN = \
+    r'(^[\t ]*\n|^[\t ]+\Z)|' \
+    r'([:#](?! ?\|)[^\n]*)|' \
+    r'(' + '|'.join(re.escape(i[0]) for i in EXACT_TOKENS) + ')|' \
+    r'(' + WHITESPACE_RE + ')|' \
+    r'(' + NAME_RE + ')|' \
+    r'(\n|\Z)'
+SCANNER_RE = re.compile(SCANNER_PATTERN, re.M)
+LINEEND_RE = re.compile(NEWLINE_RE)
+
+# The same for the UTF-8 encoded buffers: bytes, bytearray, memoryview and
+# mmap. The bytes above 0x7f are parts of the multibyte characters which
+# are considered to be a part of names. Indexing these buffers gives an
+# integer so single character tokens are also keyed by their code.
+SCANNER_BYTES_RE = re.compile(
+    SCANNER_PATTERN.replace(NAME_RE, r'[\w\x80-\xff]+').encode(),
+    re.M
+)
+LINEEND_BYTES_RE = re.compile(NEWLINE_RE.encode())
+LEADINGSPACES_BYTES = re.compile(WHITESPACE_RE.encode())
+TOKENS_BYTES_DICT = {t.encode(): n for t, n in EXACT_TOKENS}
+TOKENS_BYTES_DICT.update({ord(t): n for t, n in EXACT_TOKENS if len(t) == 1})
+
 
 class Tokenizer:
     def __init__(self):
@@ -33,6 +69,45 @@ class Tokenizer:
         self._multiline_lastlen = 0
         self._multiline_token = None
 
+    def checkpoint(self):
+        """Returns the current state of the tokenizer.
+
+        The returned value may be passed to the :meth:`restore` to continue
+        tokenizing from the same point later, for example from the beginning
+        of a line. While the :meth:`tokenize` is running, the state is
+        updated at the beginning of each line.
+        """
+        return (
+            self.lineno,
+            self.coloffset,
+            self.indentsize,
+            self.indent,
+            self.escape,
+            self.newline,
+            self._multiline,
+            tuple(self._multiline_matching),
+            self._multiline_indent,
+            self._multiline_lastlen,
+            self._multiline_token,
+        )
+
+    def restore(self, checkpoint):
+        """Restores the state taken by the :meth:`checkpoint`."""
+        (
+            self.lineno,
+            self.coloffset,
+            self.indentsize,
+            self.indent,
+            self.escape,
+            self.newline,
+            self._multiline,
+            matching,
+            self._multiline_indent,
+            self._multiline_lastlen,
+            self._multiline_token,
+        ) = checkpoint
+        self._multiline_matching[:] = matching
+
     def _token(self, type_, string, start, end, line):
         return Token(
             type_,
@@ -204,3 +279,385 @@ class Tokenizer:
                 while self._multiline_matching:
                     yield self._multiline_matching.pop(0)
                 yield token
+
+    def _sourceline(self, source, start):
+        if start >= len(source):
+            return ''
+
+        end = source.find('\n', start)
+        if end < 0:
+            return source[start:] + '\n'
+
+        return source[start:end + 1]
+
+    def _multilineblock(self, source, start, lineno):
+        if isinstance(source, str):
+            leadingspaces, lineend = LEADINGSPACES, LINEEND_RE
+        else:
+            leadingspaces, lineend = LEADINGSPACES_BYTES, LINEEND_BYTES_RE
+
+        m = leadingspaces.match(source, start)
+        if not m:
+            return None, start, lineno
+
+        length = len(source)
+        indent = m.end() - start
+        token = (MULTILINE, m.end(), 0, lineno, start)
+        while True:
+            end = lineend.search(source, start)
+            end = end.start() if end else length
+
+            lineno += 1
+            start = min(end + 1, length)
+            if start == length:
+                break
+
+            m = leadingspaces.match(source, start)
+            if not m or (m.end() - start) < indent:
+                break
+
+        return token[:2] + (end, ) + token[3:], start, lineno
+
+    def _scan(self, source, fastline=None, offset=0):
+        """Scan the whole ``source`` buffer and yield the token spans.
+
+        Each span is a ``(type, start, end, lineno, linestart)`` tuple of
+        integers, the ``start`` and ``end`` are offsets into the ``source``
+        and the ``linestart`` is the offset of the line containing the
+        ``start``.
+
+        The ``source`` may be a ``str`` or an UTF-8 encoded bytes-like
+        object, the offsets are in bytes for the later.
+
+        The optional ``fastline(source, offset)`` is called with the offset
+        of the first non-whitespace character of each line, after yielding
+        the indentation tokens of the line. It may return the offset of the
+        next line to skip the current line, or ``None`` to tokenize it.
+
+        The scan starts at the ``offset``, which must be the beginning of a
+        line.
+        """
+        if isinstance(source, str):
+            scanner, tokens = SCANNER_RE, TOKENS_DICT
+        else:
+            scanner, tokens = SCANNER_BYTES_RE, TOKENS_BYTES_DICT
+
+        pending = self._multiline_matching
+        lineno = self.lineno + 1
+        indent = self.indent
+        indentsize = self.indentsize
+        coloffset = self.coloffset
+        escape = self.escape
+        newline = self.newline
+        linestart = offset
+        pos = offset
+
+        try:
+            while True:
+                restart = False
+                for m in scanner.finditer(source, pos):
+                    kind = m.lastindex
+                    start, end = m.span()
+
+                    if kind == SCANNER_EXACT:
+                        type_ = tokens[m.group()]
+                    elif kind == SCANNER_NAME:
+                        type_ = NAME
+                    elif kind == SCANNER_WHITESPACE:
+                        type_ = None
+                    elif kind == SCANNER_EVERYTHING:
+                        type_ = tokens[source[start]]
+                    elif kind == SCANNER_EMPTYLINE:
+                        type_ = NEWLINE
+                    elif start == end == linestart:
+                        # An empty match means the end of the buffer.
+                        break
+                    else:
+                        # The last line may be left without the trailing
+                        # newline.
+                        type_ = NEWLINE
+
+                    if type_ == BACKSLASH:  # Escape
+                        if escape:
+                            escape = False
+                        else:
+                            escape = True
+                            continue
+
+                    elif escape:
+                        escape = False
+                        if type_ != NEWLINE:
+                            if kind == SCANNER_EVERYTHING:
+                                end = start + 1
+
+                            if pending:
+                                yield from pending
+                                pending.clear()
+
+                            yield NAME, start, end, lineno, linestart
+
+                            if kind == SCANNER_EVERYTHING:
+                                pos = end
+                                restart = True
+                                break
+
+                            continue
+
+                        type_ = None
+
+                    elif newline and (start == linestart):  # Beginning of line
+                        lineindent = 0
+                        if kind == SCANNER_WHITESPACE:
+                            # Indentation
+                            wslen = end - start
+                            if coloffset < 0:
+                                coloffset = wslen
+
+                            elif not indentsize:
+                                indentsize = wslen - coloffset
+
+                            if indentsize and (wslen > coloffset):
+                                lineindent = (wslen - coloffset) // indentsize
+
+                        elif type_ != NEWLINE and coloffset < 0:
+                            coloffset = 0
+
+                        if pending and lineindent != indent:
+                            yield from pending
+                            pending.clear()
+
+                        if lineindent > indent:
+                            for i in range(indent, lineindent):
+                                indent += 1
+                                s = linestart + coloffset + (indentsize * i)
+                                yield INDENT, s, s + indentsize, lineno, \
+                                    linestart
+
+                        elif lineindent < indent:
+                            c = linestart + lineindent * indentsize + \
+                                coloffset
+                            for i in range(indent - lineindent):
+                                indent -= 1
+                                yield DEDENT, c, c, lineno, linestart
+
+                        if fastline is not None and not pending and \
+                                type_ != NEWLINE:
+                            # Let the consumer to parse the line directly.
+                            fastend = fastline(
+                                source,
+                                end if kind == SCANNER_WHITESPACE else start
+                            )
+                            if fastend is not None:
+                                lineno += 1
+                                linestart = pos = fastend
+                                self.lineno = lineno - 1
+                                self.indent = indent
+                                self.indentsize = indentsize
+                                self.coloffset = coloffset
+                                restart = True
+                                break
+
+                    if kind == SCANNER_WHITESPACE:
+                        # Ignore for the now.
+                        continue
+
+                    if kind == SCANNER_NEWLINE or kind == SCANNER_EMPTYLINE:
+                        if type_ is not None:  # Not escaped
+                            newline = True
+                            token = NEWLINE, start, start + 1, lineno, \
+                                linestart
+
+                            if len(pending) == 1:
+                                pending.append(token)
+                            else:
+                                if pending:
+                                    yield from pending
+                                    pending.clear()
+
+                                yield token
+
+                        lineno += 1
+                        linestart = end
+
+                        # Expose the state at the beginning of each line,
+                        # see checkpoint().
+                        self.lineno = lineno - 1
+                        self.indent = indent
+                        self.indentsize = indentsize
+                        self.coloffset = coloffset
+                        self.escape = escape
+                        self.newline = newline
+
+                        if len(pending) < 2 or pending[1][0] != NEWLINE:
+                            continue
+
+                        # Multiline
+                        token, linestart, lineno = \
+                            self._multilineblock(source, linestart, lineno)
+
+                        if token is None:
+                            continue
+
+                        pending.clear()
+                        yield token
+                        self.lineno = lineno - 1
+                        pos = linestart
+                        restart = True
+                        break
+
+                    newline = False
+                    if type_ == PIPE:
+                        pending.append((PIPE, start, end, lineno, linestart))
+                        continue
+
+                    if pending:
+                        yield from pending
+                        pending.clear()
+
+                    if kind != SCANNER_EVERYTHING:
+                        yield type_, start, end, lineno, linestart
+                        continue
+
+                    yield type_, start, start + 1, lineno, linestart
+                    yield EVERYTHING, start + 1, end, lineno, linestart
+                    newline = True
+
+                if not restart:
+                    break
+
+            if pending:
+                yield from pending
+                pending.clear()
+
+            yield EOF, linestart, linestart, lineno, linestart
+
+        finally:
+            self.lineno = lineno
+            self.indent = indent
+            self.indentsize = indentsize
+            self.coloffset = coloffset
+            self.escape = escape
+            self.newline = newline
+
+    def _multilinestring(self, source, start, end):
+        indent = start - (source.rfind('\n', 0, start) + 1)
+        if source.find('\n', start, end) < 0:
+            return source[start:end]
+
+        return '\n'.join(
+            i[indent:] for i in source[start - indent:end].split('\n')
+        )
+
+    def tokenize(self, source, fastline=None, offset=0):
+        """Tokenize the whole ``source`` buffer in a single pass.
+
+        This is equivalent to feed the ``source`` line by line into the
+        :meth:`feedline`, but the buffer is scanned at once by a single
+        regular expression without splitting it into lines. The ``:`` and
+        ``#`` tails are matched as a whole and the multiline blocks are
+        sliced directly from the source.
+
+        The ``source`` may also be an UTF-8 encoded ``bytes``,
+        ``bytearray``, ``memoryview`` or ``mmap``, which is scanned in-place
+        and only the payloads of the names, texts and the source lines are
+        decoded. The columns are always counted in characters.
+
+        :param source: The ADia source code.
+        :type source: str or bytes-like
+        :param fastline: See the :meth:`_scan`.
+        :param offset: The offset of the line to start from, see the
+                       :meth:`_scan`.
+        """
+        if not isinstance(source, str):
+            yield from self._tokenizebuffer(source, fastline, offset)
+            return
+
+        sourceline = self._sourceline
+        lastlinestart = -1
+        line = None
+
+        for type_, start, end, lineno, linestart in \
+                self._scan(source, fastline, offset):
+            if linestart != lastlinestart:
+                lastlinestart = linestart
+                line = sourceline(source, linestart)
+
+            col = start - linestart
+            if type_ == NEWLINE:
+                yield newtoken((type_, '\n', (lineno, col), (lineno, col + 1),
+                                line))
+
+            elif type_ == MULTILINE:
+                endline = lineno + source.count('\n', start, end)
+                yield newtoken((
+                    type_,
+                    self._multilinestring(source, start, end),
+                    (lineno, col),
+                    (endline, end - (source.rfind('\n', 0, end) + 1)),
+                    line
+                ))
+
+            else:
+                yield newtoken((type_, source[start:end], (lineno, col),
+                                (lineno, end - linestart), line))
+
+    def _bufferline(self, source, start):
+        end = LINEEND_BYTES_RE.search(source, start)
+        end = end.end() if end else len(source)
+        line = str(source[start:end], 'utf-8')
+        ascii = len(line) == end - start
+        if not line.endswith('\n'):
+            line += '\n'
+
+        return line, ascii
+
+    def _tokenizebuffer(self, source, fastline, offset=0):
+        lastlinestart = -1
+        line = None
+        ascii = True
+
+        def column(offset):
+            if ascii:
+                return offset - linestart
+
+            return len(str(source[linestart:offset], 'utf-8'))
+
+        for type_, start, end, lineno, linestart in \
+                self._scan(source, fastline, offset):
+            if linestart != lastlinestart:
+                lastlinestart = linestart
+                if linestart < len(source):
+                    line, ascii = self._bufferline(source, linestart)
+                else:
+                    line, ascii = '', True
+
+            if type_ == INDENT or type_ == DEDENT or type_ == EOF:
+                # Computed from the indentation, not a real offset.
+                col = start - linestart
+                yield newtoken((type_, ' ' * (end - start), (lineno, col),
+                                (lineno, col + end - start), line))
+                continue
+
+            col = column(start)
+            if type_ == NEWLINE:
+                yield newtoken((type_, '\n', (lineno, col), (lineno, col + 1),
+                                line))
+
+            elif type_ == MULTILINE:
+                lines = str(source[linestart:end], 'utf-8').split('\n')
+                yield newtoken((
+                    type_,
+                    '\n'.join(i[col:] for i in lines),
+                    (lineno, col),
+                    (lineno + len(lines) - 1, len(lines[-1])),
+                    line
+                ))
+
+            elif type_ in EXACT_TOKENS_DICT:
+                yield newtoken((type_, EXACT_TOKENS_DICT[type_],
+                                (lineno, col), (lineno, col + end - start),
+                                line))
+
+            else:
+                yield newtoken((type_, str(source[start:end], 'utf-8'),
+                                (lineno, col), (lineno, column(end)), line))
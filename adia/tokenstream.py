@@ -0,0 +1,121 @@
+"""Compact, span based token stream."""
+from array import array
+
+from .token import Token, NEWLINE, DEDENT, EOF, MULTILINE
+from .tokenizer import Tokenizer
+
+
+# At least 32 bits unsigned integer.
+OFFSET_TYPECODE = 'I' if array('I').itemsize >= 4 else 'L'
+
+
+class TokenStream:
+    """Holds the tokens of an ``ADia`` source as parallel integer arrays.
+
+    Instead of a :class:`.Token` object per token, only the type, the start
+    and end offsets into the original ``source`` and the line number of each
+    token are stored. The string and the ``(line, col)`` positions of a token
+    are made only when asked by the :meth:`string`, :meth:`start`,
+    :meth:`end` or by materializing the token using the indexing or
+    iteration.
+
+    .. code-block:: python
+
+       tokens = TokenStream(source)
+       for token in tokens:
+           ...
+
+    :param source: The ADia source code.
+    :type source: str
+    :param tokenizer: The tokenizer to scan the source with, a new one will
+                      be created if not given.
+    """
+    _strings = {
+        NEWLINE: '\n',
+        DEDENT: '',
+        EOF: '',
+    }
+
+    def __init__(self, source, tokenizer=None):
+        self.source = source
+        self.tokenizer = tokenizer if tokenizer else Tokenizer()
+        self.types = array('B')
+        self.starts = array(OFFSET_TYPECODE)
+        self.ends = array(OFFSET_TYPECODE)
+        self.lines = array(OFFSET_TYPECODE)
+        self.linestarts = array(OFFSET_TYPECODE)
+        self._scan()
+
+    def _scan(self):
+        types = self.types.append
+        starts = self.starts.append
+        ends = self.ends.append
+        lines = self.lines.append
+        linestarts = self.linestarts
+        firstline = self.tokenizer.lineno + 1
+
+        for type_, start, end, lineno, linestart in \
+                self.tokenizer._scan(self.source):
+            types(type_)
+            starts(start)
+            ends(end)
+            lines(lineno)
+
+            while len(linestarts) <= lineno - firstline:
+                linestarts.append(linestart)
+
+        self._firstline = firstline
+
+    def __len__(self):
+        return len(self.types)
+
+    def __iter__(self):
+        for i in range(len(self.types)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.types)
+
+        return Token(
+            self.types[index],
+            self.string(index),
+            self.start(index),
+            self.end(index),
+            self.tokenizer._sourceline(self.source, self._linestart(index))
+        )
+
+    def _linestart(self, index):
+        return self.linestarts[self.lines[index] - self._firstline]
+
+    def string(self, index):
+        """Returns the string of the token at ``index``."""
+        type_ = self.types[index]
+        if type_ in self._strings:
+            return self._strings[type_]
+
+        start, end = self.starts[index], self.ends[index]
+        if type_ == MULTILINE:
+            return self.tokenizer._multilinestring(self.source, start, end)
+
+        return self.source[start:end]
+
+    def start(self, index):
+        """Returns the ``(line, col)`` of the token at ``index``."""
+        return self.lines[index], self.starts[index] - self._linestart(index)
+
+    def end(self, index):
+        """Returns the ``(line, col)`` of the end of the token at ``index``.
+        """
+        lineno = self.lines[index]
+        end = self.ends[index]
+
+        if self.types[index] == NEWLINE:
+            return lineno, self.starts[index] - self._linestart(index) + 1
+
+        if self.types[index] == MULTILINE:
+            start = self.starts[index]
+            lineno += self.source.count('\n', start, end)
+            return lineno, end - (self.source.rfind('\n', 0, end) + 1)
+
+        return lineno, end - self._linestart(index)
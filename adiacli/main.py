@@ -13,12 +13,31 @@ class ADia(Root):
     __arguments__ = [
         Argument('-V', '--version', action='store_true'),
         Argument('--no-rstrip', action='store_true'),
+        Argument(
+            '--compact',
+            action='store_true',
+            help='Place the modules as close as their items allow.'
+        ),
+        Argument(
+            '-e', '--all-errors',
+            action='store_true',
+            help='Report all the errors of each file instead of stopping at '
+                 'the first one, the files with errors are not rendered.'
+        ),
         Argument(
             '-C', '--change-directory',
             default='.',
             help='Change the current working directory before executing, '
                  'default: ".".'
         ),
+        Argument(
+            '--cache',
+            metavar='DIRECTORY',
+            default=os.environ.get('ADIA_CACHE_DIR'),
+            help='Keep the parsed diagrams in the given directory to skip '
+                 'parsing the unchanged files next time, default: the '
+                 'ADIA_CACHE_DIR environment variable.'
+        ),
         Argument(
             'file',
             nargs='*',
@@ -35,13 +54,35 @@ class ADia(Root):
             return
 
         outfile = sys.stdout
+        failed = False
 
         def render(infile):
-            adia.print(
-                infile,
-                outfile,
-                rstrip=False if args.no_rstrip is True else False
-            )
+            nonlocal failed
+
+            if not args.all_errors:
+                adia.print(
+                    infile,
+                    outfile,
+                    rstrip=False if args.no_rstrip is True else False,
+                    compact=args.compact
+                )
+                return
+
+            diagram = adia.Diagram(infile, recover=True)
+            for error in diagram.diagnostics:
+                print(error, file=sys.stderr)
+                failed = True
+
+            if not diagram.diagnostics:
+                diagram.render(
+                    outfile,
+                    rstrip=False if args.no_rstrip is True else False,
+                    compact=args.compact
+                )
+
+        if args.cache:
+            from adia import cache
+            cache.enable(args.cache)
 
         if args.change_directory != '.':
             os.chdir(args.change_directory)
@@ -54,10 +95,11 @@ class ADia(Root):
                     if index:
                         print(file=outfile)
 
-                    with open(filename) as f:
+                    # Binary mode, to be memory-mapped by the parser.
+                    with open(filename, 'rb') as f:
                         render(f)
 
-            return EXIT_SUCCESS
+            return EXIT_FAILURE if failed else EXIT_SUCCESS
         except adia.InterpreterError as ex:
             print(ex, file=sys.stderr)
             return EXIT_FAILURE
@@ -0,0 +1,33 @@
+"""Binary format benchmarks.
+
+Usage::
+
+   python benchmarks/binary.py [STATEMENTS]
+
+"""
+import sys
+import pickle
+
+from adia import Diagram
+
+from parse import generate, measure
+
+
+def main(statements=100000):
+    source = generate(statements)
+    diagram = Diagram(source)
+    data = diagram.to_bytes()
+    pickled = pickle.dumps(diagram, pickle.HIGHEST_PROTOCOL)
+    print(f'{statements} statements, source: {len(source)} bytes, '
+          f'binary: {len(data)} bytes, pickle: {len(pickled)} bytes')
+
+    measure('parse', lambda: Diagram(source))
+    measure('to_bytes', diagram.to_bytes)
+    measure('from_bytes', lambda: Diagram.from_bytes(data))
+    measure('pickle.dumps',
+            lambda: pickle.dumps(diagram, pickle.HIGHEST_PROTOCOL))
+    measure('pickle.loads', lambda: pickle.loads(pickled))
+
+
+if __name__ == '__main__':
+    main(*(int(i) for i in sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""Memory benchmarks.
+
+Usage::
+
+   python benchmarks/memory.py [--baseline REVISION] [CALLS]
+
+With ``--baseline``, the same diagram is also parsed by the ``adia``
+package of the git ``REVISION`` in a subprocess, see
+``benchmarks/parse.py``, to report the bytes per item before and after,
+for example before the nodes declared ``__slots__``::
+
+   python benchmarks/memory.py --baseline 21e8052^
+
+"""
+import sys
+import tracemalloc
+
+from adia import Diagram
+
+from parse import baseline
+
+
+def generate(calls):
+    """Generates a sequence diagram with flat, plain calls and notes."""
+    lines = ['sequence: Benchmark']
+    for i in range(calls):
+        lines.append(f'foo{i % 10} -> bar{i % 7}: call{i % 100}(x) => y')
+        if i % 10 == 0:
+            lines.append(f'@foo{i % 10}: Note {i % 100}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def trace(source, items, factory=Diagram):
+    """Returns the traced memory per item of the parsed ``source``."""
+    tracemalloc.start()
+    diagram = factory(source)
+
+    # Touch the lazy attributes as the renderer does.
+    for item in diagram[0]:
+        item.left
+        item.right
+
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / items
+
+
+def report(title, size):
+    print(f'{title:<32} {size:10.1f} bytes per item')
+
+
+def main(calls=100000, revision=None):
+    # Not imported at the top, the older revisions measured by the
+    # --baseline run this module too.
+    from adia.columnar import ColumnarDiagram
+
+    source = generate(calls)
+    items = calls + calls // 10
+    print(f'{calls} calls, {items} items')
+    after = trace(source, items)
+    if revision is not None:
+        before = float(baseline(revision, __file__, '--trace', str(calls)))
+        report(f'parse ({revision})', before)
+        report('parse', after)
+        print(f'{"saved":<32} {1 - after / before:10.1%}')
+    else:
+        report('parse', after)
+
+    report('parse (columnar)', trace(source, items, ColumnarDiagram))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args[:1] == ['--trace']:
+        # The baseline subprocess, using the adia of the PYTHONPATH.
+        calls = int(args[1])
+        print(trace(generate(calls), calls + calls // 10))
+        sys.exit()
+
+    revision = None
+    if args[:1] == ['--baseline']:
+        revision = args[1]
+        args = args[2:]
+
+    main(*(int(i) for i in args), revision=revision)
@@ -0,0 +1,146 @@
+"""Parser benchmarks.
+
+Usage::
+
+   python benchmarks/parse.py [--baseline REVISION] [STATEMENTS]
+
+With ``--baseline``, the ``adia`` package of the git ``REVISION`` is
+extracted into a temporary directory and the same token list is
+interpreted by it in a subprocess, to compare the state machine with an
+older one, for example the dict dispatch before the statemaps were
+compiled into the transition tables::
+
+   python benchmarks/parse.py --baseline 377a3e8^
+
+"""
+import io
+import os
+import sys
+import random
+import tarfile
+import tempfile
+import timeit
+import subprocess
+
+from adia import Diagram
+from adia.tokenizer import Tokenizer
+
+
+MODULES = [f'module{i}' for i in range(20)]
+
+
+def generate(statements, seed=1):
+    """Generates a sequence diagram with nested calls, notes and loops."""
+    random.seed(seed)
+    lines = ['diagram: Benchmark', 'sequence: Benchmark', '']
+    depth = 0
+    for i in range(statements):
+        indent = '  ' * depth
+        caller, callee = random.sample(MODULES, 2)
+        r = random.random()
+        if r < .7:
+            lines.append(f'{indent}{caller} -> {callee}: call{i}(x, y) => z')
+            if depth < 6 and random.random() < .3:
+                depth += 1
+
+        elif r < .8:
+            lines.append(f'{indent}@{caller}: Note {i}')
+
+        elif r < .85 and depth < 6:
+            lines.append(f'{indent}for: i in range({i})')
+            lines.append(f'{indent}  {caller} -> {callee}: loop{i}')
+
+        else:
+            depth = max(0, depth - random.randint(1, 2))
+            lines.append(f'{"  " * depth}{caller} -> {callee}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class SlowPathDiagram(Diagram):
+    fastpath = False
+
+
+def measure(title, func, number=5):
+    best = min(timeit.repeat(func, number=1, repeat=number))
+    print(f'{title:<32} {best * 1000:10.2f} ms')
+    return best
+
+
+def interpreter(tokens):
+    def interpret():
+        diagram = SlowPathDiagram()
+        for token in tokens:
+            diagram.eat_token(token)
+
+    return interpret
+
+
+def baseline(revision, script, *args):
+    """Runs the benchmark ``script`` with the ``args`` in a subprocess,
+    using the ``adia`` package of the git ``revision``, and returns its
+    output.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    archive = subprocess.run(
+        ['git', 'archive', revision, 'adia'],
+        cwd=root,
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout
+
+    with tempfile.TemporaryDirectory() as directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(directory)
+
+        env = dict(os.environ, PYTHONPATH=directory)
+        return subprocess.run(
+            [sys.executable, script, *args],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+
+
+def main(statements=20000, revision=None):
+    source = generate(statements)
+    tokens = list(Tokenizer().tokenize(source))
+    print(f'{statements} statements, {len(source)} bytes, '
+          f'{len(tokens)} tokens')
+
+    measure('tokenize', lambda: list(Tokenizer().tokenize(source)))
+    after = measure('interpret (state machine)', interpreter(tokens))
+    if revision is not None:
+        before = float(
+            baseline(revision, __file__, '--interpret', str(statements))
+        )
+        title = f'interpret ({revision})'
+        print(f'{title:<32} {before * 1000:10.2f} ms')
+        print(f'{"speedup":<32} {before / after:10.2f} x')
+
+    measure('parse (no fast path)', lambda: SlowPathDiagram(source))
+    measure('parse', lambda: Diagram(source))
+    measure('parse (bytes)', lambda: Diagram(source.encode()))
+    measure('parse (lazy)', lambda: Diagram(source, lazy=True))
+    measure('parse (lazy) + dumps', lambda: Diagram(source, lazy=True).dumps())
+
+    diagram = Diagram(source)
+    measure('dumps', diagram.dumps)
+    measure('dump', lambda: diagram.dump(io.StringIO()))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args[:1] == ['--interpret']:
+        # The baseline subprocess, using the adia of the PYTHONPATH.
+        tokens = list(Tokenizer().tokenize(generate(int(args[1]))))
+        print(min(timeit.repeat(interpreter(tokens), number=1, repeat=5)))
+        sys.exit()
+
+    revision = None
+    if args[:1] == ['--baseline']:
+        revision = args[1]
+        args = args[2:]
+
+    main(*(int(i) for i in args), revision=revision)
@@ -0,0 +1,170 @@
+import os
+
+import adia
+from adia import Diagram, cache
+from adia.columnar import ColumnarDiagram
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+    sequence: Bar
+    foo.title: Foo
+    foo -> bar: init => done
+      bar -> baz
+        @baz: qux
+      if: odd
+        baz -> qux
+      else:
+'''
+
+
+def entries(directory):
+    return sorted(f for f in os.listdir(directory) if f.endswith('.adiac'))
+
+
+def test_cache(tempstruct, monkeypatch):
+    directory = os.path.join(tempstruct(), 'cache')
+    c = cache.enable(directory)
+    try:
+        expected = Diagram(SOURCE)
+        assert len(entries(directory)) == 1
+        assert c.get(c.key(SOURCE)).endswith(expected.to_bytes())
+
+        # Hit, the source is not parsed anymore.
+        def parse(self, source):
+            raise AssertionError('Parsed')
+
+        with monkeypatch.context() as m:
+            m.setattr(Diagram, '_parse', parse)
+            d = Diagram(SOURCE)
+            assert d.dumps() == expected.dumps()
+            assert d.renders() == expected.renders()
+            assert adia.diagram(SOURCE.encode()) == expected.renders()
+
+            # Bypassed by the other modes.
+            with raises(AssertionError):
+                Diagram(SOURCE, incremental=True)
+
+            with raises(AssertionError):
+                Diagram(SOURCE, recover=True)
+
+            with raises(AssertionError):
+                ColumnarDiagram(SOURCE)
+
+            # Not a new diagram.
+            d = Diagram()
+            d.parseline('diagram: Qux')
+            with raises(AssertionError):
+                d.parse(SOURCE)
+
+        # Errors are not cached.
+        with raises(adia.BadSyntax):
+            Diagram('foo')
+
+        assert len(entries(directory)) == 1
+
+        # Corrupted entries are discarded.
+        key = c.key(SOURCE)
+        c.put(key, b'ADIA garbage')
+        assert Diagram(SOURCE).dumps() == expected.dumps()
+        assert c.get(key).endswith(expected.to_bytes())
+
+        # The version is a part of the key.
+        monkeypatch.setattr(adia, '__version__', '0.0.0')
+        assert c.key(SOURCE) != key
+        Diagram(SOURCE)
+        assert len(entries(directory)) == 2
+
+        c.clear()
+        assert entries(directory) == []
+    finally:
+        cache.disable()
+
+    Diagram(SOURCE)
+    assert entries(directory) == []
+
+
+def test_cache_tokenizer(tempstruct):
+    directory = os.path.join(tempstruct(), 'cache')
+    cache.enable(directory)
+    try:
+        expected = Diagram(SOURCE)
+        d = Diagram(SOURCE)
+        assert len(entries(directory)) == 1
+
+        # A hit leaves the tokenizer at the end of the source, like a parse.
+        assert d.tokenizer.checkpoint() == expected.tokenizer.checkpoint()
+
+        with raises(adia.BadSyntax) as error:
+            d.parseline('    foo -> qux')
+
+        with raises(adia.BadSyntax) as expectederror:
+            expected.parseline('    foo -> qux')
+
+        assert str(error.value) == str(expectederror.value)
+        assert 'line 12' in str(error.value)
+    finally:
+        cache.disable()
+
+
+def test_cache_eviction(tempstruct):
+    directory = tempstruct()
+    c = cache.Cache(directory, maxsize=100)
+    for i in range(5):
+        key = c.key(f'source {i}')
+        c.put(key, b'x' * 40)
+        # Distinct timestamps
+        os.utime(c._path(key), (i, i))
+
+    assert len(entries(directory)) == 2
+
+    # The recently used entries are kept.
+    assert c.get(c.key('source 3')) is not None
+    c.put(c.key('source 5'), b'x' * 40)
+    assert c.get(c.key('source 4')) is None
+    assert c.get(c.key('source 3')) is not None
+    assert c.get(c.key('source 5')) is not None
+
+    c.discard(c.key('source 5'))
+    c.discard(c.key('source 5'))
+    assert c.get(c.key('source 5')) is None
+
+    # No temporary files are left.
+    assert len(os.listdir(directory)) == 1
+
+
+def test_cache_scans(tempstruct, monkeypatch):
+    directory = tempstruct()
+    c = cache.Cache(directory, maxsize=1000)
+    scans = 0
+    scan = c._entries
+
+    def counted():
+        nonlocal scans
+        scans += 1
+        return scan()
+
+    monkeypatch.setattr(c, '_entries', counted)
+
+    # The directory is scanned once, then the size is tracked in memory.
+    for i in range(10):
+        c.put(c.key(f'source {i}'), b'x' * 10)
+
+    assert scans == 1
+
+    # Until the cache is full
+    for i in range(10, 101):
+        c.put(c.key(f'source {i}'), b'x' * 10)
+
+    assert scans == 2
+    assert len(entries(directory)) == 90
+
+    # Once per RESCAN writes
+    monkeypatch.setattr(cache, 'RESCAN', 5)
+    c.maxsize = 10000
+    for i in range(101, 111):
+        c.put(c.key(f'source {i}'), b'x' * 10)
+
+    assert scans == 4
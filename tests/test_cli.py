@@ -1,3 +1,5 @@
+import os
+
 from bddcli import when, stdout, status, stderr
 
 import adia
@@ -60,6 +62,35 @@ def test_standardinput(app):
         ''', offset=8)
 
 
+def test_compact(app):
+    source = '''
+        sequence:
+        foo -> bar: Hello World!
+    '''
+
+    with app('--no-rstrip --compact', stdin=source):
+        assert status == OK
+        assert eqdia(stdout, '''
+        .............................
+        . +-----+           +-----+ .
+        . | foo |           | bar | .
+        . +-----+           +-----+ .
+        .    |                 |    .
+        .    |~~~Hello World!~>|    .
+        .    |                 |    .
+        .    |<----------------|    .
+        .    |                 |    .
+        . +-----+           +-----+ .
+        . | foo |           | bar | .
+        . +-----+           +-----+ .
+        .............................
+        ''', offset=8)
+
+        when('--no-rstrip', stdin=source)
+        assert status == OK
+        assert len(stdout.splitlines()[0]) > 25
+
+
 def test_inputfile(app, tempstruct):
     source = '''
         diagram: Foo
@@ -217,3 +248,52 @@ def test_changedirectory(app, tempstruct):
         . +-----+             +-----+ .
         ...............................
         ''', offset=8)
+
+
+def test_allerrors(app, tempstruct):
+    source1 = '''
+        sequence:
+        foo -> bar: Hello World!
+    '''
+    source2 = '''
+        sequence:
+        foo ->
+        foo -> bar
+        @: baz
+    '''
+
+    temproot = tempstruct(**{
+        'foo.adia': source1,
+        'bad.adia': source2,
+    })
+
+    with app(f'-e {temproot}/bad.adia {temproot}/foo.adia'):
+        assert status == ERR
+        assert eqbigstr(stderr, f'''
+            BadSyntax: File "{temproot}/bad.adia", Interpreter: Call, line 3, col 14
+            Expected `NAME`, got: `NEWLINE`.
+            BadSyntax: File "{temproot}/bad.adia", Interpreter: SequenceDiagram, line 5, col 9
+            Expected `NAME`, got: `:`.
+        ''', offset=12)  # noqa
+
+        # The bad file is not rendered.
+        assert stdout == f'\n{adia.diagram(source1, rstrip=False)}\n'
+
+
+def test_cache(app, tempstruct):
+    source = '''
+        diagram: Foo
+        sequence:
+        foo -> bar: Hello World!
+    '''
+    temproot = tempstruct(**{
+        'foo.adia': source,
+    })
+
+    for _ in range(2):
+        with app(f'--cache {temproot}/cache {temproot}/foo.adia'):
+            assert stderr == ''
+            assert status == OK
+            assert stdout == f'{adia.diagram(source, rstrip=False)}\n'
+
+    assert len(os.listdir(f'{temproot}/cache')) == 1
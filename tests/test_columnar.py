@@ -0,0 +1,103 @@
+from adia import Diagram
+from adia.columnar import ColumnarDiagram, ColumnarSequenceDiagram, CALL, \
+    NOTE, LOOP, CONDITION
+from adia.sequence import Call, Note, Loop, Condition
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+    sequence: Bar
+    foo.title: Foo
+    foo -> bar: init => done
+      bar -> baz
+        @baz: qux
+      for: each item
+        baz -> qux
+      if: odd
+        qux -> foo
+      else:
+    bar -> foo
+    @foo ~ bar: |
+      quux
+      quuz
+    sequence: Qux
+    foo -> bar
+      bar -> baz
+'''
+
+
+def test_columnar():
+    expected = Diagram(SOURCE)
+    for fastpath in (True, False):
+        d = ColumnarDiagram()
+        d.fastpath = fastpath
+        d.parse(SOURCE)
+        assert d.dumps() == expected.dumps()
+        assert d.renders() == expected.renders()
+
+    s = d[0]
+    assert isinstance(s, ColumnarSequenceDiagram)
+    assert len(s) == 3
+    assert list(s.types) == [CALL, CALL, NOTE, LOOP, CALL, CONDITION, CALL,
+                             CONDITION, CALL, NOTE]
+    assert list(s.parents) == [-1, 0, 1, 0, 3, 0, 5, 0, -1, -1]
+    assert list(s.depths) == [0, 1, 2, 1, 2, 1, 2, 1, 0, 0]
+    assert list(s.nexts) == [8, 3, -1, 5, -1, 7, -1, -1, 9, -1]
+    assert s.modules_byid[s.callers[0]].name == 'foo'
+    assert s.modules_byid[s.callers[9]].name == 'foo'
+    assert s.modules_byid[s.callees[9]].name == 'bar'
+    assert s.callers[0] == s.callees[6]
+    assert s.values[s.returntexts[0]] == 'done'
+    assert s.returntexts[1] == -1
+
+    # Views
+    call, note = s[0], s[-1]
+    assert isinstance(call, Call)
+    assert isinstance(note, Note)
+    assert isinstance(call[1], Loop)
+    assert isinstance(call[2], Condition)
+    assert len(call) == 4
+    assert len(call[3]) == 0
+    assert call[0][0].modules == ['baz']
+    assert note.modules == ['foo', 'bar']
+    assert note.multiline
+    assert call.right == 'init => done'
+    assert [i.kind for i in reversed(call)] == ['else', 'if', 'for', 'call']
+    assert [i.callee for i in call[1:2][0]] == ['qux']
+    assert call[1] in call
+    assert call == s[0]
+    assert call != s[1]
+    with raises(IndexError):
+        call[4]
+
+
+def test_columnar_append():
+    s = ColumnarSequenceDiagram()
+    s.extend(Diagram(SOURCE)[0])
+    assert [i.dumps() for i in s] == [i.dumps() for i in Diagram(SOURCE)[0]]
+
+    # Append only
+    with raises(ValueError):
+        s[0].append(Call('foo', 'bar'))
+
+    with raises(TypeError):
+        s.append('foo -> bar')
+
+    with raises(ValueError):
+        s[1].append(Call('foo', 'bar'))
+
+    s.append(Call('foo', 'bar', 'baz'))
+    s[-1].append(Call('bar', 'baz', 'qux => quux'))
+    assert s[3][0].returntext == 'quux'
+    assert len(s) == 4
+    assert s.depths[-1] == 1
+
+
+def test_columnar_modes():
+    with raises(ValueError):
+        ColumnarDiagram(SOURCE, incremental=True)
+
+    with raises(ValueError):
+        ColumnarDiagram(SOURCE, lazy=True)
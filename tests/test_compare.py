@@ -0,0 +1,115 @@
+import adia
+from adia import Diagram
+
+from .helpers import raises
+
+
+OLD = '''
+    diagram: Foo
+    version: 1.0
+
+    sequence: Bar
+    foo.title: Foo
+    foo -> bar: init
+      bar -> baz
+        @baz: qux
+      for: each item
+        baz -> qux
+    bar -> foo
+
+    sequence: Baz
+    foo -> bar
+'''
+
+NEW = '''
+    diagram: Foo
+    version: 2.0
+
+    sequence: Bar
+    foo.title: FOO
+    foo -> bar: init
+      bar -> baz
+      for: each item
+        baz -> qux
+        @qux: quux
+      while: next
+    bar -> thud: done
+
+    sequence: Qux
+    foo -> bar
+
+    sequence: Quux
+'''
+
+
+def summary(changes):
+    return [(c, k, p) for c, k, p, _, _ in changes]
+
+
+def test_diff():
+    old = Diagram(OLD)
+    new = Diagram(NEW)
+    assert adia.diff(old, Diagram(OLD)) == []
+    assert summary(adia.diff(old, new)) == [
+        ('changed', 'diagram', ('version', )),
+        ('changed', 'module', (0, 'foo')),
+        ('added', 'module', (0, 'thud')),
+        ('removed', 'note', (0, 0, 0, 0)),
+        ('added', 'note', (0, 0, 1, 1)),
+        ('added', 'block', (0, 0, 2)),
+        ('changed', 'call', (0, 1)),
+        ('changed', 'section', (1, )),
+        ('added', 'section', (2, )),
+    ]
+
+    changes = adia.diff(old, new)
+    assert changes[0][3:] == ('1.0', '2.0')
+    assert changes[1][3].title == 'Foo'
+    assert changes[1][4].title == 'FOO'
+    assert changes[3][3] is old[0][0][0][0]
+    assert changes[3][4] is None
+    assert changes[6][3] is old[0][1]
+    assert changes[6][4] is new[0][1]
+
+    # Removed
+    assert summary(adia.diff(new, old))[-1] == ('removed', 'section', (2, ))
+
+    # Sequence diagrams
+    assert summary(adia.diff(old[0], new[0]))[:2] == [
+        ('changed', 'module', ('foo', )),
+        ('added', 'module', ('thud', )),
+    ]
+    assert summary(adia.diff(old[1], new[1])) == [
+        ('changed', 'section', ()),
+    ]
+    assert adia.diff(old[0], Diagram(OLD)[0]) == []
+
+    with raises(TypeError):
+        adia.diff(old, new[0])
+
+
+def test_diff_alignment():
+    old = Diagram('''
+        sequence:
+        foo -> bar: 1
+        foo -> bar: 2
+        foo -> bar: 3
+        foo -> bar: 4
+    ''')
+    new = Diagram('''
+        sequence:
+        foo -> bar: 1
+        foo -> bar: 2.5
+        @foo: inserted
+        foo -> bar: 3
+        foo -> bar: 4
+    ''')
+    assert summary(adia.diff(old, new)) == [
+        ('changed', 'call', (0, 1)),
+        ('added', 'note', (0, 2)),
+    ]
+
+    assert summary(adia.diff(new, old)) == [
+        ('changed', 'call', (0, 1)),
+        ('removed', 'note', (0, 2)),
+    ]
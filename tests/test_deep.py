@@ -0,0 +1,50 @@
+import time
+import contextlib
+
+from adia import Diagram, diff
+from adia.columnar import ColumnarSequenceDiagram
+
+
+def chain(depth):
+    """Creates a call chain having ``depth`` levels."""
+    diagram = Diagram()
+    sequence = diagram.sequence('Deep')
+    with contextlib.ExitStack() as stack:
+        for i in range(depth):
+            if i % 2:
+                call = sequence.call('bar', 'foo')
+            else:
+                call = sequence.call('foo', 'bar', f'call{i}')
+
+            stack.enter_context(call)
+
+    return diagram
+
+
+def test_deep_render():
+    depth = 10000
+    diagram = chain(depth)
+
+    start = time.monotonic()
+    lines = diagram.renders().splitlines()
+    assert time.monotonic() - start < 10
+
+    assert lines[0] == 'SEQUENCE: Deep'
+    assert lines[3].split() == ['|', 'foo', '|', '|', 'bar', '|']
+    assert sum('call' in line for line in lines) == depth // 2
+
+    # The other tree walks
+    assert Diagram.from_bytes(diagram.to_bytes())[0].digest == \
+        diagram[0].digest
+    assert diff(diagram, chain(depth)) == []
+
+    columnar = ColumnarSequenceDiagram()
+    columnar.extend(diagram[0])
+    assert columnar.depths[-1] == depth - 1
+
+
+def test_deep_dumps():
+    depth = 2000
+    source = chain(depth).dumps()
+    assert source.endswith(f'{"  " * (depth - 1)}bar -> foo')
+    assert Diagram(source).dumps() == source
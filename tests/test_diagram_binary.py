@@ -0,0 +1,103 @@
+import pickle
+
+from adia import Diagram
+from adia.binary import HEADER
+from adia.columnar import ColumnarDiagram
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+    version: 1.0
+    author: Alice
+
+    sequence: Bar
+    description: Baz
+    tags: qux
+    foo.title: Foo
+    thud.type: actor
+    foo -> bar: init => done => ok
+      bar -> baz
+        @baz: qux
+      for: each item
+        baz -> qux
+      if: odd
+        qux -> foo
+      else:
+    @foo ~ bar: |
+      quux
+      quuz
+
+    sequence:
+    bar -> foo: ç
+'''
+
+
+def test_diagram_binary():
+    expected = Diagram(SOURCE)
+    data = expected.to_bytes()
+    assert isinstance(data, bytes)
+    assert len(data) < len(pickle.dumps(expected))
+
+    d = Diagram.from_bytes(data)
+    assert isinstance(d, Diagram)
+    assert d.dumps() == expected.dumps()
+    assert d.renders() == expected.renders()
+    assert d.author == 'Alice'
+    assert d[1].title == ''
+    assert d[0].modules['thud'].type == 'actor'
+    assert d[0].modules_order == ['foo', 'bar', 'baz', 'qux']
+    assert [m.order for m in d[0].modules_byid] == [0, None, 1, 2, 3]
+
+    call = d[0][0]
+    assert call.returntext == 'ok'
+    assert call.text == 'init => done'
+    assert (call.callerid, call.calleeid) == (0, 2)
+    assert call[0][0].moduleids == (3, )
+    assert call[0].caller is call.callee
+    assert d[0][1].multiline
+
+    # Other storages and buffers
+    assert Diagram.from_bytes(memoryview(data)).dumps() == expected.dumps()
+    assert Diagram(SOURCE, lazy=True).to_bytes() == data
+    assert ColumnarDiagram(SOURCE).to_bytes() == data
+    assert Diagram().to_bytes() == Diagram('').to_bytes()
+    assert Diagram.from_bytes(Diagram().to_bytes()).dumps() == ''
+
+    # Wide integers
+    source = 'sequence:\n' + ''.join(f'foo -> bar: {i}\n' for i in range(300))
+    d = Diagram.from_bytes(Diagram(source).to_bytes())
+    assert d.dumps() == Diagram(source).dumps()
+
+
+def test_diagram_binary_errors():
+    data = Diagram(SOURCE).to_bytes()
+
+    with raises(ValueError) as e:
+        Diagram.from_bytes(data[:HEADER.size - 1])
+    assert str(e.value) == 'Invalid binary diagram: truncated header.'
+
+    with raises(ValueError) as e:
+        Diagram.from_bytes(b'XDIA' + data[4:])
+    assert str(e.value) == 'Invalid binary diagram: bad magic number.'
+
+    with raises(ValueError) as e:
+        Diagram.from_bytes(data[:4] + b'\x02' + data[5:])
+    assert str(e.value) == \
+        'Invalid binary diagram: unsupported format version: 2.'
+
+    with raises(ValueError) as e:
+        Diagram.from_bytes(data[:5] + b'\x03' + data[6:])
+    assert str(e.value) == 'Invalid binary diagram: bad integer size.'
+
+    with raises(ValueError) as e:
+        Diagram.from_bytes(data[:HEADER.size + 10])
+    assert str(e.value) == 'Invalid binary diagram: truncated data.'
+
+    # Less numbers than needed
+    header = list(HEADER.unpack_from(data))
+    header[5] -= 5
+    with raises(ValueError) as e:
+        Diagram.from_bytes(HEADER.pack(*header) + data[HEADER.size:])
+    assert str(e.value) == 'Invalid binary diagram: corrupted data.'
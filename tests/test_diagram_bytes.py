@@ -0,0 +1,25 @@
+import mmap
+
+from adia import Diagram
+
+
+def test_render_bytes(tmpdir):
+    source = '''
+    diagram: My dia
+    sequence:
+
+    foo -> bar: héllo
+    '''
+    expected = Diagram(source).renders()
+    assert Diagram(source.encode()).renders() == expected
+    assert Diagram(memoryview(source.encode())).renders() == expected
+
+    filename = tmpdir.join('foo.adia')
+    filename.write_binary(source.encode())
+    with open(filename, 'rb') as f:
+        d = Diagram(f)
+        assert d.renders() == expected
+        assert d.tokenizer.filename == filename
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            assert Diagram(m).renders() == expected
@@ -52,6 +52,44 @@ def test_diagram_parsefile():
     assert eqbigstr(diagram.dumps(), s)
 
 
+def test_diagram_dump():
+    s = '''
+        diagram: Foo
+
+        sequence: Bar
+
+        @foo ~ bar: |
+          baz
+          qux
+
+        foo -> bar: init => done
+          for: each item
+            @bar ~ baz: |
+              thud
+            bar -> baz
+          if: odd
+            baz -> qux
+        @foo: |
+          quux
+
+        @bar: quuz
+    '''
+    diagram = Diagram(s)
+    f = StringIO()
+    diagram.dump(f)
+    assert f.getvalue() == f'{diagram.dumps()}\n'
+    assert eqbigstr(f.getvalue(), s)
+
+    f = StringIO()
+    diagram[0][1][0].dump(f, '    ')
+    assert f.getvalue() == '''\
+    for: each item
+      @bar ~ baz: |
+        thud
+      bar -> baz
+'''
+
+
 def test_diagram_comment():
     s = '''
         diagram: Foo
@@ -0,0 +1,133 @@
+from adia import Diagram
+from adia.exceptions import BadSyntax
+
+from .helpers import raises
+
+
+SOURCE = '''
+        diagram: Foo
+        version: 1.0
+
+        sequence: Foo#1
+        foo -> bar: init
+          bar -> baz: load
+            baz -> baz: cache
+
+        # Comment
+        foo -> baz: close
+        @foo: Note
+        for: each item
+          foo -> bar: process
+
+        sequence: Foo#2
+        foo -> bar
+        bar -> foo
+'''
+
+
+def edit(source, start, end, text):
+    lines = source.splitlines(True)
+    return ''.join(lines[:start - 1] + [text] + lines[end - 1:])
+
+
+def assert_edit(start, end, text, incremental=True):
+    d = Diagram(SOURCE, incremental=True)
+    before = [list(s) for s in d]
+    checkpoints = d._checkpoints
+    d.apply_edit(start, end, text)
+
+    # A full parse starts over with new checkpoints
+    assert (d._checkpoints is checkpoints) == incremental
+
+    expected = Diagram(edit(SOURCE, start, end, text))
+    assert d.dumps() == expected.dumps()
+    assert d.renders() == expected.renders()
+    assert ''.join(d._lines) == edit(SOURCE, start, end, text)
+    return before, d
+
+
+def test_diagram_incremental():
+    before, d = assert_edit(11, 12, '        foo -> baz: quit\n')
+    assert d[0][0] is before[0][0]
+    assert d[0][1] is not before[0][1]
+    assert d[0][2] is before[0][2]
+    assert d[1][0] is before[1][0]
+
+    # Insert
+    before, d = assert_edit(11, 11, '        bar -> foo: ping\n')
+    assert d[0][0] is before[0][0]
+    assert d[0][2] is before[0][1]
+    assert len(d[0]) == 5
+
+    # Children
+    assert_edit(9, 9, '            baz -> foo: event\n')
+    assert_edit(8, 9, '')
+
+    # Delete
+    before, d = assert_edit(12, 15, '')
+    assert d[0][0] is before[0][0]
+    assert len(d[0]) == 2
+
+    # Last section
+    before, d = assert_edit(18, 19, '        bar -> foo: done\n')
+    assert d[0][0] is before[0][0]
+    assert d[1][0] is before[1][0]
+
+    # Append
+    assert_edit(19, 19, '        foo -> bar: again\n')
+
+    # Successive edits
+    d = Diagram(SOURCE, incremental=True)
+    d.apply_edit(11, 12, '        foo -> baz: quit\n')
+    d.apply_edit(11, 11, '        bar -> foo: ping\n        foo -> bar\n')
+    d.apply_edit(20, 21, '')
+    source = edit(SOURCE, 11, 12, '        foo -> baz: quit\n')
+    source = edit(
+        source, 11, 11, '        bar -> foo: ping\n        foo -> bar\n')
+    source = edit(source, 20, 21, '')
+    assert d.dumps() == Diagram(source).dumps()
+    assert ''.join(d._lines) == source
+
+
+def test_diagram_incremental_fallback():
+    # Headers
+    assert_edit(2, 3, '        diagram: Bar\n', incremental=False)
+    assert_edit(5, 6, '        sequence: Bar\n', incremental=False)
+
+    # New and reordered modules
+    assert_edit(11, 12, '        foo -> qux\n', incremental=False)
+    assert_edit(6, 7, '        bar -> foo: init\n', incremental=False)
+
+    # Attributes
+    assert_edit(6, 6, '        foo.title: Foo\n', incremental=False)
+
+    # Indented statement
+    assert_edit(11, 12, '          foo -> baz\n', incremental=False)
+
+    # Indented comment
+    assert_edit(
+        11,
+        12,
+        '          # Comment\n        foo -> baz: close\n',
+        incremental=False
+    )
+
+    # Multiline
+    assert_edit(12, 13, '        @foo: |\n          Foo\n', incremental=False)
+
+
+def test_diagram_incremental_errors():
+    d = Diagram(SOURCE)
+    with raises(ValueError):
+        d.apply_edit(1, 1, '')
+
+    d = Diagram(SOURCE, incremental=True)
+    with raises(ValueError):
+        d.apply_edit(3, 2, '')
+
+    with raises(BadSyntax):
+        d.apply_edit(11, 12, '        foo -> \n')
+
+    d.apply_edit(11, 12, '        foo -> baz: quit\n')
+    assert d.dumps() == \
+        Diagram(edit(SOURCE, 11, 12, '        foo -> baz: quit\n')).dumps()
@@ -0,0 +1,93 @@
+from adia import Diagram, BadSyntax
+from adia.lazy import LazySequenceDiagram, index
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+    version: 1.0
+
+    sequence: Foo#1
+    description: First
+    foo.title: Foo
+    foo -> bar: init
+      bar -> baz
+        @baz: |
+          sequence: not a section
+    for: each item
+      foo -> bar
+
+    sequence: Foo#2
+    bar -> foo
+      sequence: Foo#3
+    baz -> qux
+'''
+
+
+def test_diagram_lazy():
+    d = Diagram(SOURCE, lazy=True)
+    assert d.title == 'Foo'
+    assert d.version == '1.0'
+    assert [s.title for s in d] == ['Foo#1', 'Foo#2', 'Foo#3']
+    assert all(isinstance(s, LazySequenceDiagram) for s in d)
+
+    # Nothing is parsed until touched.
+    assert all(s._pending is not None for s in d)
+    first, second, third = d
+    assert first.description == 'First'
+    assert first._pending is None
+    assert second._pending is not None
+    assert len(third) == 1
+    assert second._pending is not None
+    assert second.modules_order == ['bar', 'foo']
+
+    expected = Diagram(SOURCE)
+    assert d.dumps() == expected.dumps()
+    assert d.renders() == expected.renders()
+    assert Diagram(SOURCE.encode(), lazy=True).dumps() == expected.dumps()
+
+
+def test_diagram_lazy_index():
+    headerend, sections = index(SOURCE)
+    assert SOURCE[headerend:].startswith('    sequence: Foo#1\n')
+    assert [(s[0], s[1], s[3][0]) for s in sections] == [
+        ('Foo#1', 0, 5),
+        ('Foo#2', 0, 15),
+        ('Foo#3', 1, 17),
+    ]
+
+    # Escapes, tabs and the other keywords are left to the usual parse.
+    assert index('sequence:\nfoo -> bar \\\n  -> baz\n') is None
+    assert index('sequence:\n\tfoo -> bar\n') is None
+    assert index('sequence:\nfoo -> bar\nstate: foo\n') is None
+
+    source = 'sequence:\n\tfoo -> bar\n'
+    d = Diagram(source, lazy=True)
+    assert not isinstance(d[0], LazySequenceDiagram)
+    assert d.dumps() == Diagram(source).dumps()
+
+
+def test_diagram_lazy_errors():
+    source = 'sequence: Foo\nfoo -> bar\nsequence: Bar\nfoo -> \n'
+    d = Diagram(source, lazy=True)
+    assert d[0][0].callee == 'bar'
+
+    # Raised by the first access, and again by the next ones
+    with raises(BadSyntax) as e:
+        len(d[1])
+
+    with raises(BadSyntax) as expected:
+        Diagram(source)
+
+    assert str(e.value) == str(expected.value)
+    with raises(BadSyntax):
+        d[1].modules
+
+
+def test_diagram_lazy_modes():
+    with raises(ValueError):
+        Diagram(SOURCE, lazy=True, incremental=True)
+
+    with raises(ValueError):
+        Diagram(SOURCE, lazy=True, recover=True)
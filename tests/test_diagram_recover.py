@@ -0,0 +1,82 @@
+from adia import Diagram, BadSyntax, BadAttribute
+from adia.sequence import SequenceDiagram, Call
+
+
+SOURCE = '''
+    diagram: Foo
+    sequence: Bar
+    foo -> bar: baz
+    foo -> : qux
+      bar -> baz
+    foo.qux: quux
+    for: each item
+      foo -> -> bar
+      bar -> baz: ok
+    bar -> foo
+    sequence: Baz
+    invalid line
+    baz -> qux
+'''
+
+
+def test_diagram_recover():
+    d = Diagram(SOURCE, recover=True)
+    errors = d.diagnostics
+    assert [type(e) for e in errors] == \
+        [BadSyntax, BadAttribute, BadSyntax, BadSyntax]
+    assert [(e.line, e.col) for e in errors] == \
+        [(5, 11), (7, 17), (9, 13), (13, 12)]
+    assert errors[0].interpreter is Call
+    assert errors[0].expected == ['NAME']
+    assert errors[0].token.string == ':'
+    assert errors[0].filename is None
+    assert errors[1].attribute == 'foo.qux'
+    assert errors[3].interpreter is SequenceDiagram
+    assert errors[3].expected == ['->', ':', '.']
+    assert str(errors[3]).startswith(
+        'BadSyntax: File "String", Interpreter: SequenceDiagram, line 13'
+    )
+
+    # The rest of the tree is built.
+    assert d.dumps() == Diagram('''
+        diagram: Foo
+        sequence: Bar
+        foo -> bar: baz
+          bar -> baz
+        for: each item
+          bar -> baz: ok
+        bar -> foo
+        sequence: Baz
+        baz -> qux
+    ''').dumps()
+
+    # Bytes
+    d = Diagram(SOURCE.encode(), recover=True)
+    assert [str(e) for e in d.diagnostics] == [str(e) for e in errors]
+
+
+def test_diagram_recover_noerrors():
+    source = '''
+        diagram: Foo
+        sequence:
+        foo -> bar: baz
+          @bar: qux
+    '''
+    d = Diagram(source, recover=True)
+    assert d.diagnostics == []
+    assert d.dumps() == Diagram(source).dumps()
+    assert Diagram(source).diagnostics is None
+
+
+def test_diagram_recover_incremental():
+    source = 'sequence:\nfoo -> bar\nbar -> baz\nbaz -> qux\n'
+    d = Diagram(source, recover=True, incremental=True)
+    assert d.diagnostics == []
+
+    d.apply_edit(3, 4, 'bar -> \n')
+    assert [e.line for e in d.diagnostics] == [3]
+    assert d.dumps() == 'sequence:\n\nfoo -> bar\nbaz -> qux'
+
+    d.apply_edit(3, 4, 'bar -> baz\n')
+    assert d.diagnostics == []
+    assert d.dumps() == Diagram(source).dumps()
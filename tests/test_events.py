@@ -0,0 +1,171 @@
+import io
+
+from adia import Diagram, iterparse, BadSyntax, InterpreterError
+from adia.events import EventDiagram
+from adia.sequence import Call, Note
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+    version: 1.0
+    sequence: Bar
+    description: Baz
+    foo.title: Foo
+    foo -> bar: init => done
+      bar -> baz
+        @baz: qux
+      for: each item
+        baz -> qux
+      if: odd
+        qux -> foo
+      else:
+    bar -> foo
+    @foo ~ bar: quux
+    sequence: Qux
+    foo -> bar
+      bar -> baz
+'''
+
+
+def treeevents(diagram):
+    """Reports the events of an already parsed diagram."""
+    def items(container):
+        for item in container:
+            if isinstance(item, Note):
+                yield 'note', (tuple(item.modules), item.text)
+                continue
+
+            if isinstance(item, Call):
+                yield 'call_start', \
+                    (item.caller, item.callee, item.text, item.returntext)
+            else:
+                yield 'block_start', (item.kind, item.text)
+
+            yield from items(item)
+            yield 'call_end' if isinstance(item, Call) else 'block_end', ()
+
+    if diagram.title:
+        yield 'diagram_attr', ('title', diagram.title)
+
+    if diagram.version:
+        yield 'diagram_attr', ('version', diagram.version)
+
+    for section in diagram:
+        yield 'section_start', ('sequence', section.title)
+        yield from items(section)
+        yield 'section_end', ()
+
+
+def test_events():
+    events = list(iterparse(SOURCE))
+    assert events[:6] == [
+        ('diagram_attr', ('title', 'Foo')),
+        ('diagram_attr', ('version', '1.0')),
+        ('section_start', ('sequence', 'Bar')),
+        ('section_attr', ('description', 'Baz')),
+        ('module_attr', ('foo', 'title', 'Foo')),
+        ('call_start', ('foo', 'bar', 'init', 'done')),
+    ]
+
+    # Section and module attributes aside, the same as the tree.
+    assert [e for e in events if e[0] not in ('section_attr', 'module_attr')] \
+        == list(treeevents(Diagram(SOURCE)))
+
+    # Bytes and files
+    assert list(iterparse(SOURCE.encode())) == events
+    assert list(iterparse(io.StringIO(SOURCE))) == events
+
+
+def test_events_streaming():
+    source = 'sequence:\n' + ''.join(
+        f'foo -> bar: {i}\n  bar -> baz\n    @baz: {i}\n'
+        for i in range(1000)
+    )
+    expected = list(treeevents(Diagram(source)))
+
+    # Events are reported as the lines are consumed.
+    events = iterparse(source)
+    assert next(events) == ('section_start', ('sequence', ''))
+    assert next(events) == ('call_start', ('foo', 'bar', '0', None))
+    assert [next(events) for _ in range(4)] == expected[2:6]
+    events.close()
+
+    # The number of the living items is bounded by the nesting level.
+    for fastpath in (True, False):
+        diagram = EventDiagram()
+        diagram.fastpath = fastpath
+        events = []
+        for token in diagram.tokenizer.tokenize(
+                source, diagram._fastline if fastpath else None):
+            diagram.eat_token(token)
+            diagram.flush()
+            sequence = diagram._sequence()
+            if sequence is not None:
+                assert len(sequence) <= 1
+                assert len(sequence.events) <= diagram.maxpending
+
+            events.extend(diagram.events)
+            diagram.events.clear()
+
+        assert events == expected
+
+
+def test_events_error():
+    events = iterparse('sequence:\nfoo -> bar\nfoo -> \n')
+    assert next(events) == ('section_start', ('sequence', ''))
+    with raises(BadSyntax):
+        list(events)
+
+
+def buildtree(events):
+    """Rebuilds the nested items of the sections from the events."""
+    sections = []
+    stack = []
+    for event, args in events:
+        if event == 'section_start':
+            stack = [[]]
+            sections.append(stack[0])
+        elif event in ('call_start', 'block_start'):
+            children = []
+            stack[-1].append((args, children))
+            stack.append(children)
+        elif event == 'note':
+            stack[-1].append((args, None))
+        elif event in ('call_end', 'block_end'):
+            stack.pop()
+
+    return sections
+
+
+def test_events_blanklines():
+    sources = [
+        'sequence:\nfoo -> bar\n  bar -> baz\n    # comment\n\n'
+        '    baz -> qux\n',
+        'sequence:\nfoo -> bar\n  @bar: baz\n\n  bar -> baz\n'
+        '# comment\n    baz -> qux\n  qux -> foo\n',
+        'sequence:\nfor: each\n  foo -> bar\n\n    bar -> baz\n'
+        '      # comment\n\n  if: odd\n    baz -> qux\n\n'
+        'sequence:\nfoo -> bar\n\n',
+    ]
+    for source in sources:
+        events = list(iterparse(source))
+        assert buildtree(events) == buildtree(treeevents(Diagram(source)))
+
+
+def test_events_errormessages():
+    sources = [
+        'invalid',
+        'sequence:\nfoo -> bar\nfoo.bar: baz\n',
+        'sequence:\nfoo -> bar\n  baz\n',
+        'sequence:\nfoo -> bar\nfoo -> \n',
+    ]
+    for source in sources:
+        with raises(InterpreterError) as expected:
+            Diagram(source)
+
+        with raises(InterpreterError) as error:
+            list(iterparse(source))
+
+        assert str(error.value) == str(expected.value)
@@ -0,0 +1,24 @@
+import random
+
+from adia.fenwick import FenwickTree
+
+
+def test_fenwicktree():
+    t = FenwickTree()
+    assert len(t) == 0
+    assert t.prefix(0) == 0
+    assert t.sum(0, 0) == 0
+
+    values = [random.randrange(10) for _ in range(37)]
+    t = FenwickTree(values)
+    assert len(t) == 37
+    for _ in range(100):
+        i = random.randrange(37)
+        values[i] = random.randrange(10)
+        t[i] = values[i]
+        assert t[i] == values[i]
+
+        start = random.randrange(38)
+        stop = random.randrange(38)
+        assert t.sum(start, stop) == sum(values[start:stop])
+        assert t.prefix(stop) == sum(values[:stop])
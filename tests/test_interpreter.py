@@ -0,0 +1,53 @@
+import pickle
+
+from adia import Diagram, SequenceDiagram
+from adia.interpreter import Interpreter
+from adia.sequence import CallInterpreter
+from adia.tokenizer import Tokenizer
+
+
+def test_interpreter_stack():
+    d = Diagram()
+    d.fastpath = False
+    tokens = Tokenizer().tokenize(
+        'sequence:\n'
+        'foo -> bar: baz\n'
+        '  bar -> baz: qux\n'
+    )
+    depths = []
+    for token in tokens:
+        d.eat_token(token)
+        depths.append([type(i) for i in d._stack])
+
+    # The tokens of the calls are fed into the Call interpreter directly.
+    assert [Diagram, SequenceDiagram, CallInterpreter] in depths
+    assert max(len(i) for i in depths) == 3
+    assert depths[-1] == [Diagram]
+    assert d[0][0][0].text == 'qux'
+
+
+def test_interpreter_detached():
+    source = (
+        'sequence:\n'
+        'foo -> bar: baz\n'
+        '  @bar: qux\n'
+        '  if: quux\n'
+        '    bar -> baz\n'
+    )
+    for fastpath in (True, False):
+        d = Diagram()
+        d.fastpath = fastpath
+        d.parse(source)
+
+        # The items are plain data, the interpreters are dropped.
+        call = d[0][0]
+        note, condition = call
+        for item in (call, note, condition, condition[0]):
+            assert not isinstance(item, Interpreter)
+            assert not hasattr(item, 'tokenizer')
+
+        assert [type(i) for i in d._stack] == [Diagram]
+
+        items = pickle.loads(pickle.dumps(d[0][:]))
+        assert [i.dumps() for i in items] == [call.dumps()]
+        assert items[0][1][0].callee == 'baz'
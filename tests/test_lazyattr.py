@@ -24,3 +24,21 @@ def test_lazyattribute():
     foo = Foo()
     assert my_instance is foo.bar
     assert 1 == callcount
+
+
+def test_lazyattribute_slots():
+    callcount = []
+
+    class Foo:
+        __slots__ = ('_bar', )
+
+        @LazyAttribute
+        def bar(self):
+            callcount.append(self)
+            return 'bar'
+
+    foo = Foo()
+    assert not hasattr(foo, '__dict__')
+    assert 'bar' == foo.bar
+    assert 'bar' == foo.bar
+    assert [foo] == callcount
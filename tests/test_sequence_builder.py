@@ -0,0 +1,149 @@
+from adia import Diagram
+from adia.columnar import ColumnarDiagram
+from adia.sequence import Call, Note, Loop, Condition
+
+from .helpers import raises
+
+
+SOURCE = '''
+    diagram: Foo
+
+    sequence: Bar
+
+    # Modules
+    foo.title: Foo
+    thud.type: actor
+
+    foo -> bar: init() => ok
+      bar -> baz
+      for: each item
+        @baz ~ qux: |
+          quux
+          quuz
+        baz -> qux
+      if: odd
+        baz -> foo
+      else
+        baz -> bar: done
+    @foo: done
+'''
+
+
+def build(diagram):
+    diagram.title = 'Foo'
+    s = diagram.sequence('Bar')
+    s.module('foo', title='Foo')
+    s.module('thud', type='actor')
+    with s.call('foo', 'bar', 'init()', returns='ok') as call:
+        s.call('bar', 'baz')
+        with s.loop('each item'):
+            s.note('baz', 'qux', text='quux\nquuz')
+            s.call('baz', 'qux')
+
+        with s.condition('odd'):
+            s.call('baz', 'foo')
+
+        with s.condition(kind='else'):
+            s.call('baz', 'bar', 'done')
+
+    s.note('foo', text='done')
+    return s, call
+
+
+def test_sequence_builder():
+    expected = Diagram(SOURCE)
+    for cls in (Diagram, ColumnarDiagram):
+        d = cls()
+        s, call = build(d)
+        assert isinstance(call, Call)
+        assert call.returntext == 'ok'
+        assert isinstance(call[1], Loop)
+        assert isinstance(call[1][0], Note)
+        assert isinstance(call[2], Condition)
+        assert d.dumps() == expected.dumps()
+        assert d.renders() == expected.renders()
+
+        # The same modules as the parsed ones.
+        parsed = expected[0]
+        assert s.modules_order == parsed.modules_order
+        assert [m.name for m in s.modules_byid] == \
+            [m.name for m in parsed.modules_byid]
+        assert call.callerid == s.modules['foo'].id
+        assert s.modules['thud'].order is None
+
+
+def test_sequence_builder_returnonly():
+    d = Diagram()
+    s = d.sequence()
+    s.call('foo', 'bar', returns='ok')
+    assert s[0].text == ''
+    assert s[0].returntext == 'ok'
+    assert d.dumps().endswith('foo -> bar: => ok')
+
+    parsed = Diagram(d.dumps())
+    assert parsed[0][0].returntext == 'ok'
+    assert parsed.dumps() == d.dumps()
+    assert parsed.renders() == d.renders()
+    assert parsed[0].digest == s.digest
+
+
+def test_sequence_builder_errors():
+    s = Diagram().sequence()
+    assert s.title == 'Untitled Sequence Diagram'
+
+    with raises(ValueError):
+        s.call('foo', 'bar baz')
+
+    with raises(ValueError):
+        s.call('for', 'bar')
+
+    with raises(ValueError):
+        s.call('foo', 'bar', 'baz\nqux')
+
+    with raises(ValueError):
+        s.note(text='foo')
+
+    with raises(ValueError):
+        s.note('foo', 'bar', 'baz', text='qux')
+
+    with raises(ValueError):
+        s.loop(kind='if')
+
+    with raises(ValueError):
+        s.condition(kind='for')
+
+    assert len(s) == 0
+    assert s.modules == {}
+
+    # The items which would be dumped as something else.
+    invalid = [
+        lambda s: s.note('foo'),
+        lambda s: s.note('foo', text=''),
+        lambda s: s.note('foo', text='| bar'),
+        lambda s: s.call('foo', 'bar', '| baz'),
+        lambda s: s.call('foo', 'bar', '|', returns='baz'),
+        lambda s: s.loop('| foo'),
+        lambda s: s.condition('|foo', kind='elif'),
+        lambda s: s.module('foo', title='| Foo'),
+        lambda s: s.module('foo', title='Foo\nBar'),
+        lambda s: s.module('foo', title=' '),
+        lambda s: s.module('foo', type='actor\nfoo'),
+    ]
+    for add in invalid:
+        d = Diagram()
+        with raises(ValueError):
+            add(d.sequence())
+
+        assert Diagram(d.dumps()).dumps() == d.dumps()
+
+    # Multiline texts may start with a |.
+    d = Diagram()
+    d.sequence().note('foo', text='| bar\nbaz')
+    d[0].loop('|\nfoo')
+    assert Diagram(d.dumps()).dumps() == d.dumps()
+
+    # Plain usage, without nesting.
+    block = s.call('foo', 'bar')
+    assert block.item is s[0]
+    s.loop(kind='while')
+    assert [i.kind for i in s] == ['call', 'while']
@@ -0,0 +1,64 @@
+from adia import Diagram
+
+from .helpers import eqdia
+
+
+def test_sequence_compact():
+    d = Diagram('''
+        sequence:
+
+        foo -> bar: hello => world
+          bar -> bar: self call
+          bar -> baz: x
+            baz -> foo: long text here
+        @foo ~ baz: a note
+        if: cond
+          baz -> baz: self
+    ''')
+    assert eqdia(d.renders(rstrip=False, compact=True), '''
+    ...............................................
+    . +-----+    +-----+          +-----+         .
+    . | foo |    | bar |          | baz |         .
+    . +-----+    +-----+          +-----+         .
+    .    |          |                |            .
+    .    |~~~hello~>|                |            .
+    .    |          |~~~self call~~~+|            .
+    .    |          |               ||            .
+    .    |          |<--------------+|            .
+    .    |          |                |            .
+    .    |          |~~~x~~~~~~~~~~~>|            .
+    .    |          |                |            .
+    .    |<~~long text here~~~~~~~~~~|            .
+    .    |          |                |            .
+    .    |-------------------------->|            .
+    .    |          |                |            .
+    .    |          |<---------------|            .
+    .    |<--world--|                |            .
+    .    |          |                |            .
+    . -----------------------------------         .
+    . | a note                          |         .
+    . -----------------------------------         .
+    .    |          |                |            .
+    .    |          |             ***********     .
+    .    |          |             * if cond *     .
+    .    |          |             ***********     .
+    .    |          |                |            .
+    .    |          |                |~~~self~~~+ .
+    .    |          |                |          | .
+    .    |          |                |<---------+ .
+    .    |          |                |            .
+    .    |          |             ***********     .
+    .    |          |             * end if  *     .
+    .    |          |             ***********     .
+    .    |          |                |            .
+    . +-----+    +-----+          +-----+         .
+    . | foo |    | bar |          | baz |         .
+    . +-----+    +-----+          +-----+         .
+    ...............................................
+    ''')
+
+    # Not wider than the default layout.
+    compact = d.renders(compact=True).splitlines()
+    default = d.renders().splitlines()
+    assert len(compact) == len(default)
+    assert max(map(len, compact)) < max(map(len, default))
@@ -239,3 +239,77 @@ def test_sequence_condition_on_reversecall():
     . +---+ +---+ +---+ .
     .....................
     ''')
+
+
+def test_sequence_condition_notesonly():
+    d = Diagram('''
+        sequence:
+
+        a -> b
+        if: note only
+          @b: baz
+    ''')
+    assert eqdia(d, '''
+    ......................
+    . +---+      +---+   .
+    . | a |      | b |   .
+    . +---+      +---+   .
+    .   |          |     .
+    .   |~~~~~~~~~>|     .
+    .   |          |     .
+    .   |<---------|     .
+    .   |          |     .
+    . ****************   .
+    . * if note only *   .
+    . ****************   .
+    .   |          |     .
+    .   |        ------- .
+    .   |        | baz | .
+    .   |        ------- .
+    .   |          |     .
+    . ****************   .
+    . * end if       *   .
+    . ****************   .
+    .   |          |     .
+    . +---+      +---+   .
+    . | a |      | b |   .
+    . +---+      +---+   .
+    ......................
+    ''')
+
+
+def test_sequence_alt_aftercall():
+    d = Diagram('''
+        sequence:
+
+        a -> b
+        alt: qux
+          b -> c
+    ''')
+    assert eqdia(d, '''
+    .....................
+    . +---+ +---+ +---+ .
+    . | a | | b | | c | .
+    . +---+ +---+ +---+ .
+    .   |     |     |   .
+    .   |~~~~>|     |   .
+    .   |     |     |   .
+    .   |<----|     |   .
+    .   |     |     |   .
+    .   |   *********** .
+    .   |   * alt qux * .
+    .   |   *********** .
+    .   |     |     |   .
+    .   |     |~~~~>|   .
+    .   |     |     |   .
+    .   |     |<----|   .
+    .   |     |     |   .
+    .   |   *********** .
+    .   |   * end alt * .
+    .   |   *********** .
+    .   |     |     |   .
+    . +---+ +---+ +---+ .
+    . | a | | b | | c | .
+    . +---+ +---+ +---+ .
+    .....................
+    ''')
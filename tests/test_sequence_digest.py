@@ -0,0 +1,76 @@
+from adia import Diagram
+from adia.columnar import ColumnarDiagram
+
+
+SOURCE = '''
+    diagram: Foo
+    sequence: Bar
+    foo.title: Foo
+    foo -> bar: init => done
+      bar -> baz
+        @baz: qux
+      for: each item
+        baz -> qux
+      if: odd
+        qux -> foo
+    @foo ~ bar: |
+      quux
+      quuz
+'''
+
+
+def digests(source):
+    return [i.digest for i in Diagram(source)[0]]
+
+
+def test_sequence_digest():
+    d = Diagram(SOURCE)
+    s = d[0]
+    call, note = s
+    assert len(call.digest) == 32
+    assert call.digest == call._digest
+    assert call[0][0]._digest == call[0][0].digest
+    assert s.digest == Diagram(SOURCE)[0].digest
+    assert s.digest == Diagram(d.dumps())[0].digest
+    assert s.digest == ColumnarDiagram(SOURCE)[0].digest
+    assert s.digest == Diagram.from_bytes(d.to_bytes())[0].digest
+
+    # Stable across the processes.
+    assert note.digest.hex()[:16] == '2ae3c98a97afedde'
+
+    # Same subtrees
+    other = Diagram('''
+        sequence:
+        foo -> bar
+          bar -> baz
+            @baz: qux
+    ''')[0]
+    assert other[0][0].digest == call[0].digest
+    assert other[0].digest != call.digest
+    assert other.digest != s.digest
+
+
+def test_sequence_digest_changes():
+    expected = digests(SOURCE)
+    changes = [
+        ('init => done', 'init'),
+        ('init => done', 'init => ok'),
+        ('@baz: qux', '@bar: qux'),
+        ('@baz: qux', '@baz ~ bar: qux'),
+        ('for: each', 'while: each'),
+        ('baz -> qux', 'qux -> baz'),
+        ('if: odd', 'if: even'),
+        ('quuz', 'thud'),
+    ]
+    for old, new in changes:
+        source = SOURCE.replace(old, new, 1)
+        assert digests(source) != expected, new
+
+    assert digests(SOURCE.replace('    @foo', '      @foo')) != \
+        digests(SOURCE)
+
+    # Module attributes
+    s = Diagram(SOURCE)[0]
+    assert Diagram(SOURCE.replace('Foo\n', 'Qux\n'))[0].digest != s.digest
+    assert Diagram(SOURCE.replace('\n    foo.title: Foo', ''))[0].digest \
+        != s.digest
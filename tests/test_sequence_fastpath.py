@@ -0,0 +1,60 @@
+from adia import Diagram, InterpreterError
+from adia.sequence import Call, Note
+
+
+class SlowDiagram(Diagram):
+    fastpath = False
+
+
+def parse(cls, source):
+    try:
+        return cls(source).dumps()
+    except InterpreterError as ex:
+        return str(ex).replace(cls.__name__, 'Diagram')
+
+
+def test_sequence_fastpath():
+    d = Diagram('''
+        sequence:
+        foo -> bar: baz => qux
+          bar->baz
+          @bar ~ baz: thud
+        @foo: Thud
+    ''')
+    seq = d[0]
+    assert isinstance(seq[0], Call)
+    assert seq[0].caller == 'foo'
+    assert seq[0].callee == 'bar'
+    assert seq[0].text == 'baz'
+    assert seq[0].returntext == 'qux'
+    assert isinstance(seq[0][0], Call)
+    assert seq[0][0].text is None
+    assert isinstance(seq[0][1], Note)
+    assert seq[0][1].modules == ['bar', 'baz']
+    assert seq[1].text == 'Thud'
+    assert seq.modules_order == ['foo', 'bar', 'baz']
+
+
+def test_sequence_fastpath_fallback():
+    sources = [
+        'sequence:\nfoo -> bar: baz\n  bar -> baz: qux\n',
+        'sequence:\nfoo -> bar: |\n  baz\n  qux\nbar -> baz',
+        'sequence:\n@foo: |\n  baz\n@foo ~ bar: baz',
+        'sequence:\nfoo -> bar:  | baz\n@foo ~ bar:\n',
+        'sequence:\nfoo -> bar \\\n  -> baz\n',
+        'sequence:\nfoo \\: bar -> baz\n',
+        'sequence:\nfor -> bar\n',
+        'sequence:\nfoo -> bar # baz\n',
+        'sequence:\nfoo -> bar -> baz\n',
+        'sequence:\n\tfoo -> bar\n',
+        'sequence:\n@foo: bar\n  bar -> baz\n',
+        'sequence:\n@foo\n',
+        'sequence:\nfoo.title: Foo\nfoo -> bar: ünïcode\n',
+        'foo -> bar\n',
+        'diagram: foo\n  foo -> bar\n',
+    ]
+
+    for source in sources:
+        expected = parse(SlowDiagram, source)
+        assert parse(Diagram, source) == expected
+        assert parse(Diagram, source.encode()) == expected
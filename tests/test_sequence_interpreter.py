@@ -304,3 +304,53 @@ def test_sequence_returntext():
     d = seq(s)
     assert eqbigstr(d, s)
     assert d[0].returntext == 'hi'
+
+
+def test_sequence_slots():
+    d = seq('''
+        sequence:
+        foo -> bar: hello() => hi
+          @bar: baz
+        for:
+          bar -> foo
+    ''')
+    call, loop = d
+    note = call[0]
+    for item in (call, note, loop, loop[0], d.modules['foo']):
+        assert not hasattr(item, '__dict__')
+
+    assert call.left == 'foo -> bar'
+    assert call.right == 'hello() => hi'
+    assert note.left == '@bar'
+    assert note.modules == ['bar']
+    assert loop[0].returntext is None
+
+
+def test_sequence_modules_registry():
+    d = seq('''
+        sequence:
+        @qux: note
+        foo -> bar: hello()
+          bar -> foo: hello()
+        @baz ~ foo: note
+        bar.title: Bar
+    ''')
+    assert [m.name for m in d.modules_byid] == ['qux', 'foo', 'bar', 'baz']
+    assert [m.id for m in d.modules_byid] == [0, 1, 2, 3]
+    assert [d.modules[m].order for m in ['qux', 'foo', 'bar', 'baz']] == \
+        [None, 0, 1, None]
+    assert d.modules_order == ['foo', 'bar']
+    assert d.modules['bar'].title == 'Bar'
+
+    call = d[1]
+    assert (call.callerid, call.calleeid) == (1, 2)
+    assert (call[0].callerid, call[0].calleeid) == (2, 1)
+    assert d[0].moduleids == (0, )
+    assert d[2].moduleids == (3, 1)
+
+    # Interned
+    assert call.caller is call[0].callee
+    assert call.text is call[0].text
+
+    with raises(BadAttribute):
+        seq('sequence:\nfoo.id: 1\n')
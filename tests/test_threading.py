@@ -0,0 +1,66 @@
+import gc
+import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from adia import Diagram, diagram
+
+
+MODULES = ['foo', 'bar', 'baz', 'qux', 'quux']
+
+
+def source(i):
+    caller = f'{MODULES[i % 5]}{i}'
+    callee = f'{MODULES[(i + 1 + i // 5) % 5]}{i}'
+    other = f'{MODULES[i % 3]}{i}'
+    return f'''
+        diagram: Diagram #{i}
+        sequence: Sequence #{i}
+        {caller}.title: Caller {i}
+        {caller} -> {callee}: call({i}) => {i * 2}
+          for: each {i}
+            {callee} -> {caller}: loop {i}
+          @{callee}: |
+            multiline
+            {'text ' * (i % 7)}
+        if: {i} is odd
+          {callee} -> {callee}: self {i}
+        else:
+          {caller} -> {other}: else {i}
+    '''
+
+
+def test_threading_concurrent_render():
+    # A distinct source per task, each checked against its own serial
+    # parse, so a result leaked from another thread is never equal.
+    sources = [source(i) for i in range(1000)]
+    expected = [diagram(s) for s in sources]
+    assert len(set(expected)) == len(sources)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            result = list(executor.map(diagram, sources))
+
+            # Render a single diagram concurrently
+            d = Diagram(sources[0])
+            shared = list(executor.map(
+                lambda _: d.renders(),
+                range(50)
+            ))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert result == expected
+    assert shared == [expected[0]] * 50
+
+
+def test_threading_no_shared_state():
+    d = Diagram(source(1))
+    ref = weakref.ref(d)
+    del d
+    gc.collect()
+
+    # Nothing such as the statemap actions keeps the last diagram alive.
+    assert ref() is None
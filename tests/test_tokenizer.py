@@ -241,3 +241,93 @@ def test_space_at_emptyline_issue46():
     assert next(gen) == (EOF,     '',    (4,  0), (4,  0))
     with raises(StopIteration):
         next(gen)
+
+
+def feed(string):
+    tokenizer = Tokenizer()
+
+    with io.StringIO(string) as f:
+        while True:
+            line = f.readline()
+            if line and not line.endswith('\n'):
+                line += '\n'
+
+            yield from tokenizer.feedline(line)
+            if not line:
+                break
+
+
+def test_tokenizer_tokenize():
+    sources = [
+        '',
+        '\n',
+        'foo',
+        'foo  ',
+        '  ',
+        '#foo bar.baz(a, b): as return\n  foo',
+        'foo -> bar: baz => qux\n  bar -> baz:\n    baz -> qux',
+        'foo\n  bar\n    thud\n  baz\n    fred\n      corge\nqux quux',
+        '\n    foo bar\n    bar\n        baz\n        qux\n\n'
+        '            quux\n',
+        '\n    |\n        foo\n        bar.\n    foo bar\n    ',
+        '@foo: |\n  foo\n    \n  bar\n@bar: baz',
+        '@foo: |\n  foo\n  bar',
+        'foo: | bar\nbaz: |\n',
+        '\\@ \\: \\|',
+        '\\\n \n',
+        '\\\\',
+        'foo\\\n  bar\\\n.baz',
+        'foo\\',
+        'foo\n  \nbar',
+        'foo \\: bar: baz',
+        'foo:  |\n  bar',
+    ]
+
+    def positions(tokens):
+        return [(t.type, t.string, t.start, t.end) for t in tokens]
+
+    for s in sources:
+        assert positions(Tokenizer().tokenize(s)) == positions(feed(s))
+
+
+def test_tokenizer_tokenize_bytes():
+    source = \
+        'fóó -> bär: bäz\n' \
+        '  bär -> qux\n' \
+        '@fóó: |\n' \
+        '  ünï\n' \
+        '  côde\n' \
+        'qux \\: fóó'
+
+    def tokens(source):
+        return [tuple(t) for t in Tokenizer().tokenize(source)]
+
+    expected = tokens(source)
+    assert expected[0] == (NAME, 'fóó', (1, 0), (1, 3), 'fóó -> bär: bäz\n')
+    assert expected[4] == (EVERYTHING, ' bäz', (1, 11), (1, 15),
+                           'fóó -> bär: bäz\n')
+
+    encoded = source.encode()
+    assert tokens(encoded) == expected
+    assert tokens(bytearray(encoded)) == expected
+    assert tokens(memoryview(encoded)) == expected
+
+
+def test_tokenizer_tokenize_multiline():
+    tokens = Tokenizer().tokenize(
+        '@foo: |\n'
+        '  foo\n'
+        '    bar\n'
+        '  baz\n'
+        'qux'
+    )
+    tokens = [(t.type, t.string, t.start, t.end) for t in tokens]
+    assert tokens == [
+        (AT,        '@',             (1, 0), (1, 1)),
+        (NAME,      'foo',           (1, 1), (1, 4)),
+        (COLON,     ':',             (1, 4), (1, 5)),
+        (MULTILINE, 'foo\n  bar\nbaz', (2, 2), (4, 5)),
+        (NAME,      'qux',           (5, 0), (5, 3)),
+        (NEWLINE,   '\n',            (5, 3), (5, 4)),
+        (EOF,       '',              (6, 0), (6, 0)),
+    ]
@@ -0,0 +1,47 @@
+from adia.token import NAME, COLON, EVERYTHING, NEWLINE, MULTILINE, EOF, AT
+from adia.tokenizer import Tokenizer
+from adia.tokenstream import TokenStream
+
+
+def test_tokenstream():
+    source = '''
+        diagram: Foo
+        sequence:
+
+        foo -> bar: baz() => qux
+          @bar: |
+            Lorem ipsum
+              dolor sit amet.
+          bar -> baz
+        \\@foo ~ bar: Thud
+    '''
+    tokens = TokenStream(source)
+    assert len(tokens) == 35
+    assert list(tokens) == list(Tokenizer().tokenize(source))
+
+    assert tokens.types[1] == NAME
+    assert tokens.string(1) == 'diagram'
+    assert tokens.start(1) == (2, 8)
+    assert tokens.end(1) == (2, 15)
+    assert tokens.types[3] == EVERYTHING
+    assert tokens.string(3) == ' Foo'
+
+    assert tokens.types[17] == AT
+    assert tokens.types[19] == COLON
+    assert tokens.types[20] == MULTILINE
+    assert tokens.string(20) == 'Lorem ipsum\n  dolor sit amet.'
+    assert tokens.start(20) == (7, 12)
+    assert tokens.end(20) == (8, 29)
+    assert tokens.types[26] == NAME
+    assert tokens.string(26) == '@'
+
+    assert tokens[-1].type == EOF
+    assert tokens[-2].type == NEWLINE
+
+
+def test_tokenstream_nonewline():
+    tokens = TokenStream('foo -> bar')
+    assert [t.string for t in tokens] == ['foo', '->', 'bar', '\n', '']
+    assert tokens.start(3) == (1, 10)
+    assert tokens.end(3) == (1, 11)
+    assert tokens.start(4) == (2, 0)